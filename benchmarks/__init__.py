@@ -0,0 +1 @@
+# Benchmarks e servidor local de testes do PEP Downloader Bot
\ No newline at end of file
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Vários processos do bot iniciados juntos sobre o mesmo diretório de download.
+
+Simula crons simultâneos (ou nós no mesmo armazenamento compartilhado): cada
+processo executa PEPDownloaderBot.run com extração no mesmo diretório, contra
+o servidor local com banda limitada para que as execuções se sobreponham. Com
+a trava por arquivo, apenas um processo transfere o arquivo; os demais esperam
+e revalidam a cópia publicada. Mede transferências (GET 200/206 do arquivo),
+bytes enviados e a integridade do ZIP e dos arquivos extraídos.
+
+Termina com status 1 se algum processo falhar, se houver mais de uma
+transferência do arquivo ou se a saída não estiver íntegra.
+
+Uso: python -m benchmarks.bench_concurrent_runs [--processes 4] [--rows 20000] [--bandwidth-kb 2048]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import time
+import zipfile
+from pep_downloader.bot import PEPDownloaderBot
+from pep_downloader.date_generator import DateGenerator
+from benchmarks.dataset_generator import PEPDatasetGenerator
+from benchmarks.standin_server import StandinServer
+
+
+def run_bot(download_dir: str, portal_url: str, start, results) -> None:
+    """Executa o bot em um processo separado, após o sinal de início comum."""
+    bot = PEPDownloaderBot(download_dir=download_dir, base_url=portal_url, extract_files=True, log_level='error')
+    start.wait()
+    download_result, extraction_result = bot.run()
+    results.put((os.getpid(), download_result.success, download_result.skipped,
+                 bool(extraction_result and extraction_result.success)))
+
+
+def check_output(download_dir: str, filename: str, content: bytes) -> bool:
+    """Confere o ZIP publicado e cada membro extraído contra o conteúdo do servidor."""
+    zip_path = os.path.join(download_dir, filename)
+    with open(zip_path, 'rb') as file:
+        if file.read() != content:
+            return False
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        for info in zip_ref.infolist():
+            with open(os.path.join(download_dir, info.filename), 'rb') as file:
+                if file.read() != zip_ref.read(info):
+                    return False
+    leftovers = [name for name in os.listdir(download_dir) if name.endswith(('.part', '.tmp'))]
+    return not leftovers
+
+
+def check(outcomes: list, processes: int, transfers: int, intact: bool) -> list:
+    """Verificações do cenário; retorna as falhas encontradas."""
+    failures = [f"processo {pid}: download ou extração falhou"
+                for pid, success, _, extracted in outcomes if not (success and extracted)]
+    if len(outcomes) < processes:
+        failures.append(f"{processes - len(outcomes)} processo(s) terminaram sem resultado")
+    if transfers != 1:
+        failures.append(f"{transfers} transferências do arquivo (esperada 1)")
+    if not intact:
+        failures.append("ZIP ou arquivos extraídos divergentes, ou temporários restantes")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=20000, help='Registros do snapshot')
+    parser.add_argument('--bandwidth-kb', type=int, default=2048, help='Banda do servidor por conexão (KB/s)')
+    parser.add_argument('--timeout', type=float, default=300, help='Tempo máximo por processo (s)')
+    args = parser.parse_args()
+    
+    month = DateGenerator().get_available_months(1)[0]
+    filename = f"{month}_PEP.zip"
+    content = PEPDatasetGenerator(rows=args.rows, start_month=month).snapshot_bytes(month)
+    
+    context = multiprocessing.get_context('spawn')
+    with StandinServer({filename: content}, bandwidth=args.bandwidth_kb * 1024) as server, \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        start = context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=run_bot, args=(tmp_dir, server.portal_url, start, results))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        time.sleep(2)  # importações dos processos (spawn)
+        
+        start_time = time.time()
+        start.set()
+        outcomes = []
+        try:
+            for _ in processes:
+                outcomes.append(results.get(timeout=args.timeout))
+        except queue.Empty:
+            pass  # processo terminou com erro (ou travou): contado como falha
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        elapsed = time.time() - start_time
+        
+        transfers = sum(1 for method, status in server.requests if method == 'GET' and status in (200, 206))
+        intact = check_output(tmp_dir, filename, content)
+        
+        print(f"\n=== RESULTADO ({args.processes} processos, {len(content) / (1024*1024):.1f} MB, "
+              f"{args.bandwidth_kb} KB/s) ===")
+        for pid, success, skipped, extracted in outcomes:
+            origin = "cópia publicada" if skipped else "download"
+            print(f"  processo {pid}: ok={success} origem={origin} extração={extracted}")
+        print(f"Transferências do arquivo: {transfers}  bytes enviados: {server.bytes_sent} "
+              f"({server.bytes_sent / len(content):.2f}x o arquivo)  tempo: {elapsed:.1f}s")
+        print(f"ZIP e membros extraídos íntegros, sem temporários: {intact}")
+        
+        failures = check(outcomes, args.processes, transfers, intact)
+        for failure in failures:
+            print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
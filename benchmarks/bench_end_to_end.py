@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do PEPDownloaderBot.run contra o servidor local.
+
+O servidor imita o portal (302 para o ZIP, 404 para meses não publicados,
+403 opcional em HEAD, latência, banda e quedas configuráveis). Cada repetição
+roda em um processo novo e mede: latência da verificação dos meses, taxa de
+download (MB/s), tempo de extração e pico de memória (RSS).
+
+O snapshot é gerado por benchmarks.dataset_generator (ou, com --dataset-dir, é o
+AAAAMM_PEP.zip mais recente de um diretório já gerado) e publicado nos meses
+recentes, exceto o atual.
+
+Uso: python -m benchmarks.bench_end_to_end [--rows 200000] [--repeat 3] [--latency-ms 50]
+     [--bandwidth-mb 0] [--forbid-head] [--drops 0] [--dataset-dir DIR] [--json resultado.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pep_downloader.bot import PEPDownloaderBot
+from pep_downloader.date_generator import DateGenerator
+from pep_downloader.month_prober import MonthProber
+from benchmarks.dataset_generator import PEPDatasetGenerator
+from benchmarks.standin_server import StandinServer, read_zip_files
+
+
+def run_once(base_url: str) -> dict:
+    """Executa o bot em um diretório temporário (chamado em um processo novo)."""
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        bot = PEPDownloaderBot(download_dir=tmp_dir, extract_files=True, base_url=base_url)
+        probe_result = bot.probe_months(months_back=6, mode=MonthProber.MODE_LATEST)
+        
+        start_time = time.time()
+        download_result, extraction_result = bot.run()
+        total_time = time.time() - start_time
+    
+    return {
+        'success': download_result.success and bool(extraction_result and extraction_result.success),
+        'probe_time': probe_result.probe_time,
+        'probes': len(probe_result.probes),
+        'file_size': download_result.file_size,
+        'download_time': download_result.download_time,
+        'extraction_time': extraction_result.extraction_time if extraction_result else 0.0,
+        'total_time': total_time,
+        # ru_maxrss em KB no Linux (bytes no macOS)
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+    }
+
+
+def summarize(runs: list) -> dict:
+    """Mediana e máximo das métricas das repetições."""
+    def median(key):
+        return statistics.median(run[key] for run in runs)
+    
+    download_time = median('download_time')
+    return {
+        'runs': len(runs),
+        'success': all(run['success'] for run in runs),
+        'probe_ms': median('probe_time') * 1000,
+        'probe_ms_max': max(run['probe_time'] for run in runs) * 1000,
+        'download_mb_s': runs[0]['file_size'] / (1024 * 1024) / download_time if download_time else 0.0,
+        'extraction_s': median('extraction_time'),
+        'total_s': median('total_time'),
+        'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000, help='Registros do snapshot gerado')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=50, help='Latência de cada resposta')
+    parser.add_argument('--bandwidth-mb', type=float, default=0, help='Banda por conexão em MB/s (0 = sem limite)')
+    parser.add_argument('--forbid-head', action='store_true', help='Arquivos respondem 403 a HEAD')
+    parser.add_argument('--drops', type=int, default=0, help='Quedas de conexão injetadas (na metade do arquivo)')
+    parser.add_argument('--dataset-dir', metavar='DIR',
+                        help='Usar o AAAAMM_PEP.zip mais recente de um diretório em vez de gerar o snapshot')
+    parser.add_argument('--json', metavar='ARQUIVO', help='Gravar o resultado em JSON (para comparar execuções)')
+    args = parser.parse_args()
+    
+    months = DateGenerator().get_available_months(months_back=6)
+    if args.dataset_dir:
+        available = read_zip_files(args.dataset_dir)
+        if not available:
+            parser.error(f"Nenhum arquivo .zip em {args.dataset_dir}")
+        snapshot = available[max(available)]
+    else:
+        snapshot = PEPDatasetGenerator(rows=args.rows, start_month=months[-1]).snapshot_bytes(months[1])
+    
+    # O mês mais recente ainda não foi publicado, como costuma acontecer no portal
+    server = StandinServer({f"{year_month}_PEP.zip": snapshot for year_month in months[1:]},
+                           latency=args.latency_ms / 1000,
+                           bandwidth=int(args.bandwidth_mb * 1024 * 1024),
+                           forbid_head=args.forbid_head,
+                           drops=args.drops,
+                           drop_after_bytes=len(snapshot) // 2)
+    
+    # Processo novo por repetição: pico de RSS isolado do servidor e das outras execuções
+    context = multiprocessing.get_context('spawn')
+    with server, context.Pool(processes=1, maxtasksperchild=1) as pool:
+        runs = pool.map(run_once, [server.portal_url] * args.repeat, chunksize=1)
+    
+    summary = summarize(runs)
+    summary.update({
+        'rows': None if args.dataset_dir else args.rows,
+        'snapshot_mb': len(snapshot) / (1024 * 1024),
+        'latency_ms': args.latency_ms,
+        'bandwidth_mb': args.bandwidth_mb,
+        'forbid_head': args.forbid_head,
+        'drops': args.drops,
+    })
+    
+    source = args.dataset_dir if args.dataset_dir else f"{args.rows} registros"
+    print(f"\n=== RESULTADO ({source}, ZIP de {summary['snapshot_mb']:.1f} MB, "
+          f"{args.repeat} repetições, latência {args.latency_ms:.0f} ms) ===")
+    print(f"Sucesso:              {summary['success']}")
+    print(f"Verificação dos meses: {summary['probe_ms']:.1f} ms (máx {summary['probe_ms_max']:.1f} ms)")
+    print(f"Download:             {summary['download_mb_s']:.1f} MB/s")
+    print(f"Extração:             {summary['extraction_s']:.2f} s")
+    print(f"Execução completa:    {summary['total_s']:.2f} s")
+    print(f"Pico de RSS:          {summary['peak_rss_mb']:.1f} MB")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'summary': summary, 'runs': runs}, file, indent=2)
+        print(f"Resultado gravado em {args.json}")
+    
+    sys.exit(0 if summary['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
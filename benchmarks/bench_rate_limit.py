@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backfill contra um servidor que limita requisições por segundo (429 + Retry-After).
+
+O servidor local responde 429 às requisições acima de `--max-rps` no último
+segundo. Cada caso baixa os mesmos meses com `--workers` downloads simultâneos
+e um `rate_limit` diferente do bot (0 = sem balde de tokens, apenas a janela
+AIMD e o Retry-After). Mede arquivos concluídos, respostas 429, tempo total e
+a janela de concorrência ao final.
+
+Uso: python -m benchmarks.bench_rate_limit [--months 24] [--workers 8] [--max-rps 10] [--rates 0 5 10 20]
+"""
+import argparse
+import tempfile
+import time
+from pep_downloader.bot import PEPDownloaderBot
+from benchmarks.dataset_generator import PEPDatasetGenerator
+from benchmarks.standin_server import StandinServer
+
+
+def run_case(files: dict, months: list, workers: int, max_rps: int, rate: float) -> dict:
+    """Executa o backfill em um servidor novo (contadores zerados) com a taxa informada."""
+    with StandinServer(files, max_rps=max_rps, retry_after=1) as server, \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        bot = PEPDownloaderBot(download_dir=tmp_dir, base_url=server.portal_url, log_level='error',
+                               pool_size=workers, rate_limit=rate)
+        start_time = time.time()
+        result = bot.download_range(months[0], months[-1], workers=workers)
+        elapsed = time.time() - start_time
+        
+        statuses = [status for _, status in server.requests]
+        return {
+            'done': len(result.results) - len(result.failed),
+            'requests': len(statuses),
+            'throttled': statuses.count(429),
+            'elapsed': elapsed,
+            'window': bot.rate_limiter.concurrency,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--rows', type=int, default=500, help='Registros por snapshot')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--max-rps', type=int, default=10, help='Limite do servidor (requisições/s)')
+    parser.add_argument('--rates', type=float, nargs='+', default=[0, 5, 10, 20],
+                        help='Valores de rate_limit do bot (0 = sem balde de tokens)')
+    args = parser.parse_args()
+    
+    generator = PEPDatasetGenerator(rows=args.rows, start_month="202001")
+    months = [f"{2020 + index // 12}{index % 12 + 1:02d}" for index in range(args.months)]
+    files = {f"{month}_PEP.zip": generator.snapshot_bytes(month) for month in months}
+    
+    results = {rate: run_case(files, months, args.workers, args.max_rps, rate) for rate in args.rates}
+    
+    print(f"\n=== RESULTADO ({args.months} meses, {args.workers} workers, servidor: {args.max_rps} req/s) ===")
+    for rate, stats in results.items():
+        label = "sem balde" if not rate else f"{rate:g} req/s"
+        print(f"{label:>10}: {stats['done']}/{args.months} arquivos em {stats['elapsed']:.1f}s  "
+              f"requisições={stats['requests']} 429={stats['throttled']} janela final={stats['window']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compara bytes transferidos com e sem retomada (Range) sob quedas de conexão.
+
+Termina com status 1 se algum download falhar ou chegar corrompido, ou se a
+retomada não enviar menos bytes que o download sem Range.
+
+Uso: python -m benchmarks.bench_resume [--size-mb 20] [--drops 3]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pep_downloader.console_logger import ConsoleLogger
+from pep_downloader.http_client import HTTPClient
+from benchmarks.standin_server import StandinServer
+
+
+def run_case(content: bytes, accept_ranges: bool, drops: int, drop_after: int) -> dict:
+    """Executa um download contra o servidor local e coleta estatísticas."""
+    name = "202501_PEP.zip"
+    with StandinServer({name: content}, accept_ranges=accept_ranges,
+                       drops=drops, drop_after_bytes=drop_after) as server:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            target = os.path.join(tmp_dir, name)
+            client = HTTPClient(ConsoleLogger(), max_retries=drops + 1)
+            
+            start_time = time.time()
+            success = client.download_file(server.file_url(name), target)
+            elapsed = time.time() - start_time
+            
+            intact = False
+            if success:
+                with open(target, 'rb') as file:
+                    intact = hashlib.sha256(file.read()).digest() == hashlib.sha256(content).digest()
+            
+            return {
+                'success': success,
+                'intact': intact,
+                'bytes_sent': server.bytes_sent,
+                'elapsed': elapsed,
+            }
+
+
+def check(results: dict, drops: int) -> list:
+    """Verificações do cenário; retorna as falhas encontradas."""
+    failures = [f"{label}: download falhou ou arquivo corrompido"
+                for label, stats in results.items() if not (stats['success'] and stats['intact'])]
+    with_range, without_range = results["com Range"]['bytes_sent'], results["sem Range"]['bytes_sent']
+    if drops > 0 and with_range >= without_range:
+        failures.append(f"retomada enviou {with_range} bytes, sem Range {without_range}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=20)
+    parser.add_argument('--drops', type=int, default=3)
+    args = parser.parse_args()
+    
+    content = os.urandom(args.size_mb * 1024 * 1024)
+    # Cada queda corta a resposta após 60% do tamanho do arquivo
+    drop_after = int(len(content) * 0.6)
+    
+    print(f"Arquivo: {args.size_mb} MB, quedas injetadas: {args.drops}")
+    results = {}
+    for label, accept_ranges in (("sem Range", False), ("com Range", True)):
+        results[label] = run_case(content, accept_ranges, args.drops, drop_after)
+    
+    print("\n=== RESULTADO ===")
+    for label, stats in results.items():
+        print(f"{label:>10}: ok={stats['success']} íntegro={stats['intact']} "
+              f"bytes enviados={stats['bytes_sent'] / (1024*1024):.1f} MB "
+              f"({stats['bytes_sent'] / len(content):.2f}x) em {stats['elapsed']:.1f}s")
+    
+    failures = check(results, args.drops)
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compara download em stream único e em vários segmentos paralelos.
+
+O servidor local limita a banda de cada conexão para simular o gargalo por
+conexão do portal.
+
+Uso: python -m benchmarks.bench_segmented [--size-mb 32] [--bandwidth-mb 8] [--segments 1 2 4 8]
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from pep_downloader.console_logger import ConsoleLogger
+from pep_downloader.http_client import HTTPClient
+from benchmarks.standin_server import StandinServer
+
+
+def run_case(server: StandinServer, name: str, content_hash: bytes, segments: int) -> dict:
+    """Baixa o arquivo com o número de segmentos informado."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = os.path.join(tmp_dir, name)
+        client = HTTPClient(ConsoleLogger(), segments=segments)
+        
+        start_time = time.time()
+        success = client.download_file(server.file_url(name), target)
+        elapsed = time.time() - start_time
+        
+        intact = False
+        if success:
+            with open(target, 'rb') as file:
+                intact = hashlib.sha256(file.read()).digest() == content_hash
+        
+        return {'success': success, 'intact': intact, 'elapsed': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--bandwidth-mb', type=float, default=8, help='Banda por conexão em MB/s')
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    
+    name = "202501_PEP.zip"
+    content = os.urandom(args.size_mb * 1024 * 1024)
+    content_hash = hashlib.sha256(content).digest()
+    
+    results = {}
+    with StandinServer({name: content}, bandwidth=int(args.bandwidth_mb * 1024 * 1024)) as server:
+        for segments in args.segments:
+            results[segments] = run_case(server, name, content_hash, segments)
+    
+    print(f"\n=== RESULTADO ({args.size_mb} MB, {args.bandwidth_mb} MB/s por conexão) ===")
+    for segments, stats in results.items():
+        print(f"{segments:>3} segmento(s): ok={stats['success']} íntegro={stats['intact']} "
+              f"{stats['elapsed']:.2f}s ({args.size_mb / stats['elapsed']:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compara o caminho de gravação antigo (iter_content de 8 KiB) com o readinto em buffer reutilizado.
+
+"antes" reproduz o loop anterior do HTTPClient.download: iter_content(8192),
+write em arquivo com buffer e SHA-256 por bloco. "depois" é o HTTPClient.download
+atual (readinto em memoryview, arquivo pré-alocado e sem buffer) com os tamanhos
+de buffer informados. Mede MB/s e o tempo de CPU da thread do cliente (o
+servidor local roda em outras threads do mesmo processo).
+
+Uso: python -m benchmarks.bench_write_path [--size-mb 64] [--repeat 3] [--buffer-kb 64 1024 4096]
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+from pep_downloader.console_logger import ConsoleLogger
+from pep_downloader.http_client import HTTPClient
+from benchmarks.standin_server import StandinServer
+
+
+def legacy_download(client: HTTPClient, url: str, filepath: str) -> bool:
+    """Loop de gravação anterior (um objeto bytes, um write e um update por bloco de 8 KiB)."""
+    client.head(url)
+    with client.session.get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        digest = hashlib.sha256()
+        with open(filepath, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    file.write(chunk)
+                    digest.update(chunk)
+    return True
+
+
+def run_case(server: StandinServer, name: str, content_hash: bytes, buffer_kb: int, repeat: int) -> dict:
+    """Baixa o arquivo `repeat` vezes e retorna as medianas de tempo e CPU."""
+    logger = ConsoleLogger(level='error')
+    client = HTTPClient(logger, buffer_size=(buffer_kb or 8) * 1024)
+    url = server.file_url(name)
+    elapsed, cpu = [], []
+    intact = True
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = os.path.join(tmp_dir, name)
+        for _ in range(repeat):
+            if os.path.exists(target):
+                os.remove(target)
+            
+            start_time, start_cpu = time.perf_counter(), time.thread_time()
+            success = legacy_download(client, url, target) if not buffer_kb else client.download_file(url, target)
+            elapsed.append(time.perf_counter() - start_time)
+            cpu.append(time.thread_time() - start_cpu)
+            
+            with open(target, 'rb') as file:
+                intact = intact and success and hashlib.sha256(file.read()).digest() == content_hash
+    
+    return {'intact': intact, 'elapsed': statistics.median(elapsed), 'cpu': statistics.median(cpu)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--buffer-kb', type=int, nargs='+', default=[64, 1024, 4096],
+                        help='Tamanhos de buffer do caminho novo')
+    args = parser.parse_args()
+    
+    name = "202501_PEP.zip"
+    content = os.urandom(args.size_mb * 1024 * 1024)
+    content_hash = hashlib.sha256(content).digest()
+    
+    # 0 = loop antigo de 8 KiB
+    cases = [0] + args.buffer_kb
+    results = {}
+    with StandinServer({name: content}) as server:
+        for buffer_kb in cases:
+            results[buffer_kb] = run_case(server, name, content_hash, buffer_kb, args.repeat)
+    
+    baseline_cpu = results[0]['cpu']
+    print(f"\n=== RESULTADO ({args.size_mb} MB, mediana de {args.repeat} execuções) ===")
+    for buffer_kb, stats in results.items():
+        label = "antes (8 KiB)" if not buffer_kb else f"depois ({buffer_kb} KiB)"
+        print(f"{label:>18}: íntegro={stats['intact']} {args.size_mb / stats['elapsed']:7.1f} MB/s  "
+              f"CPU {stats['cpu']:.3f}s ({stats['cpu'] / baseline_cpu:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Gerador de snapshots PEP sintéticos (AAAAMM_PEP.zip) para testes em escala.
+
+Os arquivos seguem o formato do portal (CSV ";" com aspas, Latin-1, CRLF,
+mesmo cabeçalho) e podem ser lidos pelo RecordReader, extraídos pelo
+ZipExtractor e servidos pelo StandinServer.
+
+Cada registro é derivado de forma determinística do seu número (semente +
+hash), então um mês pode ser gerado sem os anteriores e a memória não depende
+do número de linhas. A rotatividade entre meses é controlada:
+
+- `churn`: fração da base que sai e entra a cada mês (janela deslizante de
+  registros: o tamanho se mantém e o diff tem ~churn*rows remoções e inclusões);
+- `end_rate`: probabilidade mensal de um registro ativo ganhar Data_Fim_Exercício
+  (e Data_Fim_Carência = fim + 5 anos), que aparece no diff como alteração.
+
+Uso: python -m benchmarks.dataset_generator --from 202401 --to 202406 --rows 2000000
+     [--churn 0.02] [--end-rate 0.01] [--seed 0] [--workers N] [--output-dir dados_sinteticos]
+"""
+import argparse
+import bisect
+import calendar
+import io
+import math
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+from pep_downloader.date_generator import DateGenerator
+
+
+HEADER = ('"CPF";"Nome_PEP";"Sigla_Função";"Descrição_Função";"Nível_Função";"Nome_Órgão";'
+          '"Data_Início_Exercício";"Data_Fim_Exercício";"Data_Fim_Carência"\r\n')
+
+ENCODING = 'latin-1'
+
+FIRST_NAMES = (
+    "MARIA", "JOSE", "ANA", "JOÃO", "ANTONIO", "FRANCISCO", "CARLOS", "PAULO", "PEDRO", "LUCAS",
+    "LUIZ", "MARCOS", "LUIS", "GABRIEL", "RAFAEL", "FRANCISCA", "DANIEL", "MARCELO", "BRUNO", "EDUARDO",
+    "FELIPE", "RAIMUNDO", "RODRIGO", "ANTÔNIA", "MANOEL", "ADRIANA", "JULIANA", "MÁRCIA", "FERNANDA", "PATRICIA",
+    "ALINE", "SANDRA", "CAMILA", "AMANDA", "BRUNA", "JÉSSICA", "LETICIA", "JULIA", "LUCIANA", "VANESSA",
+    "SÉRGIO", "FÁBIO", "ROBERTO", "JORGE", "RICARDO", "ANDRÉ", "FERNANDO", "FLÁVIO", "CLÁUDIO", "VINÍCIUS",
+)
+
+SURNAMES = (
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES",
+    "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES", "SOARES", "FERNANDES", "VIEIRA", "BARBOSA",
+    "ROCHA", "DIAS", "NASCIMENTO", "ANDRADE", "MOREIRA", "NUNES", "MARQUES", "MACHADO", "MENDES", "FREITAS",
+    "CARDOSO", "RAMOS", "GONÇALVES", "SANTANA", "TEIXEIRA", "ARAÚJO", "MONTEIRO", "CAVALCANTI", "CORRÊA", "BRAGA",
+    "DE SOUZA", "DA SILVA", "DOS SANTOS", "DE OLIVEIRA", "DE JESUS", "PINTO", "MOURA", "CAMPOS", "MIRANDA", "CASTRO",
+)
+
+ORGAOS = (
+    "MINISTÉRIO DA SAÚDE", "MINISTÉRIO DA EDUCAÇÃO", "MINISTÉRIO DA FAZENDA", "MINISTÉRIO DA JUSTIÇA E SEGURANÇA PÚBLICA",
+    "MINISTÉRIO DA DEFESA", "MINISTÉRIO DAS RELAÇÕES EXTERIORES", "MINISTÉRIO DO TRABALHO E EMPREGO",
+    "MINISTÉRIO DA AGRICULTURA E PECUÁRIA", "MINISTÉRIO DE MINAS E ENERGIA", "MINISTÉRIO DOS TRANSPORTES",
+    "MINISTÉRIO DA PREVIDÊNCIA SOCIAL", "MINISTÉRIO DO MEIO AMBIENTE E MUDANÇA DO CLIMA", "MINISTÉRIO DAS CIDADES",
+    "MINISTÉRIO DA CIÊNCIA, TECNOLOGIA E INOVAÇÃO", "MINISTÉRIO DA GESTÃO E DA INOVAÇÃO EM SERVIÇOS PÚBLICOS",
+    "CÂMARA DOS DEPUTADOS", "SENADO FEDERAL", "TRIBUNAL DE CONTAS DA UNIÃO", "SUPREMO TRIBUNAL FEDERAL",
+    "SUPERIOR TRIBUNAL DE JUSTIÇA", "CONTROLADORIA-GERAL DA UNIÃO", "ADVOCACIA-GERAL DA UNIÃO",
+    "BANCO CENTRAL DO BRASIL", "INSTITUTO NACIONAL DO SEGURO SOCIAL", "AGÊNCIA NACIONAL DE SAÚDE SUPLEMENTAR",
+    "AGÊNCIA NACIONAL DE ENERGIA ELÉTRICA", "AGÊNCIA NACIONAL DE TELECOMUNICAÇÕES", "CAIXA ECONÔMICA FEDERAL",
+    "BANCO DO BRASIL S.A.", "PETRÓLEO BRASILEIRO S.A.", "BANCO NACIONAL DE DESENVOLVIMENTO ECONÔMICO E SOCIAL",
+    "FUNDAÇÃO NACIONAL DOS POVOS INDÍGENAS", "INSTITUTO BRASILEIRO DO MEIO AMBIENTE", "POLÍCIA FEDERAL",
+    "GOVERNO DO ESTADO DE SÃO PAULO", "GOVERNO DO ESTADO DE MINAS GERAIS", "GOVERNO DO ESTADO DO RIO DE JANEIRO",
+    "GOVERNO DO ESTADO DA BAHIA", "GOVERNO DO ESTADO DO PARANÁ", "GOVERNO DO ESTADO DO RIO GRANDE DO SUL",
+    "ASSEMBLEIA LEGISLATIVA DO ESTADO DE SÃO PAULO", "TRIBUNAL DE JUSTIÇA DO ESTADO DE MINAS GERAIS",
+)
+
+CITIES = (
+    "SÃO PAULO", "RIO DE JANEIRO", "BRASÍLIA", "SALVADOR", "FORTALEZA", "BELO HORIZONTE", "MANAUS", "CURITIBA",
+    "RECIFE", "GOIÂNIA", "BELÉM", "PORTO ALEGRE", "GUARULHOS", "CAMPINAS", "SÃO LUÍS", "MACEIÓ", "CAMPO GRANDE",
+    "SÃO GONÇALO", "TERESINA", "JOÃO PESSOA", "NATAL", "OSASCO", "SANTO ANDRÉ", "JABOATÃO DOS GUARARAPES",
+    "UBERLÂNDIA", "CONTAGEM", "RIBEIRÃO PRETO", "SOROCABA", "CUIABÁ", "ARACAJU", "FEIRA DE SANTANA", "JOINVILLE",
+    "JUIZ DE FORA", "LONDRINA", "APARECIDA DE GOIÂNIA", "PORTO VELHO", "ANANINDEUA", "SERRA", "NITERÓI",
+    "CAXIAS DO SUL", "MACAPÁ", "FLORIANÓPOLIS", "VILA VELHA", "MAUÁ", "SÃO JOÃO DE MERITI", "CAMAÇARI",
+    "ITAPECERICA DA SERRA", "CAMPOS DOS GOYTACAZES", "PETRÓPOLIS", "VITÓRIA DA CONQUISTA", "ITABUNA",
+    "CRATO", "JUAZEIRO DO NORTE", "SÃO JOSÉ DO RIO PRETO", "PIRACICABA", "BAURU", "MARÍLIA", "CHAPECÓ",
+)
+
+# (sigla, descrição, nível); a ordem define o peso (as primeiras são as mais comuns)
+FUNCOES = (
+    ("VER", "VEREADOR", "-"),
+    ("CCE 1.13", "COORDENADOR-GERAL", "13"),
+    ("FCE 1.13", "COORDENADOR-GERAL", "13"),
+    ("CCE 1.15", "DIRETOR", "15"),
+    ("DAS 101.5", "COORDENADOR-GERAL", "5"),
+    ("DAS 101.6", "DIRETOR", "6"),
+    ("PREF", "PREFEITO", "-"),
+    ("VPREF", "VICE-PREFEITO", "-"),
+    ("CCE 1.17", "SECRETÁRIO", "17"),
+    ("DEP EST", "DEPUTADO ESTADUAL", "-"),
+    ("DEP FED", "DEPUTADO FEDERAL", "-"),
+    ("CCE 1.18", "SECRETÁRIO-EXECUTIVO", "18"),
+    ("JUIZ", "DESEMBARGADOR", "-"),
+    ("DIR", "DIRETOR DE EMPRESA ESTATAL", "-"),
+    ("PRES", "PRESIDENTE DE AUTARQUIA", "-"),
+    ("SEN", "SENADOR", "-"),
+    ("MIN", "MINISTRO DE TRIBUNAL", "-"),
+    ("NE", "MINISTRO DE ESTADO", "NE"),
+    ("GOV", "GOVERNADOR", "-"),
+)
+
+CARENCIA_YEARS = 5
+
+# Linhas por bloco codificado (unidade de trabalho dos processos)
+CHUNK_ROWS = 50_000
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix(value: int) -> int:
+    """Finalizador do splitmix64: 64 bits pseudoaleatórios a partir de um inteiro."""
+    value = (value + _GOLDEN) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def _unit(value: int) -> float:
+    """Converte 64 bits em um float uniforme em [0, 1)."""
+    return (value >> 11) * (1.0 / (1 << 53))
+
+
+def _zipf_cumulative(count: int, exponent: float) -> List[float]:
+    """Pesos acumulados de uma distribuição Zipf (o primeiro item é o mais frequente)."""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return [value / total for value in cumulative]
+
+
+def _parse_month(year_month: str) -> Tuple[int, int]:
+    if len(year_month) != 6 or not year_month.isdigit() or not 1 <= int(year_month[4:]) <= 12:
+        raise ValueError(f"Mês inválido (esperado AAAAMM): {year_month}")
+    return int(year_month[:4]), int(year_month[4:])
+
+
+def _add_months(year: int, month: int, count: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + count
+    return index // 12, index % 12 + 1
+
+
+def _format_date(value: Optional[date]) -> str:
+    return f"{value.day:02d}/{value.month:02d}/{value.year}" if value else ""
+
+
+def _plus_years(value: date, years: int) -> date:
+    try:
+        return value.replace(year=value.year + years)
+    except ValueError:  # 29/02
+        return value.replace(year=value.year + years, day=28)
+
+
+class PEPDatasetGenerator:
+    """
+    Gera snapshots mensais sintéticos com distribuições realistas de órgãos,
+    funções, nomes e datas, e rotatividade controlada entre meses.
+    """
+    
+    def __init__(self,
+                 rows: int = 1_000_000,
+                 start_month: str = "202401",
+                 churn: float = 0.02,
+                 end_rate: float = 0.01,
+                 ended_share: float = 0.25,
+                 seed: int = 0,
+                 workers: int = 1):
+        """
+        Args:
+            rows: Registros por snapshot
+            start_month: Primeiro mês da série (AAAAMM); meses anteriores não existem
+            churn: Fração dos registros substituída a cada mês
+            end_rate: Probabilidade mensal de um registro ativo ser encerrado (Data_Fim)
+            ended_share: Fração da base inicial já encerrada (em carência)
+            seed: Semente; a mesma semente gera os mesmos arquivos
+            workers: Processos que formatam os blocos de linhas (a saída não muda)
+        """
+        if not 0 <= churn < 1 or not 0 <= end_rate < 1:
+            raise ValueError("churn e end_rate devem estar em [0, 1)")
+        self.rows = max(1, rows)
+        self.start_year, self.start_month_number = _parse_month(start_month)
+        self.start_month = start_month
+        self.turnover = round(self.rows * churn)
+        self.end_rate = end_rate
+        self.ended_share = ended_share
+        self.seed = _mix(seed)
+        self.workers = max(1, workers)
+        
+        self._start_date = date(self.start_year, self.start_month_number, 1)
+        self._first_names = _zipf_cumulative(len(FIRST_NAMES), 0.8)
+        self._surnames = _zipf_cumulative(len(SURNAMES), 0.7)
+        self._funcoes = _zipf_cumulative(len(FUNCOES), 1.1)
+        self._orgaos = _zipf_cumulative(len(ORGAOS), 1.0)
+        self._cities = _zipf_cumulative(len(CITIES), 1.0)
+        self._log_keep = math.log(1.0 - end_rate) if end_rate else 0.0
+    
+    def month_index(self, year_month: str) -> int:
+        """Número de meses desde start_month."""
+        year, month = _parse_month(year_month)
+        index = (year - self.start_year) * 12 + (month - self.start_month_number)
+        if index < 0:
+            raise ValueError(f"Mês anterior ao início da série ({self.start_month}): {year_month}")
+        return index
+    
+    def iter_rows(self, year_month: str) -> Iterator[Tuple[str, ...]]:
+        """
+        Percorre as linhas do snapshot do mês (valores já formatados como no CSV).
+        
+        Yields:
+            tuple: CPF, nome, sigla, descrição, nível, órgão, início, fim, carência
+        """
+        month = self.month_index(year_month)
+        first_id = month * self.turnover
+        for record_id in range(first_id, first_id + self.rows):
+            yield self._row(record_id, month)
+    
+    def write_zip(self, year_month: str, output_dir: str = ".", compresslevel: int = 6) -> str:
+        """
+        Grava AAAAMM_PEP.zip (com AAAAMM_PEP.csv) no diretório informado (gravação atômica).
+        
+        Returns:
+            str: Caminho do arquivo gerado
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        zip_path = os.path.join(output_dir, f"{year_month}_PEP.zip")
+        temp_path = f"{zip_path}.part"
+        with open(temp_path, 'wb') as file:
+            self._write_archive(year_month, file, compresslevel)
+        os.replace(temp_path, zip_path)
+        return zip_path
+    
+    def snapshot_bytes(self, year_month: str, compresslevel: int = 6) -> bytes:
+        """Gera o ZIP do mês em memória (ex: para o StandinServer)."""
+        buffer = io.BytesIO()
+        self._write_archive(year_month, buffer, compresslevel)
+        return buffer.getvalue()
+    
+    def encode_chunk(self, month: int, first_id: int, count: int) -> bytes:
+        """Linhas CSV (Latin-1) dos registros first_id..first_id+count-1 no mês de índice `month`."""
+        return ''.join(
+            '"' + '";"'.join(self._row(record_id, month)) + '"\r\n'
+            for record_id in range(first_id, first_id + count)
+        ).encode(ENCODING)
+    
+    def _write_archive(self, year_month: str, file, compresslevel: int) -> None:
+        month = self.month_index(year_month)
+        first_id = month * self.turnover
+        chunks = [(first_id + offset, min(CHUNK_ROWS, self.rows - offset))
+                  for offset in range(0, self.rows, CHUNK_ROWS)]
+        
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+            with archive.open(f"{year_month}_PEP.csv", 'w', force_zip64=self.rows > 5_000_000) as stream:
+                stream.write(HEADER.encode(ENCODING))
+                if self.workers == 1 or len(chunks) == 1:
+                    for start, count in chunks:
+                        stream.write(self.encode_chunk(month, start, count))
+                    return
+                
+                # Blocos formatados em paralelo e gravados em ordem (compressão no processo principal)
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    for data in executor.map(_encode_chunk, [(self, month, start, count) for start, count in chunks]):
+                        stream.write(data)
+    
+    def _row(self, record_id: int, month: int) -> Tuple[str, ...]:
+        """Registro `record_id` como aparece no mês `month` (só o encerramento varia)."""
+        h = _mix(self.seed ^ (record_id * _GOLDEN & _MASK))
+        cpf = f"***.{h % 1000:03d}.{(h >> 10) % 1000:03d}-**"
+        
+        h = _mix(h)
+        name = [FIRST_NAMES[bisect.bisect(self._first_names, _unit(h))]]
+        if h & 3 == 0:
+            name.append(FIRST_NAMES[bisect.bisect(self._first_names, _unit(_mix(h ^ 1)))])
+        h = _mix(h)
+        if h & 1:
+            name.append(SURNAMES[bisect.bisect(self._surnames, _unit(_mix(h ^ 2)))])
+        name.append(SURNAMES[bisect.bisect(self._surnames, _unit(h))])
+        
+        h = _mix(h)
+        sigla, descricao, nivel = FUNCOES[bisect.bisect(self._funcoes, _unit(h))]
+        h = _mix(h)
+        if sigla in ("VER", "PREF", "VPREF"):
+            orgao = f"PREFEITURA MUNICIPAL DE {CITIES[bisect.bisect(self._cities, _unit(h))]}"
+        else:
+            orgao = ORGAOS[bisect.bisect(self._orgaos, _unit(h))]
+        
+        # Mês de entrada: a base inicial existe desde o início; as seguintes entram pela janela
+        h = _mix(h)
+        turnover = self.turnover
+        birth = 0 if record_id < self.rows or not turnover else (record_id - self.rows) // turnover + 1
+        if birth == 0:
+            # Base inicial: início nos anos anteriores (mais frequente nos recentes)
+            start = self._start_date - timedelta(days=1 + int(-math.log(1.0 - _unit(h)) * 1100) % 7300)
+        else:
+            start = self._day_in_month(birth, _unit(h))
+        
+        end = None
+        h = _mix(h)
+        if birth == 0 and _unit(h) < self.ended_share:
+            # Já encerrado, ainda em carência: fim nos últimos 5 anos
+            window_start = max(start, self._start_date - timedelta(days=365 * CARENCIA_YEARS))
+            end = window_start + timedelta(days=int(_unit(_mix(h ^ 3)) * (self._start_date - window_start).days))
+        elif self.end_rate:
+            # Encerramento com probabilidade end_rate por mês após a entrada (geométrica)
+            end_month = birth + 1 + int(math.log(1.0 - _unit(_mix(h ^ 4))) / self._log_keep)
+            if end_month <= month:
+                end = self._day_in_month(end_month, _unit(_mix(h ^ 5)))
+        
+        carencia = _plus_years(end, CARENCIA_YEARS) if end else None
+        return (cpf, ' '.join(name), sigla, descricao, nivel, orgao,
+                _format_date(start), _format_date(end), _format_date(carencia))
+    
+    def _day_in_month(self, month: int, fraction: float) -> date:
+        year, month_number = _add_months(self.start_year, self.start_month_number, month)
+        days = calendar.monthrange(year, month_number)[1]
+        return date(year, month_number, 1 + int(fraction * days))
+
+
+def _encode_chunk(task: tuple) -> bytes:
+    """Executado em um processo do pool: formata um bloco de linhas."""
+    generator, month, first_id, count = task
+    return generator.encode_chunk(month, first_id, count)
+
+
+def generate(months: Sequence[str], output_dir: str, generator: PEPDatasetGenerator) -> List[str]:
+    """Grava os snapshots dos meses informados e exibe tamanho e tempo de cada um."""
+    paths = []
+    for year_month in months:
+        start_time = time.time()
+        path = generator.write_zip(year_month, output_dir)
+        elapsed = time.time() - start_time
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{path}: {generator.rows} registros, {size_mb:.1f} MB em {elapsed:.1f}s "
+              f"({generator.rows / elapsed:,.0f} linhas/s)")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--from', dest='from_month', default='202401', metavar='AAAAMM')
+    parser.add_argument('--to', dest='to_month', metavar='AAAAMM', help='Último mês (padrão: igual a --from)')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--churn', type=float, default=0.02, help='Fração substituída por mês')
+    parser.add_argument('--end-rate', type=float, default=0.01, help='Probabilidade mensal de encerramento')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos de formatação (padrão: núcleos disponíveis)')
+    parser.add_argument('--output-dir', default='dados_sinteticos')
+    args = parser.parse_args()
+    
+    months = DateGenerator().get_month_range(args.from_month, args.to_month or args.from_month)
+    generator = PEPDatasetGenerator(rows=args.rows, start_month=args.from_month, churn=args.churn,
+                                    end_rate=args.end_rate, seed=args.seed, workers=args.workers)
+    generate(months, args.output_dir, generator)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
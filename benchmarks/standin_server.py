@@ -0,0 +1,326 @@
+"""
+Servidor HTTP local que substitui o portal em benchmarks e testes offline.
+
+Além dos arquivos em /files/<nome>, imita o endereço do portal
+(/download-de-dados/pep/AAAAMM): meses publicados respondem com 302 para o
+ZIP (/files/AAAAMM_PEP.zip) e os demais com 404.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import deque
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+PORTAL_PATH = "/download-de-dados/pep"
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    """Atende requisições de arquivo com suporte a Range, ETag e quedas injetadas."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_HEAD(self):
+        self._serve(send_body=False)
+    
+    def do_GET(self):
+        self._serve(send_body=True)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _serve(self, send_body: bool):
+        standin = self.server.standin
+        path = self.path.split('?')[0]
+        name = path.rsplit('/', 1)[-1]
+        
+        # Latência simulada (ida e volta + tempo de resposta do servidor)
+        if standin.latency:
+            time.sleep(standin.latency)
+        
+        if standin.throttled():
+            # Acima do limite de requisições por segundo: 429 com Retry-After
+            standin.record_request(self.command, 429)
+            self.send_response(429)
+            self.send_header('Retry-After', str(standin.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        if path.startswith(PORTAL_PATH + '/'):
+            self._redirect_month(standin, name)
+            return
+        
+        content = standin.files.get(name)
+        
+        if content is None:
+            standin.record_request(self.command, 404)
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        if self.command == 'HEAD' and standin.forbid_head:
+            # O armazenamento do portal recusa HEAD: o cliente deve tentar o GET
+            standin.record_request(self.command, 403)
+            self.send_response(403)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        etag = standin.etags[name]
+        total = len(content)
+        start, end = 0, total - 1
+        status = 200
+        
+        if _not_modified(self.headers, etag, standin.last_modified_ts):
+            standin.record_request(self.command, 304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if standin.accept_ranges and range_header and (if_range is None or if_range == etag):
+            byte_range = _parse_range(range_header, total)
+            if byte_range is None:
+                standin.record_request(self.command, 416)
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{total}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start, end = byte_range
+            status = 206
+        
+        standin.record_request(self.command, status)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', standin.last_modified)
+        if standin.accept_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{total}")
+        self.end_headers()
+        
+        if not send_body:
+            return
+        
+        drop_at = standin.take_drop()
+        sent = 0
+        position = start
+        started = time.monotonic()
+        while position <= end:
+            chunk = content[position:min(position + standin.chunk_size, end + 1)]
+            if drop_at is not None and sent + len(chunk) > drop_at:
+                # Queda de conexão injetada no meio da transferência
+                chunk = chunk[:drop_at - sent]
+                self.wfile.write(chunk)
+                standin.add_bytes_sent(len(chunk))
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            self.wfile.write(chunk)
+            standin.add_bytes_sent(len(chunk))
+            sent += len(chunk)
+            position += len(chunk)
+            
+            # Limite de banda por conexão
+            if standin.bandwidth:
+                delay = sent / standin.bandwidth - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+    
+    def _redirect_month(self, standin: "StandinServer", year_month: str):
+        """Endereço mensal do portal: 302 para o ZIP publicado ou 404."""
+        filename = f"{year_month}_PEP.zip"
+        if filename not in standin.files:
+            standin.record_request(self.command, 404)
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        standin.record_request(self.command, 302)
+        self.send_response(302)
+        self.send_header('Location', f"/files/{filename}")
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Servidor que ignora conexões encerradas pelo cliente."""
+    
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def read_zip_files(directory: str) -> Dict[str, bytes]:
+    """Lê os arquivos .zip de um diretório (nome -> conteúdo)."""
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.zip'):
+            with open(os.path.join(directory, name), 'rb') as file:
+                files[name] = file.read()
+    return files
+
+
+def _not_modified(headers, etag: str, last_modified_ts: float) -> bool:
+    """Avalia If-None-Match (prioritário) e If-Modified-Since."""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(last_modified_ts)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(range_header: str, total: int) -> Optional[tuple]:
+    """Interpreta um único intervalo "bytes=a-b", "bytes=a-" ou "bytes=-n"."""
+    unit, _, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if first == '':
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(0, total - length), total - 1
+        start = int(first)
+        end = int(last) if last else total - 1
+    except ValueError:
+        return None
+    if start >= total or end < start:
+        return None
+    return start, min(end, total - 1)
+
+
+class StandinServer:
+    """
+    Servidor local com arquivos em memória, com suporte a Range e requisições
+    condicionais (If-None-Match/If-Modified-Since).
+    
+    Permite desligar o suporte a Range, limitar a banda de cada conexão
+    (`bandwidth` em bytes/s) e injetar quedas de conexão: as próximas `drops`
+    respostas GET são interrompidas após `drop_after_bytes` bytes. `latency`
+    atrasa cada resposta (em segundos) e `forbid_head` faz os arquivos
+    responderem 403 a HEAD, como o armazenamento do portal. Com `max_rps`,
+    requisições acima desse número no último segundo recebem 429 com
+    Retry-After de `retry_after` segundos.
+    
+    Arquivos nomeados AAAAMM_PEP.zip ficam publicados no endereço mensal
+    (ver portal_url).
+    """
+    
+    def __init__(self,
+                 files: Dict[str, bytes],
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 accept_ranges: bool = True,
+                 drops: int = 0,
+                 drop_after_bytes: int = 0,
+                 bandwidth: int = 0,
+                 chunk_size: int = 64 * 1024,
+                 latency: float = 0.0,
+                 forbid_head: bool = False,
+                 max_rps: int = 0,
+                 retry_after: int = 1):
+        self.files = dict(files)
+        self.etags = {name: '"' + hashlib.sha1(data).hexdigest()[:16] + '"' for name, data in self.files.items()}
+        self.last_modified_ts = time.time()
+        self.last_modified = formatdate(self.last_modified_ts, usegmt=True)
+        self.accept_ranges = accept_ranges
+        self.drops = drops
+        self.drop_after_bytes = drop_after_bytes
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.forbid_head = forbid_head
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        
+        self.bytes_sent = 0
+        self._recent = deque()
+        self.requests = []
+        self._lock = threading.Lock()
+        
+        self._httpd = _QuietHTTPServer((host, port), _StandinHandler)
+        self._httpd.standin = self
+        self._thread = None
+    
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> "StandinServer":
+        """Servidor com os arquivos .zip de um diretório (ex: gerados por benchmarks.dataset_generator)."""
+        return cls(read_zip_files(directory), **kwargs)
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    @property
+    def portal_url(self) -> str:
+        """URL base equivalente à do portal (use como base_url do bot)."""
+        return f"{self.base_url}{PORTAL_PATH}"
+    
+    def file_url(self, name: str) -> str:
+        return f"{self.base_url}/files/{name}"
+    
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def record_request(self, method: str, status: int) -> None:
+        with self._lock:
+            self.requests.append((method, status))
+    
+    def add_bytes_sent(self, count: int) -> None:
+        with self._lock:
+            self.bytes_sent += count
+    
+    def throttled(self) -> bool:
+        """Registra a chegada de uma requisição e indica se ela excede max_rps."""
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_rps:
+                return True
+            self._recent.append(now)
+            return False
+    
+    def take_drop(self) -> Optional[int]:
+        """Consome uma queda injetada, se houver, e retorna após quantos bytes cortar."""
+        with self._lock:
+            if self.drops > 0:
+                self.drops -= 1
+                return self.drop_after_bytes
+            return None
\ No newline at end of file
@@ -4,9 +4,13 @@ Script principal do PEP Downloader Bot.
 Bot para download automático de arquivos PEP do Portal da Transparência do Brasil.
 """
 import argparse
+import asyncio
 import os
 import sys
 from pep_downloader.bot import PEPDownloaderBot
+from pep_downloader.console_logger import ConsoleLogger
+from pep_downloader.mirror_server import MirrorServer
+from pep_downloader.watcher import PublicationWatcher
 
 
 def parse_arguments():
@@ -20,6 +24,11 @@ Exemplos de uso:
   python main.py --extract                # Download e extração
   python main.py --output-dir dados       # Diretório personalizado
   python main.py --extract --verbose      # Modo detalhado com extração
+  python main.py --from 202001 --to 202509 --workers 4   # Backfill de vários meses
+  python main.py --diff 202508 202509 --diff-format jsonl # Alterações entre dois meses
+  python main.py --async --extract        # Verificação e download com asyncio (requer aiohttp)
+  python main.py --watch --serve 8080     # Baixa cada publicação e serve o diretório a outros bots
+  python main.py --mirror http://no-a:8080/pep   # Baixa do espelho na rede local (portal se faltar)
         """
     )
     
@@ -41,6 +50,20 @@ Exemplos de uso:
         help='Exibir logs detalhados durante a execução'
     )
     
+    parser.add_argument(
+        '--log-level',
+        choices=['debug', 'info', 'warning', 'error'],
+        default=None,
+        help='Nível mínimo dos logs (padrão: info, ou debug com --verbose)'
+    )
+    
+    parser.add_argument(
+        '--log-format',
+        choices=['text', 'json'],
+        default=None,
+        help='Formato dos logs: text ou json (uma linha JSON por mensagem) (padrão: text)'
+    )
+    
     parser.add_argument(
         '--max-retries',
         type=int,
@@ -48,6 +71,161 @@ Exemplos de uso:
         help='Número máximo de tentativas de download (padrão: 3)'
     )
     
+    parser.add_argument(
+        '--from',
+        dest='from_month',
+        metavar='AAAAMM',
+        help='Mês inicial para backfill de vários meses (ex: 202001)'
+    )
+    
+    parser.add_argument(
+        '--to',
+        dest='to_month',
+        metavar='AAAAMM',
+        help='Mês final para backfill (padrão: mês mais recente publicado)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Número de downloads simultâneos no backfill (padrão: 4)'
+    )
+    
+    parser.add_argument(
+        '--segments',
+        type=int,
+        default=None,
+        help='Conexões paralelas por arquivo quando o servidor aceita Range (padrão: 1)'
+    )
+    
+    parser.add_argument(
+        '--buffer-kb',
+        type=int,
+        default=None,
+        help='Tamanho do buffer de leitura/gravação do download em KB (padrão: 1024)'
+    )
+    
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Requisições por segundo ao servidor; 0 desliga o limite de taxa (padrão: 5)'
+    )
+    
+    parser.add_argument(
+        '--columnar',
+        action='store_true',
+        help='Converter cada snapshot para o formato colunar compacto (.pepc)'
+    )
+    
+    parser.add_argument(
+        '--index',
+        action='store_true',
+        help='Construir o índice de triagem de nomes/CPFs de cada snapshot (.idx)'
+    )
+    
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Verificar o CRC de todos os arquivos do ZIP após o download'
+    )
+    
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Ler os registros enquanto o arquivo é baixado (com --load-sqlite, carrega durante o download)'
+    )
+    
+    parser.add_argument(
+        '--base-url',
+        metavar='URL',
+        help='URL base dos arquivos mensais (padrão: Portal da Transparência)'
+    )
+    
+    parser.add_argument(
+        '--mirror',
+        metavar='URL',
+        help='URL de outro bot em modo espelho (ex: http://no-a:8080/pep); meses ausentes vêm do portal'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        metavar='[HOST:]PORTA',
+        help='Servir o diretório de download a outros bots (modo espelho); com --watch, junto com a espera'
+    )
+    
+    parser.add_argument(
+        '--metrics-dir',
+        metavar='DIR',
+        help='Gravar métricas da execução (pep_metrics.json e pep_downloader.prom) no diretório'
+    )
+    
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignorar o cache de verificações e consultar o servidor para todos os meses'
+    )
+    
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Usar o cliente HTTP assíncrono (asyncio + aiohttp) na verificação e no download'
+    )
+    
+    parser.add_argument(
+        '--load-sqlite',
+        metavar='DB',
+        help='Carregar cada snapshot no banco SQLite informado (atualização incremental por mês)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Modo contínuo: aguarda e baixa cada novo mês assim que for publicado'
+    )
+    
+    parser.add_argument(
+        '--status-file',
+        metavar='ARQUIVO',
+        help='Arquivo JSON de status do modo watch (padrão: <output-dir>/pep_watch_status.json)'
+    )
+    
+    parser.add_argument(
+        '--poll-min',
+        type=float,
+        default=None,
+        help='Intervalo entre verificações na época de publicação, em minutos (padrão: 15)'
+    )
+    
+    parser.add_argument(
+        '--poll-max',
+        type=float,
+        default=None,
+        help='Intervalo máximo entre verificações fora da época de publicação, em minutos (padrão: 360)'
+    )
+    
+    parser.add_argument(
+        '--diff',
+        nargs=2,
+        metavar=('AAAAMM_A', 'AAAAMM_B'),
+        help='Comparar dois snapshots mensais (incluídos, removidos e alterados)'
+    )
+    
+    parser.add_argument(
+        '--diff-format',
+        choices=['csv', 'jsonl'],
+        default='csv',
+        help='Formato da saída do diff (padrão: csv)'
+    )
+    
+    parser.add_argument(
+        '--diff-output',
+        metavar='ARQUIVO',
+        help='Arquivo de saída do diff (padrão: <output-dir>/diff_AAAAMM_AAAAMM.<formato>)'
+    )
+    
     return parser.parse_args()
 
 
@@ -57,7 +235,28 @@ def load_environment_config():
         'download_dir': os.getenv('PEP_DOWNLOAD_DIR', 'downloads'),
         'extract_files': os.getenv('PEP_EXTRACT_FILES', 'false').lower() == 'true',
         'max_retries': int(os.getenv('PEP_MAX_RETRIES', '3')),
-        'verbose': os.getenv('PEP_VERBOSE', 'false').lower() == 'true'
+        'verbose': os.getenv('PEP_VERBOSE', 'false').lower() == 'true',
+        'log_level': os.getenv('PEP_LOG_LEVEL'),
+        'log_format': os.getenv('PEP_LOG_FORMAT', 'text'),
+        'workers': int(os.getenv('PEP_WORKERS', '4')),
+        'segments': int(os.getenv('PEP_SEGMENTS', '1')),
+        'buffer_kb': int(os.getenv('PEP_BUFFER_KB', '1024')),
+        'rate_limit': float(os.getenv('PEP_RATE_LIMIT', '5')),
+        'convert_columnar': os.getenv('PEP_COLUMNAR', 'false').lower() == 'true',
+        'build_index': os.getenv('PEP_INDEX', 'false').lower() == 'true',
+        'sqlite_path': os.getenv('PEP_SQLITE_DB'),
+        'verify_zip': os.getenv('PEP_VERIFY', 'false').lower() == 'true',
+        'pipeline': os.getenv('PEP_PIPELINE', 'false').lower() == 'true',
+        'base_url': os.getenv('PEP_BASE_URL'),
+        'mirror_url': os.getenv('PEP_MIRROR_URL'),
+        'serve': os.getenv('PEP_SERVE'),
+        'metrics_dir': os.getenv('PEP_METRICS_DIR'),
+        'refresh': os.getenv('PEP_REFRESH', 'false').lower() == 'true',
+        'use_async': os.getenv('PEP_ASYNC', 'false').lower() == 'true',
+        'watch': os.getenv('PEP_WATCH', 'false').lower() == 'true',
+        'status_file': os.getenv('PEP_STATUS_FILE'),
+        'poll_min': float(os.getenv('PEP_POLL_MIN', '15')),
+        'poll_max': float(os.getenv('PEP_POLL_MAX', '360'))
     }
 
 
@@ -75,12 +274,83 @@ def main():
             'download_dir': args.output_dir or env_config['download_dir'],
             'extract_files': args.extract or env_config['extract_files'],
             'verbose': args.verbose or env_config['verbose'],
-            'max_retries': args.max_retries or env_config['max_retries']
+            'log_level': args.log_level or env_config['log_level'],
+            'log_format': args.log_format or env_config['log_format'],
+            'max_retries': args.max_retries or env_config['max_retries'],
+            'segments': args.segments or env_config['segments'],
+            'buffer_size': (args.buffer_kb or env_config['buffer_kb']) * 1024,
+            'rate_limit': args.rate_limit if args.rate_limit is not None else env_config['rate_limit'],
+            'convert_columnar': args.columnar or env_config['convert_columnar'],
+            'build_index': args.index or env_config['build_index'],
+            'sqlite_path': args.load_sqlite or env_config['sqlite_path'],
+            'verify_zip': args.verify or env_config['verify_zip'],
+            'pipeline': args.pipeline or env_config['pipeline'],
+            'base_url': args.base_url or env_config['base_url'],
+            'mirror_url': args.mirror or env_config['mirror_url'],
+            'metrics_dir': args.metrics_dir or env_config['metrics_dir'],
+            'refresh': args.refresh or env_config['refresh']
         }
         
+        workers = args.workers or env_config['workers']
+        use_async = args.use_async or env_config['use_async']
+        serve = args.serve or env_config['serve']
+        watch = args.watch or env_config['watch']
+        
+        # Modo espelho sem watch: apenas serve o diretório de download
+        if serve and not watch:
+            logger = ConsoleLogger(verbose=config['verbose'], level=config['log_level'],
+                                   log_format=config['log_format'])
+            host, port = MirrorServer.parse_address(serve)
+            MirrorServer(config['download_dir'], host, port, logger).serve_forever()
+            sys.exit(0)
+        
+        # Modo watch: processo contínuo que baixa cada nova publicação
+        if watch:
+            bot = PEPDownloaderBot(**config)
+            watcher = PublicationWatcher(bot,
+                                         status_path=args.status_file or env_config['status_file'],
+                                         min_interval=(args.poll_min or env_config['poll_min']) * 60,
+                                         max_interval=(args.poll_max or env_config['poll_max']) * 60)
+            mirror_server = None
+            if serve:
+                host, port = MirrorServer.parse_address(serve)
+                mirror_server = MirrorServer(config['download_dir'], host, port, bot.logger).start()
+            try:
+                watcher.run()
+            finally:
+                if mirror_server is not None:
+                    mirror_server.stop()
+            sys.exit(0)
+        
+        # Modo diff: alterações entre dois snapshots
+        if args.diff:
+            bot = PEPDownloaderBot(**config)
+            diff_result = bot.diff_months(args.diff[0], args.diff[1],
+                                          output_path=args.diff_output,
+                                          output_format=args.diff_format)
+            sys.exit(0 if diff_result.success else 1)
+        
+        # Modo backfill: vários meses em paralelo
+        if args.from_month:
+            bot = PEPDownloaderBot(**config, pool_size=max(10, workers))
+            backfill_result = bot.download_range(args.from_month, args.to_month, workers=workers)
+            
+            if backfill_result.failed:
+                sys.exit(1)  # Falha em pelo menos um download
+            elif backfill_result.extraction_failed:
+                sys.exit(2)  # Downloads OK, mas alguma extração falhou
+            else:
+                sys.exit(0)
+        elif args.to_month:
+            print("Erro: --to requer --from")
+            sys.exit(1)
+        
         # Criar e executar o bot
         bot = PEPDownloaderBot(**config)
-        download_result, extraction_result = bot.run()
+        if use_async:
+            download_result, extraction_result = asyncio.run(bot.run_async())
+        else:
+            download_result, extraction_result = bot.run()
         
         # Código de saída baseado no resultado
         if download_result.success:
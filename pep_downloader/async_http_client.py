@@ -0,0 +1,447 @@
+"""
+Cliente HTTP assíncrono (asyncio + aiohttp) para download de arquivos PEP.
+"""
+import asyncio
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Optional
+from .console_logger import ConsoleLogger
+from .file_manager import preallocate, space_error
+from .http_client import HTTPClient, _CountingHash
+from .metrics import Metrics
+from .models import Resolution, TransferResult
+from .rate_limiter import CircuitOpenError, RateLimiter
+
+try:
+    import aiohttp
+except ImportError:  # dependência opcional
+    aiohttp = None
+
+
+class HeadResponse(NamedTuple):
+    """Resposta de uma requisição HEAD (com a mesma interface de headers do requests)."""
+    status: int
+    headers: Any
+    url: str
+    redirected: bool = False
+
+
+class _PartWriter:
+    """
+    Grava o .part de um download fora do event loop.
+    
+    Abertura, pré-alocação, gravação (com o SHA-256), truncamento e fechamento
+    rodam em ordem em uma thread própria. Cada bloco recebido é gravado
+    enquanto o próximo chega; write() só espera a gravação anterior, o que
+    limita a memória a um bloco pendente.
+    """
+    
+    def __init__(self, part_path: str, mode: str, offset: int, total_size: int, digest: _CountingHash):
+        self.part_path = part_path
+        self.mode = mode
+        self.position = offset  # bytes já gravados no arquivo
+        self.total_size = total_size
+        self.digest = digest
+        self._file = None
+        self._pending: Optional[asyncio.Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pep-part-writer")
+    
+    async def open(self) -> None:
+        """Abre o .part (e reserva o espaço do arquivo inteiro em um download do início)."""
+        try:
+            await self._run(self._open)
+        except BaseException:
+            self._executor.shutdown(wait=False)
+            raise
+    
+    async def write(self, chunk: bytes) -> None:
+        """Agenda a gravação do bloco, após concluir a anterior (propaga erros de gravação)."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+        self._pending = self._run(self._write, chunk)
+    
+    async def flush(self) -> None:
+        """Espera a gravação pendente."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+    
+    async def close(self) -> None:
+        """Trunca o arquivo no que foi gravado (transferência incompleta) e o fecha."""
+        pending, self._pending = self._pending, None
+        try:
+            if pending is not None:
+                # Saída por erro da transferência: a falha de gravação, se houver, é secundária
+                await asyncio.gather(pending, return_exceptions=True)
+            await self._run(self._close)
+        finally:
+            self._executor.shutdown(wait=False)
+    
+    def _run(self, func, *args) -> asyncio.Future:
+        return asyncio.wrap_future(self._executor.submit(func, *args))
+    
+    def _open(self) -> None:
+        file = open(self.part_path, self.mode, buffering=0)
+        try:
+            if self.mode == 'wb' and self.total_size > 0:
+                preallocate(file.fileno(), self.total_size)
+        except BaseException:
+            file.close()
+            raise
+        self._file = file
+    
+    def _write(self, chunk: bytes) -> None:
+        HTTPClient._write_all(self._file, chunk)
+        self.digest.update(chunk)
+        self.position += len(chunk)
+    
+    def _close(self) -> None:
+        try:
+            if self.position < self.total_size:
+                self._file.truncate(self.position)
+        finally:
+            self._file.close()
+
+
+class AsyncHTTPClient:
+    """
+    Variante assíncrona do HTTPClient: mesmos headers, retry com backoff e
+    contrato de download (.part, Range/If-Range, requisições condicionais e
+    SHA-256 durante a gravação), sobre um pool limitado de conexões. As
+    requisições passam pelo mesmo tipo de RateLimiter (que pode ser o do
+    HTTPClient, para um limite único por processo).
+    
+    Requer o pacote opcional aiohttp. Use como gerenciador de contexto:
+        
+        async with AsyncHTTPClient(logger) as client:
+            await client.download_file(url, caminho)
+    """
+    
+    def __init__(self, logger: Optional[ConsoleLogger] = None, max_retries: int = 3,
+                 pool_size: int = 10, timeout: int = 30, metrics: Optional[Metrics] = None,
+                 buffer_size: int = HTTPClient.DEFAULT_BUFFER_SIZE,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            logger: Logger para mensagens
+            max_retries: Número máximo de tentativas de download
+            pool_size: Número máximo de conexões simultâneas
+            timeout: Timeout de leitura das requisições em segundos
+            metrics: Registro de métricas (mesmas etapas e contadores do HTTPClient)
+            buffer_size: Tamanho máximo dos blocos lidos e gravados no download
+            rate_limiter: Controle de taxa e concorrência (padrão: RateLimiter com a janela do pool)
+        """
+        if aiohttp is None:
+            raise ImportError("O cliente assíncrono requer o pacote aiohttp (pip install aiohttp)")
+        self.logger = logger or ConsoleLogger()
+        self.max_retries = max_retries
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        self.buffer_size = max(HTTPClient.MIN_BUFFER_SIZE, buffer_size)
+        self.rate_limiter = rate_limiter or RateLimiter(max_concurrency=self.pool_size, logger=self.logger,
+                                                        metrics=self.metrics)
+        self.session: Optional["aiohttp.ClientSession"] = None
+    
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        await self.open()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def open(self) -> None:
+        """Cria a sessão e o pool de conexões (dentro do event loop)."""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector, headers=HTTPClient.BROWSER_HEADERS)
+    
+    async def close(self) -> None:
+        """Fecha a sessão e as conexões abertas."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def head(self, url: str, timeout: int = 10, headers: Optional[dict] = None) -> HeadResponse:
+        """
+        Executa uma requisição HEAD seguindo redirecionamentos.
+        
+        Returns:
+            HeadResponse: Status, headers e URL final
+        """
+        await self.open()
+        for attempt in range(self.rate_limiter.THROTTLE_RETRIES + 1):
+            slot = await self.rate_limiter.acquire_async()
+            try:
+                with self.metrics.span('head'):
+                    async with self.session.head(url, allow_redirects=True, headers=headers,
+                                                 timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        pass
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.rate_limiter.record(None, method='HEAD')
+                raise
+            finally:
+                slot.release()
+            self.rate_limiter.record(response.status, RateLimiter.retry_after(response.headers), 'HEAD')
+            self.metrics.inc('http_responses_total', method='HEAD', status=response.status)
+            if response.status not in RateLimiter.THROTTLE_STATUSES or attempt == self.rate_limiter.THROTTLE_RETRIES:
+                break
+            await asyncio.sleep(self.rate_limiter.backoff(attempt))
+        return HeadResponse(response.status, response.headers, str(response.url), bool(response.history))
+    
+    async def _get(self, url: str, headers: dict, timeout: "aiohttp.ClientTimeout") -> "aiohttp.ClientResponse":
+        """
+        GET em stream; o tempo até os headers da resposta é a etapa `ttfb`.
+        
+        Um 429/503 é reenviado como no RateLimitedAdapter. A vaga do limitador
+        fica ocupada até a resposta ser liberada.
+        """
+        for attempt in range(self.rate_limiter.THROTTLE_RETRIES + 1):
+            response = await self._get_once(url, headers, timeout)
+            if response.status not in RateLimiter.THROTTLE_STATUSES or attempt == self.rate_limiter.THROTTLE_RETRIES:
+                return response
+            response.release()
+            await asyncio.sleep(self.rate_limiter.backoff(attempt))
+    
+    async def _get_once(self, url: str, headers: dict, timeout: "aiohttp.ClientTimeout") -> "aiohttp.ClientResponse":
+        slot = await self.rate_limiter.acquire_async()
+        request_start = time.perf_counter()
+        try:
+            response = await self.session.get(url, allow_redirects=True, headers=headers, timeout=timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            slot.release()
+            self.rate_limiter.record(None)
+            raise
+        except BaseException:
+            slot.release()
+            raise
+        self.metrics.record_span('ttfb', time.perf_counter() - request_start)
+        self.metrics.inc('http_responses_total', method='GET', status=response.status)
+        self.rate_limiter.record(response.status, RateLimiter.retry_after(response.headers))
+        
+        release = response.release
+        
+        def release_slot():
+            slot.release()
+            return release()
+        
+        response.release = release_slot
+        weakref.finalize(response, slot.release)
+        return response
+    
+    async def download_file(self, url: str, filepath: str, resolution: Optional[Resolution] = None) -> bool:
+        """
+        Baixa arquivo do URL especificado com retry automático.
+        
+        Args:
+            url: URL do arquivo para download
+            filepath: Caminho onde salvar o arquivo
+            resolution: Resolução da verificação (MonthProbe.resolution) para pular o HEAD
+        
+        Returns:
+            bool: True se download foi bem-sucedido, False caso contrário
+        """
+        return (await self.download(url, filepath, resolution=resolution)).success
+    
+    async def download(self, url: str, filepath: str,
+                       etag: Optional[str] = None,
+                       last_modified: Optional[str] = None,
+                       resolution: Optional[Resolution] = None) -> TransferResult:
+        """
+        Baixa arquivo do URL especificado com retry automático (ver HTTPClient.download).
+        
+        Args:
+            url: URL do arquivo para download
+            filepath: Caminho onde salvar o arquivo
+            etag: ETag da cópia local, se houver
+            last_modified: Last-Modified da cópia local, se houver
+            resolution: Resolução da verificação (MonthProbe.resolution), se houver
+        
+        Returns:
+            TransferResult: Resultado da transferência
+        """
+        await self.open()
+        conditional_headers = {}
+        if etag:
+            conditional_headers['If-None-Match'] = etag
+        if last_modified:
+            conditional_headers['If-Modified-Since'] = last_modified
+        
+        if resolution is not None and resolution.is_unchanged(etag, last_modified):
+            self.logger.info("Arquivo local já está atualizado (mesma versão da verificação)")
+            return TransferResult(success=True, not_modified=True, etag=etag,
+                                  last_modified=last_modified, final_url=resolution.final_url)
+        
+        part_path = f"{filepath}.part"
+        validator = None
+        accept_ranges = False
+        part_is_ours = False
+        digest = None
+        
+        for attempt in range(self.max_retries):
+            try:
+                self.logger.info(f"Iniciando download (tentativa {attempt + 1}/{self.max_retries}): {url}")
+                
+                get_url = url
+                if resolution is not None and attempt == 0:
+                    # HEAD já feito na verificação: GET direto na URL final
+                    get_url = resolution.final_url
+                    accept_ranges = resolution.accept_ranges
+                    validator = resolution.validator
+                    self.logger.debug(f"Usando a resolução da verificação: {get_url}")
+                else:
+                    head_response = await self.head(url, headers=conditional_headers)
+                    status, final_url = head_response.status, head_response.url
+                    self.logger.debug(f"Status da verificação HEAD: {status}")
+                    
+                    if status == 404:
+                        self.logger.error(f"Arquivo não encontrado no servidor: {url}")
+                        return TransferResult(success=False, error_message="Arquivo não encontrado no servidor (404)")
+                    elif status == 304:
+                        self.logger.info("Arquivo local já está atualizado (304 Not Modified)")
+                        return TransferResult(success=True, not_modified=True, etag=etag,
+                                              last_modified=last_modified, final_url=final_url)
+                    elif status in RateLimiter.THROTTLE_STATUSES:
+                        # head() já reenviou o HEAD: não repetir a espera aqui
+                        error_msg = f"Servidor limitou as requisições ({status})"
+                        self.logger.error(error_msg)
+                        return TransferResult(success=False, error_message=error_msg)
+                    elif status == 403:
+                        self.logger.warning("Acesso negado na verificação HEAD, tentando download direto...")
+                    elif 200 <= status < 300:
+                        accept_ranges = accept_ranges or HTTPClient._accepts_ranges(head_response)
+                        validator = validator or HTTPClient._get_validator(head_response)
+                
+                # Retomar de onde parou quando possível
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                headers = {}
+                if offset > 0 and accept_ranges and (validator or part_is_ours):
+                    headers['Range'] = f"bytes={offset}-"
+                    headers['Accept-Encoding'] = 'identity'
+                    if validator:
+                        headers['If-Range'] = validator
+                    self.logger.info(f"Retomando download a partir de {offset / (1024*1024):.2f} MB")
+                else:
+                    offset = 0
+                    headers.update(conditional_headers)
+                
+                timeout = aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout)
+                response = await self._get(get_url, headers, timeout)
+                if get_url != url and response.status in (403, 404, 410):
+                    # URL final não vale mais: volta ao endereço original (com redirecionamentos)
+                    response.release()
+                    self.logger.debug(f"URL resolvida respondeu {response.status}, usando {url}")
+                    response = await self._get(url, headers, timeout)
+                
+                async with response:
+                    if response.status == 404:
+                        self.logger.error(f"Arquivo não encontrado no servidor: {url}")
+                        return TransferResult(success=False, error_message="Arquivo não encontrado no servidor (404)")
+                    
+                    if response.status == 304:
+                        self.logger.info("Arquivo local já está atualizado (304 Not Modified)")
+                        return TransferResult(success=True, not_modified=True, etag=etag,
+                                              last_modified=last_modified, final_url=str(response.url))
+                    
+                    if response.status in RateLimiter.THROTTLE_STATUSES:
+                        # _get já reenviou o GET: não repetir a espera aqui
+                        error_msg = f"Servidor limitou as requisições ({response.status})"
+                        self.logger.error(error_msg)
+                        return TransferResult(success=False, error_message=error_msg)
+                    
+                    if response.status == 416 and offset > 0:
+                        HTTPClient._remove_part(part_path)
+                        part_is_ours = False
+                        raise aiohttp.ClientError("Range não satisfatível, reiniciando download")
+                    
+                    response.raise_for_status()
+                    
+                    mode = 'wb'
+                    if response.status == 206:
+                        range_start, total_size = HTTPClient._parse_content_range(
+                            response.headers.get('content-range', ''))
+                        response_validator = HTTPClient._get_validator(response)
+                        if range_start != offset or (validator and response_validator
+                                                     and response_validator != validator):
+                            HTTPClient._remove_part(part_path)
+                            part_is_ours = False
+                            raise aiohttp.ClientError("Content-Range inesperado, reiniciando download")
+                        mode = 'ab'
+                    else:
+                        offset = 0
+                        total_size = int(response.headers.get('content-length', 0))
+                        accept_ranges = accept_ranges or HTTPClient._accepts_ranges(response)
+                        validator = HTTPClient._get_validator(response) or validator
+                    
+                    if total_size > 0:
+                        self.logger.info(f"Tamanho do arquivo: {total_size / (1024*1024):.2f} MB")
+                    
+                    error = space_error(filepath, total_size - offset) if total_size > 0 else None
+                    if error:
+                        self.logger.error(error)
+                        return TransferResult(success=False, error_message=error)
+                    
+                    if offset == 0:
+                        digest = _CountingHash()
+                    elif digest is None or digest.bytes_hashed != offset:
+                        with self.metrics.span('hash'):
+                            digest = await asyncio.to_thread(HTTPClient._hash_part, part_path, offset)
+                    
+                    # Disco em uma thread própria: o event loop segue atendendo os outros downloads
+                    writer = _PartWriter(part_path, mode, offset, total_size, digest)
+                    downloaded = offset
+                    transfer_start = time.perf_counter()
+                    try:
+                        await writer.open()
+                        part_is_ours = True
+                        try:
+                            received = offset
+                            async for chunk in response.content.iter_chunked(self.buffer_size):
+                                await writer.write(chunk)
+                                received += len(chunk)
+                                self.logger.progress(received, total_size)
+                            await writer.flush()
+                        finally:
+                            await writer.close()
+                            downloaded = writer.position
+                    finally:
+                        self.metrics.record_span('transfer', time.perf_counter() - transfer_start)
+                        self.metrics.inc('bytes_downloaded_total', downloaded - offset)
+                    
+                    if total_size > 0 and downloaded != total_size:
+                        raise aiohttp.ClientPayloadError(
+                            f"Download incompleto: {downloaded} de {total_size} bytes"
+                        )
+                    
+                    os.replace(part_path, filepath)
+                    self.logger.success(f"Download concluído: {filepath}")
+                    return TransferResult(
+                        success=True,
+                        file_size=downloaded,
+                        etag=response.headers.get('etag'),
+                        last_modified=response.headers.get('last-modified'),
+                        final_url=str(response.url),
+                        sha256=digest.hexdigest()
+                    )
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+                self.logger.error(f"Erro na tentativa {attempt + 1}: {str(e) or type(e).__name__}")
+                
+                if attempt < self.max_retries - 1:
+                    self.metrics.inc('http_retries_total')
+                    wait_time = self.rate_limiter.backoff(attempt)
+                    self.logger.info(f"Aguardando {wait_time:.1f}s antes da próxima tentativa...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    self.logger.error("Todas as tentativas de download falharam")
+                    return TransferResult(success=False,
+                                          error_message=f"Falha após {self.max_retries} tentativas: {str(e)}")
+            
+            except Exception as e:
+                self.logger.error(f"Erro inesperado: {str(e)}")
+                return TransferResult(success=False, error_message=f"Erro inesperado: {str(e)}")
+        
+        return TransferResult(success=False, error_message="Nenhuma tentativa de download realizada")
\ No newline at end of file
@@ -1,15 +1,34 @@
 """
 Bot principal para download de arquivos PEP do Portal da Transparência.
 """
+import asyncio
 import os
 import time
+import zipfile
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from typing import Optional
+from .columnar_store import ColumnarWriter
 from .date_generator import DateGenerator
+from .download_manifest import DownloadManifest
+from .file_lock import FileLock
+from .async_http_client import AsyncHTTPClient
 from .http_client import HTTPClient
 from .file_manager import FileManager
 from .zip_extractor import ZipExtractor
 from .console_logger import ConsoleLogger
-from .models import DownloadResult, ExtractionResult
+from .metrics import Metrics
+from .month_prober import MonthProber
+from .probe_cache import ProbeCache
+from .rate_limiter import RateLimiter
+from .record_reader import RecordReader
+from .screening_index import ScreeningIndex
+from .snapshot_diff import FORMAT_CSV, SnapshotDiff
+from .sqlite_loader import SQLiteLoader
+from .stream_pipeline import StreamingPipeline
+from .models import (BackfillResult, DiffResult, DownloadResult, ExtractionResult, LoadResult, MonthProbe,
+                     ProbeResult, Resolution, TransferResult)
 
 
 class PEPDownloaderBot:
@@ -17,11 +36,31 @@ class PEPDownloaderBot:
     
     BASE_URL = "https://portaldatransparencia.gov.br/download-de-dados/pep"
     
+    # Arquivos de métricas gravados em metrics_dir ao fim de cada execução
+    METRICS_JSON = "pep_metrics.json"
+    METRICS_PROM = "pep_downloader.prom"
+    
     def __init__(self, 
                  download_dir: str = "downloads",
                  extract_files: bool = False,
                  verbose: bool = False,
-                 max_retries: int = 3):
+                 max_retries: int = 3,
+                 probe_workers: int = 6,
+                 pool_size: int = 10,
+                 segments: int = 1,
+                 convert_columnar: bool = False,
+                 build_index: bool = False,
+                 sqlite_path: Optional[str] = None,
+                 verify_zip: bool = False,
+                 pipeline: bool = False,
+                 base_url: Optional[str] = None,
+                 metrics_dir: Optional[str] = None,
+                 log_level: Optional[str] = None,
+                 log_format: str = ConsoleLogger.FORMAT_TEXT,
+                 buffer_size: int = HTTPClient.DEFAULT_BUFFER_SIZE,
+                 refresh: bool = False,
+                 rate_limit: float = RateLimiter.DEFAULT_RATE,
+                 mirror_url: Optional[str] = None):
         """
         Inicializa o bot com configurações.
         
@@ -30,17 +69,60 @@ class PEPDownloaderBot:
             extract_files: Se deve extrair arquivos ZIP automaticamente
             verbose: Se deve exibir logs detalhados
             max_retries: Número máximo de tentativas de download
+            probe_workers: Número máximo de verificações de meses simultâneas
+            pool_size: Tamanho do pool de conexões HTTP compartilhado
+            segments: Conexões paralelas por arquivo (1 = stream único)
+            convert_columnar: Se deve converter cada snapshot para o formato colunar (.pepc)
+            build_index: Se deve construir o índice de triagem (.idx) de cada snapshot
+            sqlite_path: Banco SQLite onde carregar cada snapshot (None = não carregar)
+            verify_zip: Se deve verificar o CRC de todos os membros do ZIP após o download
+            pipeline: Se deve ler os registros durante o download (carga SQLite sem esperar o arquivo)
+            base_url: URL base dos arquivos mensais (padrão: portal; ex: servidor local de testes)
+            metrics_dir: Diretório onde gravar as métricas de cada execução (JSON e .prom)
+            log_level: Nível mínimo dos logs ('debug', 'info', 'warning', 'error'; padrão conforme verbose)
+            log_format: Formato dos logs ('text' ou 'json' para uma linha JSON por mensagem)
+            buffer_size: Bytes lidos e gravados por operação no download
+            refresh: Ignorar o cache de verificações e consultar o servidor para todos os meses
+            rate_limit: Requisições por segundo ao servidor (0 = sem limite de taxa); a concorrência
+                se adapta às respostas até pool_size
+            mirror_url: URL de outro bot em modo espelho (--serve), consultado antes do portal
         """
         self.download_dir = download_dir
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.mirror_url = mirror_url.rstrip('/') if mirror_url else None
         self.extract_files = extract_files
+        self.convert_columnar = convert_columnar
+        self.build_index = build_index
+        self.verify_zip = verify_zip
+        self.pipeline = pipeline
         self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.buffer_size = buffer_size
+        self.metrics_dir = metrics_dir
         
         # Inicializar componentes
-        self.logger = ConsoleLogger(verbose=verbose)
+        self.logger = ConsoleLogger(verbose=verbose, level=log_level, log_format=log_format)
+        self.metrics = Metrics()
         self.date_generator = DateGenerator()
         self.file_manager = FileManager(download_dir, self.logger)
-        self.http_client = HTTPClient(self.logger, max_retries)
+        self.manifest = DownloadManifest(download_dir, self.logger)
+        # Limitador único por processo: cliente síncrono, assíncrono e verificações
+        self.rate_limiter = RateLimiter(rate=rate_limit, max_concurrency=max(pool_size, segments),
+                                        logger=self.logger, metrics=self.metrics)
+        self.http_client = HTTPClient(self.logger, max_retries, pool_size=pool_size, segments=segments,
+                                      metrics=self.metrics, buffer_size=buffer_size,
+                                      rate_limiter=self.rate_limiter)
+        # Espelho na rede local: uma tentativa, limitador próprio (falhas do espelho não afetam o portal)
+        self.mirror_client = HTTPClient(
+            self.logger, max_retries=1, pool_size=pool_size, segments=segments, metrics=self.metrics,
+            buffer_size=buffer_size, rate_limiter=RateLimiter(rate=0, max_concurrency=pool_size, logger=self.logger)
+        ) if self.mirror_url else None
         self.zip_extractor = ZipExtractor(self.logger)
+        self.record_reader = RecordReader(self.logger)
+        self.sqlite_loader = SQLiteLoader(sqlite_path, self.logger) if sqlite_path else None
+        self.probe_cache = ProbeCache(download_dir, self.base_url, self.logger)
+        self.month_prober = MonthProber(self.http_client, self.base_url, self.logger, max_workers=probe_workers,
+                                        cache=self.probe_cache, refresh=refresh)
     
     def run(self) -> tuple[DownloadResult, Optional[ExtractionResult]]:
         """
@@ -49,11 +131,17 @@ class PEPDownloaderBot:
         Returns:
             tuple: (DownloadResult, ExtractionResult opcional)
         """
+        start_time = time.time()
+        download_result, extraction_result = self._run()
+        self._export_metrics(download_result.success, time.time() - start_time)
+        return download_result, extraction_result
+    
+    def _run(self) -> tuple[DownloadResult, Optional[ExtractionResult]]:
         self.logger.info("=== PEP Downloader Bot - Portal da Transparência ===")
         
-        # Encontrar arquivo mais recente disponível
-        filename = self._find_latest_available_file()
-        if not filename:
+        # Encontrar arquivo mais recente disponível (o HEAD já resolve o destino do download)
+        latest = self._find_latest_available()
+        if not latest:
             error_msg = "Nenhum arquivo PEP disponível encontrado"
             self.logger.error(error_msg)
             return DownloadResult(
@@ -65,13 +153,34 @@ class PEPDownloaderBot:
                 error_message=error_msg
             ), None
         
-        self.logger.info(f"Arquivo mais recente disponível: {filename}")
+        self.logger.info(f"Arquivo mais recente disponível: {latest.filename}")
+        return self._download_month(latest.filename, latest.resolution)
+    
+    def download_month(self, year_month: str,
+                       resolution: Optional[Resolution] = None) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        """
+        Baixa (e processa, conforme as opções) o arquivo de um mês já conhecido
+        como disponível, sem verificar os outros meses (usado pelo modo watch).
+        
+        Args:
+            year_month: Mês no formato AAAAMM
+            resolution: Resolução do HEAD da verificação do mês (evita outro HEAD)
         
+        Returns:
+            tuple: (DownloadResult, ExtractionResult opcional)
+        """
+        start_time = time.time()
+        download_result, extraction_result = self._download_month(f"{year_month}_PEP.zip", resolution)
+        self._export_metrics(download_result.success, time.time() - start_time)
+        return download_result, extraction_result
+    
+    def _download_month(self, filename: str,
+                        resolution: Optional[Resolution] = None) -> tuple[DownloadResult, Optional[ExtractionResult]]:
         # Preparar ambiente
         self.file_manager.ensure_download_directory()
         
-        # Verificar espaço em disco
-        if not self.file_manager.check_disk_space(100):
+        # Verificar espaço em disco (tamanho real, se a verificação o informou)
+        if not self.file_manager.check_disk_space(resolution.content_length if resolution else 0):
             error_msg = "Espaço insuficiente em disco"
             return DownloadResult(
                 success=False,
@@ -82,120 +191,693 @@ class PEPDownloaderBot:
                 error_message=error_msg
             ), None
         
-        # Verificar se arquivo já existe
-        if self.file_manager.file_exists(filename):
-            self.logger.info("Arquivo já existe. Prosseguindo com extração se solicitada...")
-            file_path = self.file_manager.get_download_path(filename)
-            file_size = self.file_manager.get_file_size(filename)
+        download_result, extraction_result = self._process_file(filename, resolution)
+        
+        # Resumo final
+        self._print_summary(download_result, extraction_result)
+        
+        return download_result, extraction_result
+    
+    async def run_async(self) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        """
+        Variante assíncrona de run (requer aiohttp): verificação dos meses e
+        download no event loop, sobre um pool limitado de conexões.
+        
+        Returns:
+            tuple: (DownloadResult, ExtractionResult opcional)
+        """
+        start_time = time.time()
+        download_result, extraction_result = await self._run_async()
+        self._export_metrics(download_result.success, time.time() - start_time)
+        return download_result, extraction_result
+    
+    async def _run_async(self) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        self.logger.info("=== PEP Downloader Bot - Portal da Transparência (asyncio) ===")
+        
+        async with self._async_client() as client:
+            self.logger.info("Procurando arquivo PEP mais recente disponível...")
+            probe_result = await self.probe_months_async(client, months_back=6, mode=MonthProber.MODE_LATEST)
+            latest = probe_result.latest
+            if not latest:
+                error_msg = "Nenhum arquivo PEP disponível encontrado"
+                self.logger.error(error_msg)
+                return DownloadResult(
+                    success=False,
+                    filename="",
+                    file_path="",
+                    file_size=0,
+                    download_time=0,
+                    error_message=error_msg
+                ), None
             
-            download_result = DownloadResult(
-                success=True,
-                filename=filename,
-                file_path=file_path,
-                file_size=file_size,
-                download_time=0
-            )
+            filename = latest.filename
+            self.logger.info(f"Arquivo mais recente disponível: {filename}")
+            
+            # Preparar ambiente
+            self.file_manager.ensure_download_directory()
+            
+            # Verificar espaço em disco (tamanho real, se a verificação o informou)
+            required_bytes = latest.resolution.content_length if latest.resolution else 0
+            if not self.file_manager.check_disk_space(required_bytes):
+                return DownloadResult(
+                    success=False,
+                    filename=filename,
+                    file_path="",
+                    file_size=0,
+                    download_time=0,
+                    error_message="Espaço insuficiente em disco"
+                ), None
+            
+            download_result, extraction_result = await self._process_file_async(client, filename, latest.resolution)
+        
+        # Resumo final
+        self._print_summary(download_result, extraction_result)
+        
+        return download_result, extraction_result
+    
+    def download_range(self, start_month: str, end_month: Optional[str] = None,
+                       workers: int = 4) -> BackfillResult:
+        """
+        Baixa (e extrai, se configurado) todos os arquivos mensais de um intervalo.
+        
+        Os meses são processados em paralelo por um pool de threads limitado que
+        compartilha o pool de conexões do HTTPClient. Meses já presentes no
+        diretório de download não são baixados novamente.
+        
+        Sem `end_month`, o intervalo termina no mês mais recente publicado
+        (verificação no modo 'latest'): o mês corrente normalmente ainda não
+        saiu e não deve contar como falha.
+        
+        Args:
+            start_month: Mês inicial no formato AAAAMM
+            end_month: Mês final no formato AAAAMM (padrão: mais recente publicado)
+            workers: Número máximo de downloads simultâneos
+            
+        Returns:
+            BackfillResult: Resultados por mês (em ordem cronológica) e estatísticas
+        """
+        start_time = time.time()
+        backfill_result = self._download_range(start_month, end_month, workers)
+        self._export_metrics(not backfill_result.failed, time.time() - start_time)
+        return backfill_result
+    
+    def _download_range(self, start_month: str, end_month: Optional[str], workers: int) -> BackfillResult:
+        self.logger.info("=== PEP Downloader Bot - Backfill ===")
+        
+        resolutions = {}
+        if end_month is None:
+            latest = self._find_latest_available()
+            if not latest:
+                error_msg = "Nenhum arquivo PEP disponível encontrado"
+                self.logger.error(error_msg)
+                return BackfillResult(results=[(DownloadResult(
+                    success=False,
+                    filename="",
+                    file_path="",
+                    file_size=0,
+                    download_time=0,
+                    error_message=error_msg
+                ), None)], total_time=0)
+            end_month = latest.year_month
+            resolutions[end_month] = latest.resolution
+        
+        months = self.date_generator.get_month_range(start_month, end_month)
+        self.logger.info(f"Intervalo: {start_month} a {end_month} ({len(months)} meses, {workers} workers)")
+        
+        self.file_manager.ensure_download_directory()
+        
+        # Espaço em disco verificado por arquivo, pelo tamanho real (Content-Length)
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pep-download") as executor:
+            results = list(executor.map(
+                self._process_file,
+                [f"{year_month}_PEP.zip" for year_month in months],
+                [resolutions.get(year_month) for year_month in months]
+            ))
+        
+        backfill_result = BackfillResult(results=results, total_time=time.time() - start_time)
+        self._print_backfill_summary(backfill_result)
+        
+        return backfill_result
+    
+    def diff_months(self, month_a: str, month_b: str,
+                    output_path: Optional[str] = None,
+                    output_format: str = FORMAT_CSV) -> DiffResult:
+        """
+        Compara dois snapshots mensais e grava os registros incluídos, removidos e alterados.
+        
+        Snapshots ausentes no diretório de download são baixados antes.
+        
+        Args:
+            month_a: Mês anterior no formato AAAAMM
+            month_b: Mês posterior no formato AAAAMM
+            output_path: Arquivo de saída (padrão: <download_dir>/diff_AAAAMM_AAAAMM.<formato>)
+            output_format: 'csv' ou 'jsonl'
+            
+        Returns:
+            DiffResult: Contagens por tipo de alteração
+        """
+        self.logger.info(f"=== PEP Downloader Bot - Diff {month_a} -> {month_b} ===")
+        self.file_manager.ensure_download_directory()
+        
+        zip_paths = []
+        for year_month in (month_a, month_b):
+            filename = f"{year_month}_PEP.zip"
+            with self._lock_file(filename):
+                if not self.file_manager.file_exists(filename):
+                    download_result = self._download_file(filename)
+                    if not download_result.success:
+                        return DiffResult(month_a=month_a, month_b=month_b,
+                                          error_message=f"Snapshot indisponível: {filename}")
+            zip_paths.append(self.file_manager.get_download_path(filename))
+        
+        output_path = output_path or os.path.join(self.download_dir, f"diff_{month_a}_{month_b}.{output_format}")
+        try:
+            diff_result = SnapshotDiff(self.record_reader, self.logger).write(
+                zip_paths[0], zip_paths[1], output_path, output_format, month_a=month_a, month_b=month_b)
+        except Exception as e:
+            diff_result = DiffResult(month_a=month_a, month_b=month_b, error_message=str(e))
+        
+        if diff_result.success:
+            self.logger.success(str(diff_result))
+            self.logger.info(f"Alterações gravadas em {output_path} ({diff_result.diff_time:.1f}s)")
         else:
-            # Realizar download
-            download_result = self._download_file(filename)
+            self.logger.error(str(diff_result))
+        return diff_result
+    
+    def _process_file(self, filename: str,
+                      resolution: Optional[Resolution] = None) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        """
+        Baixa um arquivo (ou valida a cópia local) e extrai se solicitado.
+        
+        Uma cópia local íntegra segundo o manifesto é revalidada com uma
+        requisição condicional (ou pela resolução da verificação, sem nova
+        requisição); arquivos truncados são baixados novamente.
+        
+        Todo o processamento ocorre sob a trava do arquivo (ver _lock_file).
+        """
+        with self._lock_file(filename):
+            etag, last_modified = self._local_validators(filename, resolution)
+            
+            # Modo pipeline: sem cópia local válida, os registros são lidos durante o download
+            load_result = None
+            if self.pipeline and not (etag or last_modified):
+                download_result, load_result = self._download_pipelined(filename)
+            else:
+                download_result = self._download_file(filename, etag, last_modified, resolution)
+            
+            return download_result, self._post_process(download_result, load_result)
+    
+    async def _process_file_async(self, client: AsyncHTTPClient, filename: str,
+                                  resolution: Optional[Resolution] = None) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        """
+        Variante assíncrona de _process_file: a transferência roda no event loop
+        e as etapas de disco/CPU (verificação, extração, cargas) em uma thread.
+        """
+        lock = await asyncio.to_thread(self._lock_file, filename)
+        try:
+            return await self._process_locked_async(client, filename, resolution)
+        finally:
+            lock.release()
+    
+    async def _process_locked_async(self, client: AsyncHTTPClient, filename: str,
+                                    resolution: Optional[Resolution] = None) -> tuple[DownloadResult, Optional[ExtractionResult]]:
+        etag, last_modified = self._local_validators(filename, resolution)
+        
+        year_month = filename.split('_')[0]
+        url = f"{self.base_url}/{year_month}"
+        file_path = self.file_manager.get_download_path(filename)
+        
+        start_time = time.time()
+        transfer = None
+        if self.mirror_client is not None:
+            transfer = await asyncio.to_thread(self._download_from_mirror, year_month, file_path,
+                                               etag, last_modified, resolution)
+        if transfer is None:
+            self.logger.info(f"URL de download: {url}")
+            transfer = await client.download(url, file_path, etag=etag, last_modified=last_modified,
+                                             resolution=resolution)
+        download_time = time.time() - start_time
+        
+        download_result = await asyncio.to_thread(
+            self._handle_transfer, filename, url, transfer, download_time, bool(etag or last_modified), resolution)
+        extraction_result = await asyncio.to_thread(self._post_process, download_result)
+        return download_result, extraction_result
+    
+    def _lock_file(self, filename: str) -> FileLock:
+        """
+        Obtém a trava do arquivo de destino, esperando outro processo que o esteja processando.
+        
+        Com a trava, o manifesto é relido do disco: um arquivo publicado por
+        outro processo (cron simultâneo ou outro nó no mesmo armazenamento) é
+        revalidado como cópia local, em geral sem nova transferência, em vez de
+        baixado e extraído de novo no mesmo caminho.
+        
+        Returns:
+            FileLock: Trava obtida (liberar com release ou usar como contexto)
+        """
+        lock = FileLock(self.file_manager.get_download_path(filename), self.logger)
+        with self.metrics.span('lock'):
+            waited = lock.acquire()
+        if waited:
+            self.logger.info(f"{filename} foi processado por outro processo; revalidando a cópia publicada")
+        self.manifest.reload()
+        return lock
+    
+    def _local_validators(self, filename: str,
+                          resolution: Optional[Resolution] = None) -> tuple[Optional[str], Optional[str]]:
+        """
+        Obtém ETag e Last-Modified da cópia local para a requisição condicional.
+        
+        Args:
+            filename: Nome do arquivo no diretório de download
+            resolution: Resolução da verificação (tamanho publicado), se houver
+        
+        Returns:
+            tuple: (etag, last_modified), ambos None se não houver cópia local válida
+        """
+        etag = None
+        last_modified = None
+        
+        # Verificar se arquivo já existe
+        if self.file_manager.file_exists(filename):
+            entry = self.manifest.get(filename)
+            if entry is None:
+                # Arquivo anterior ao manifesto: data local como referência, só se estiver completo
+                # (a data de um arquivo truncado é posterior à publicação e receberia um 304)
+                if self._is_complete_copy(filename, resolution):
+                    last_modified = formatdate(self.file_manager.get_modified_time(filename), usegmt=True)
+                else:
+                    self.logger.warning(f"Arquivo local incompleto e sem registro no manifesto ({filename}), "
+                                        f"baixando novamente...")
+            elif self.file_manager.get_file_size(filename) == entry.size:
+                etag = entry.etag
+                last_modified = entry.last_modified or formatdate(
+                    self.file_manager.get_modified_time(filename), usegmt=True)
+            else:
+                self.logger.warning(f"Arquivo local difere do manifesto ({filename}), baixando novamente...")
+        
+        return etag, last_modified
+    
+    def _is_complete_copy(self, filename: str, resolution: Optional[Resolution] = None) -> bool:
+        """
+        Verifica se um arquivo sem registro no manifesto parece completo: mesmo
+        tamanho publicado (quando a verificação o informou) e ZIP com o
+        diretório central no fim do arquivo (ausente em arquivos truncados).
+        """
+        if resolution is not None and resolution.content_length:
+            if self.file_manager.get_file_size(filename) != resolution.content_length:
+                return False
+        return zipfile.is_zipfile(self.file_manager.get_download_path(filename))
+    
+    def _post_process(self, download_result: DownloadResult,
+                      load_result: Optional[LoadResult] = None) -> Optional[ExtractionResult]:
+        """Executa as etapas opcionais após o download (extração, SQLite, colunar e índice)."""
+        self._record_file_metrics(download_result)
         
         # Extração opcional
         extraction_result = None
         if download_result.success and self.extract_files:
             extraction_result = self._extract_file(download_result.file_path)
         
-        # Resumo final
-        self._print_summary(download_result, extraction_result)
+        # Carga opcional no SQLite (já feita durante o download no modo pipeline)
+        if download_result.success and self.sqlite_loader and not (load_result and load_result.success):
+            self._load_sqlite(download_result.file_path)
         
-        return download_result, extraction_result
+        # Conversão opcional para o formato colunar
+        if download_result.success and self.convert_columnar:
+            self._convert_columnar(download_result.file_path)
+        
+        # Índice de triagem opcional
+        if download_result.success and self.build_index:
+            self._build_screening_index(download_result.file_path)
+        
+        return extraction_result
     
-    def _find_latest_available_file(self) -> Optional[str]:
+    def _find_latest_available(self) -> Optional[MonthProbe]:
         """
         Encontra o arquivo PEP mais recente disponível no servidor.
         
         Returns:
-            str: Nome do arquivo mais recente ou None se nenhum encontrado
+            MonthProbe: Verificação do mês mais recente (com a resolução do HEAD) ou None
         """
         self.logger.info("Procurando arquivo PEP mais recente disponível...")
         
-        # Obter lista de meses para verificar
-        months_to_check = self.date_generator.get_available_months(months_back=6)
+        probe_result = self.probe_months(months_back=6, mode=MonthProber.MODE_LATEST)
+        latest = probe_result.latest
+        if latest:
+            source = "cache" if latest.cached else f"Status: {latest.status_code}"
+            self.logger.info(f"✓ Encontrado: {latest.filename} ({source})")
+            return latest
         
-        for year_month in months_to_check:
-            filename = f"{year_month}_PEP.zip"
-            url = f"{self.BASE_URL}/{year_month}"
+        return None
+    
+    def probe_months(self, months_back: int = 6, mode: str = MonthProber.MODE_ALL) -> ProbeResult:
+        """
+        Verifica em paralelo a disponibilidade dos últimos meses.
+        
+        Args:
+            months_back: Quantos meses para trás verificar
+            mode: MonthProber.MODE_LATEST (para no mais recente) ou MonthProber.MODE_ALL
             
-            try:
-                self.logger.debug(f"Verificando: {url}")
-                response = self.http_client.session.head(url, timeout=10, allow_redirects=True)
-                # Status 200 (OK) ou 302 (Redirect) indicam que o arquivo está disponível
-                if response.status_code in [200, 302]:
-                    self.logger.info(f"✓ Encontrado: {filename} (Status: {response.status_code})")
-                    return filename
-                else:
-                    self.logger.debug(f"✗ Não disponível: {filename} (Status: {response.status_code})")
-            except Exception as e:
-                self.logger.debug(f"✗ Erro ao verificar {filename}: {str(e)}")
+        Returns:
+            ProbeResult: Resultado da verificação
+        """
+        months_to_check = self.date_generator.get_available_months(months_back=months_back)
+        probe_result = self.month_prober.probe(months_to_check, mode=mode)
+        self.logger.debug(str(probe_result))
+        return probe_result
+    
+    async def probe_months_async(self, client: AsyncHTTPClient, months_back: int = 6,
+                                 mode: str = MonthProber.MODE_ALL) -> ProbeResult:
+        """
+        Variante assíncrona de probe_months usando a sessão do cliente informado.
         
-        return None
+        Args:
+            client: Cliente HTTP assíncrono
+            months_back: Quantos meses para trás verificar
+            mode: MonthProber.MODE_LATEST (para no mais recente) ou MonthProber.MODE_ALL
+            
+        Returns:
+            ProbeResult: Resultado da verificação
+        """
+        months_to_check = self.date_generator.get_available_months(months_back=months_back)
+        probe_result = await self.month_prober.probe_async(client, months_to_check, mode=mode)
+        self.logger.debug(str(probe_result))
+        return probe_result
+    
+    def _async_client(self) -> AsyncHTTPClient:
+        """Cria um cliente assíncrono com as mesmas configurações do HTTPClient."""
+        return AsyncHTTPClient(self.logger, self.max_retries, pool_size=self.pool_size, metrics=self.metrics,
+                               buffer_size=self.buffer_size, rate_limiter=self.rate_limiter)
     
-    def _download_file(self, filename: str) -> DownloadResult:
-        """Realiza o download do arquivo PEP."""
+    def _download_file(self, filename: str,
+                       etag: Optional[str] = None,
+                       last_modified: Optional[str] = None,
+                       resolution: Optional[Resolution] = None) -> DownloadResult:
+        """Realiza o download do arquivo PEP (condicional se houver cópia local válida)."""
         # Extrair AAAAMM do filename (ex: 202509_PEP.zip -> 202509)
         year_month = filename.split('_')[0]
-        url = f"{self.BASE_URL}/{year_month}"
+        url = f"{self.base_url}/{year_month}"
         file_path = self.file_manager.get_download_path(filename)
+        has_local_copy = bool(etag or last_modified)
         
-        self.logger.info(f"URL de download: {url}")
+        start_time = time.time()
+        transfer = None
+        if self.mirror_client is not None:
+            transfer = self._download_from_mirror(year_month, file_path, etag, last_modified, resolution)
+        if transfer is None:
+            self.logger.info(f"URL de download: {url}")
+            transfer = self.http_client.download(url, file_path, etag=etag, last_modified=last_modified,
+                                                 resolution=resolution)
+        download_time = time.time() - start_time
+        
+        return self._handle_transfer(filename, url, transfer, download_time, has_local_copy, resolution)
+    
+    def _download_from_mirror(self, year_month: str, file_path: str,
+                              etag: Optional[str] = None,
+                              last_modified: Optional[str] = None,
+                              resolution: Optional[Resolution] = None) -> Optional[TransferResult]:
+        """
+        Tenta baixar (ou revalidar) o mês no espelho configurado.
+        
+        O espelho anuncia os mesmos validadores do portal, então a cópia local
+        é revalidada nele com a mesma requisição condicional. Se a resolução da
+        verificação já indica que a cópia local é a versão publicada, nada é
+        pedido ao espelho.
+        
+        Returns:
+            TransferResult: Resultado da transferência pelo espelho, ou None para
+            recorrer ao portal (mês ausente no espelho, espelho fora do ar ou falha)
+        """
+        if resolution is not None and resolution.is_unchanged(etag, last_modified):
+            return None
+        if not self._mirror_has(year_month):
+            return None
+        
+        url = f"{self.mirror_url}/{year_month}"
+        self.logger.info(f"URL de download (espelho): {url}")
+        transfer = self.mirror_client.download(url, file_path, etag=etag, last_modified=last_modified)
+        if not transfer.success:
+            self.logger.warning(f"Falha no espelho ({transfer.error_message}), baixando do portal...")
+            self.metrics.inc('mirror_requests_total', result='error')
+            return None
+        self.metrics.inc('mirror_requests_total', result='hit')
+        return transfer
+    
+    def _mirror_has(self, year_month: str) -> bool:
+        """Verifica (HEAD) se o espelho tem o mês; espelho inacessível conta como ausência."""
+        try:
+            response = self.mirror_client.head(f"{self.mirror_url}/{year_month}")
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(f"Espelho indisponível ({str(e)}), usando o portal")
+            self.metrics.inc('mirror_requests_total', result='error')
+            return False
+        if not response.ok:
+            self.logger.info(f"Mês {year_month} ausente no espelho (Status: {response.status_code}), usando o portal")
+            self.metrics.inc('mirror_requests_total', result='miss')
+            return False
+        return True
+    
+    def _download_pipelined(self, filename: str) -> tuple[DownloadResult, Optional[LoadResult]]:
+        """
+        Baixa o arquivo em modo pipeline: os registros são descompactados e lidos
+        enquanto os bytes chegam (e carregados no SQLite, se configurado).
+        
+        Em caso de falha no pipeline, o download comum (com retomada) é usado.
+        """
+        year_month = filename.split('_')[0]
+        url = f"{self.base_url}/{year_month}"
+        file_path = self.file_manager.get_download_path(filename)
+        
+        # Com espelho que tenha o mês, os bytes vêm da rede local
+        http_client, source_url = self.http_client, url
+        if self.mirror_client is not None and self._mirror_has(year_month):
+            http_client, source_url = self.mirror_client, f"{self.mirror_url}/{year_month}"
+        self.logger.info(f"URL de download (pipeline): {source_url}")
+        
+        pipeline = StreamingPipeline(http_client, self.record_reader, self.logger)
+        records = pipeline.iter_records(source_url, file_path)
         
         start_time = time.time()
-        success = self.http_client.download_file(url, file_path)
+        load_result = None
+        if self.sqlite_loader:
+            self.logger.info(f"Carregando {year_month} no SQLite durante o download ({self.sqlite_loader.db_path})...")
+            with self.metrics.span('parse', output='sqlite', mode='pipeline'):
+                load_result = self.sqlite_loader.load(records, year_month)
+            if load_result.success:
+                self.logger.success(str(load_result))
+        else:
+            try:
+                with self.metrics.span('parse', output='count', mode='pipeline'):
+                    rows = sum(1 for _ in records)
+                self.logger.info(f"Registros lidos durante o download: {rows}")
+            except Exception as e:
+                self.logger.debug(f"Pipeline interrompido: {str(e)}")
+        records.close()
         download_time = time.time() - start_time
         
-        if success:
+        transfer = pipeline.result
+        if transfer is None or not transfer.success:
+            error = transfer.error_message if transfer else "Pipeline interrompido"
+            self.logger.warning(f"Falha no pipeline ({error}), usando download comum...")
+            return self._download_file(filename), None
+        
+        if http_client is self.mirror_client:
+            self.metrics.inc('mirror_requests_total', result='hit')
+        return self._handle_transfer(filename, url, transfer, download_time, False), load_result
+    
+    def _handle_transfer(self, filename: str, url: str, transfer: TransferResult,
+                         download_time: float, has_local_copy: bool,
+                         resolution: Optional[Resolution] = None) -> DownloadResult:
+        """Converte o resultado da transferência, verificando e registrando o arquivo no manifesto."""
+        file_path = self.file_manager.get_download_path(filename)
+        
+        if transfer.success and transfer.not_modified:
+            self.logger.info(f"Arquivo já está atualizado: {filename}")
+            # Cópia anterior ao manifesto: só é registrada como atual se estiver completa
+            if self.manifest.get(filename) is None and self._is_complete_copy(filename, resolution):
+                self.manifest.record_file(filename, url, transfer.etag, transfer.last_modified)
+            return DownloadResult(
+                success=True,
+                filename=filename,
+                file_path=file_path,
+                file_size=self.file_manager.get_file_size(filename),
+                download_time=download_time,
+                skipped=True
+            )
+        elif transfer.success:
+            # Mesma versão (ETag) do manifesto deve ter o mesmo conteúdo
+            previous = self.manifest.get(filename)
+            if (previous and transfer.etag and previous.etag == transfer.etag
+                    and transfer.sha256 and previous.sha256 != transfer.sha256):
+                return self._discard_corrupt_file(
+                    filename, download_time, f"SHA-256 difere do manifesto para a mesma versão ({transfer.etag})")
+            
+            if self.verify_zip and not self._verify_zip(file_path):
+                return self._discard_corrupt_file(filename, download_time, "Arquivo ZIP corrompido (CRC inválido)")
+            
             file_size = self.file_manager.get_file_size(filename)
+            self.manifest.record_file(filename, url, transfer.etag, transfer.last_modified, sha256=transfer.sha256)
+            self.logger.debug(f"SHA-256 de {filename}: {transfer.sha256}")
             return DownloadResult(
                 success=True,
                 filename=filename,
                 file_path=file_path,
                 file_size=file_size,
-                download_time=download_time
+                download_time=download_time,
+                sha256=transfer.sha256
+            )
+        elif has_local_copy:
+            # Servidor indisponível: mantém a cópia local já validada anteriormente
+            self.logger.warning(f"Não foi possível revalidar {filename}, usando cópia local")
+            return DownloadResult(
+                success=True,
+                filename=filename,
+                file_path=file_path,
+                file_size=self.file_manager.get_file_size(filename),
+                download_time=download_time,
+                skipped=True
             )
         else:
+            # O mês pode ter saído do cache como publicado: a próxima execução verifica de novo
+            self.probe_cache.forget(filename.split('_')[0])
             return DownloadResult(
                 success=False,
                 filename=filename,
                 file_path=file_path,
                 file_size=0,
                 download_time=download_time,
-                error_message="Falha no download após todas as tentativas"
+                error_message=transfer.error_message or "Falha no download após todas as tentativas"
             )
     
+    def _record_file_metrics(self, download_result: DownloadResult) -> None:
+        """Contabiliza o arquivo por resultado e a taxa do download concluído."""
+        if not download_result.success:
+            self.metrics.inc('files_total', result='failed')
+        elif download_result.skipped:
+            self.metrics.inc('files_total', result='not_modified')
+        else:
+            self.metrics.inc('files_total', result='downloaded')
+            if download_result.download_time > 0:
+                self.metrics.set_gauge('download_throughput_bytes_per_second',
+                                       download_result.file_size / download_result.download_time)
+    
+    def _export_metrics(self, success: bool, duration: float) -> None:
+        """Grava as métricas da execução em JSON e no formato texto do Prometheus, se configurado."""
+        self.metrics.set_gauge('last_run_timestamp_seconds', time.time())
+        self.metrics.set_gauge('last_run_duration_seconds', duration)
+        self.metrics.set_gauge('last_run_success', 1 if success else 0)
+        
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.metrics.stage_totals().items())
+        if stages:
+            self.logger.debug(f"Tempo por etapa: {stages}")
+        
+        if not self.metrics_dir:
+            return
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            self.metrics.write_json(os.path.join(self.metrics_dir, self.METRICS_JSON))
+            self.metrics.write_prometheus(os.path.join(self.metrics_dir, self.METRICS_PROM))
+            self.logger.info(f"Métricas gravadas em {self.metrics_dir}")
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar as métricas: {str(e)}")
+    
+    def _discard_corrupt_file(self, filename: str, download_time: float, reason: str) -> DownloadResult:
+        """Remove um arquivo recém-baixado que falhou na verificação de integridade."""
+        self.logger.error(f"{filename}: {reason}")
+        file_path = self.file_manager.get_download_path(filename)
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        self.manifest.remove(filename)
+        return DownloadResult(
+            success=False,
+            filename=filename,
+            file_path=file_path,
+            file_size=0,
+            download_time=download_time,
+            error_message=reason
+        )
+    
+    def _verify_zip(self, zip_path: str) -> bool:
+        """Verifica o CRC de todos os membros do ZIP (etapa `verify`)."""
+        with self.metrics.span('verify'):
+            return self.zip_extractor.verify_zip(zip_path)
+    
     def _extract_file(self, zip_path: str) -> ExtractionResult:
         """Extrai o arquivo ZIP baixado."""
         self.logger.info("Iniciando extração do arquivo ZIP...")
         
-        # Listar conteúdo antes da extração
-        contents = self.zip_extractor.list_zip_contents(zip_path)
-        self.logger.info(f"Arquivos no ZIP: {contents}")
-        
         # Extrair para o mesmo diretório do arquivo ZIP
         extract_to = os.path.dirname(zip_path)
-        success = self.zip_extractor.extract_zip(zip_path, extract_to)
+        with self.metrics.span('extract'):
+            extraction_result = self.zip_extractor.extract(zip_path, extract_to)
         
-        if success:
-            return ExtractionResult(
-                success=True,
-                extracted_files=contents,
-                extraction_path=extract_to
-            )
+        if not extraction_result.success and not extraction_result.error_message:
+            extraction_result.error_message = "Falha na extração do arquivo ZIP"
+        return extraction_result
+    
+    def _load_sqlite(self, zip_path: str) -> LoadResult:
+        """Carrega o snapshot no banco SQLite configurado (upsert incremental por mês)."""
+        year_month = SQLiteLoader.month_from_path(zip_path)
+        self.logger.info(f"Carregando {year_month} no SQLite ({self.sqlite_loader.db_path})...")
+        with self.metrics.span('parse', output='sqlite'):
+            load_result = self.sqlite_loader.load(self.record_reader.iter_records(zip_path), year_month)
+        if load_result.success:
+            self.logger.success(str(load_result))
         else:
-            return ExtractionResult(
-                success=False,
-                extracted_files=[],
-                extraction_path=extract_to,
-                error_message="Falha na extração do arquivo ZIP"
-            )
+            self.logger.error(str(load_result))
+        return load_result
+    
+    def _convert_columnar(self, zip_path: str) -> Optional[str]:
+        """
+        Converte o snapshot para o formato colunar (AAAAMM_PEP.pepc ao lado do ZIP).
+        
+        Returns:
+            str: Caminho do arquivo colunar ou None em caso de falha
+        """
+        columnar_path = os.path.splitext(zip_path)[0] + ".pepc"
+        if os.path.exists(columnar_path) and os.path.getmtime(columnar_path) >= os.path.getmtime(zip_path):
+            self.logger.info(f"Snapshot colunar já atualizado: {columnar_path}")
+            return columnar_path
+        
+        self.logger.info("Convertendo snapshot para formato colunar...")
+        try:
+            start_time = time.time()
+            with self.metrics.span('parse', output='columnar'):
+                rows = ColumnarWriter().write(self.record_reader.iter_records(zip_path), columnar_path)
+            elapsed = time.time() - start_time
+            self.logger.success(f"Snapshot colunar: {columnar_path} ({rows} registros em {elapsed:.1f}s)")
+            return columnar_path
+        except Exception as e:
+            self.logger.error(f"Erro na conversão colunar: {str(e)}")
+            return None
+    
+    def _build_screening_index(self, zip_path: str) -> Optional[str]:
+        """
+        Constrói o índice de triagem do snapshot (AAAAMM_PEP.idx ao lado do ZIP).
+        
+        Returns:
+            str: Caminho do índice ou None em caso de falha
+        """
+        index_path = ScreeningIndex.path_for(zip_path)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(zip_path):
+            self.logger.info(f"Índice de triagem já atualizado: {index_path}")
+            return index_path
+        
+        self.logger.info("Construindo índice de triagem...")
+        try:
+            start_time = time.time()
+            with self.metrics.span('parse', output='index'):
+                index = ScreeningIndex.for_snapshot(zip_path, self.record_reader)
+            elapsed = time.time() - start_time
+            self.logger.success(f"Índice de triagem: {index_path} ({len(index)} registros em {elapsed:.1f}s)")
+            return index_path
+        except Exception as e:
+            self.logger.error(f"Erro ao construir índice de triagem: {str(e)}")
+            return None
     
     def _print_summary(self, download_result: DownloadResult, extraction_result: Optional[ExtractionResult]):
         """Imprime resumo final da operação."""
@@ -214,6 +896,21 @@ class PEPDownloaderBot:
         
         self.logger.info("=== FIM DA OPERAÇÃO ===")
     
+    def _print_backfill_summary(self, backfill_result: BackfillResult):
+        """Imprime resumo final de um backfill."""
+        self.logger.info("=== RESUMO DO BACKFILL ===")
+        
+        for download_result, extraction_result in backfill_result.results:
+            if download_result.success:
+                self.logger.success(str(download_result))
+            else:
+                self.logger.error(str(download_result))
+            if extraction_result and not extraction_result.success:
+                self.logger.error(f"{download_result.filename}: {extraction_result}")
+        
+        self.logger.info(str(backfill_result))
+        self.logger.info("=== FIM DA OPERAÇÃO ===")
+    
     def check_available_files(self, months_back: int = 6) -> list[str]:
         """
         Verifica quais arquivos PEP estão disponíveis nos últimos meses.
@@ -224,32 +921,30 @@ class PEPDownloaderBot:
         Returns:
             list: Lista de arquivos disponíveis
         """
-        available_files = []
-        current_date = self.date_generator.get_brasilia_datetime()
+        probe_result = self.probe_months(months_back=months_back, mode=MonthProber.MODE_ALL)
         
-        for i in range(months_back):
-            # Calcular data do mês
-            year = current_date.year
-            month = current_date.month - i
-            
-            if month <= 0:
-                month += 12
-                year -= 1
-            
-            filename = f"{year:04d}{month:02d}_PEP.zip"
-            year_month = f"{year:04d}{month:02d}"
-            url = f"{self.BASE_URL}/{year_month}"
+        for probe in probe_result.probes:
+            if probe.available:
+                self.logger.info(f"✓ Disponível: {probe.filename} (Status: {probe.status_code})")
+        
+        return probe_result.available_files
+    
+    async def check_available_files_async(self, months_back: int = 6) -> list[str]:
+        """
+        Variante assíncrona de check_available_files (requer aiohttp).
+        
+        Args:
+            months_back: Quantos meses para trás verificar
             
-            # Verificar se arquivo existe
-            try:
-                response = self.http_client.session.head(url, timeout=10, allow_redirects=True)
-                # Status 200 (OK) ou 302 (Redirect) indicam que o arquivo está disponível
-                if response.status_code in [200, 302]:
-                    available_files.append(filename)
-                    self.logger.info(f"✓ Disponível: {filename} (Status: {response.status_code})")
-                else:
-                    self.logger.debug(f"✗ Não disponível: {filename} (Status: {response.status_code})")
-            except Exception as e:
-                self.logger.debug(f"✗ Erro ao verificar {filename}: {str(e)}")
+        Returns:
+            list: Lista de arquivos disponíveis
+        """
+        async with self._async_client() as client:
+            probe_result = await self.probe_months_async(client, months_back=months_back,
+                                                         mode=MonthProber.MODE_ALL)
+        
+        for probe in probe_result.probes:
+            if probe.available:
+                self.logger.info(f"✓ Disponível: {probe.filename} (Status: {probe.status_code})")
         
-        return available_files
\ No newline at end of file
+        return probe_result.available_files
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+Armazenamento colunar compacto dos snapshots PEP com leitura via mmap.
+
+Layout do arquivo (little-endian, seções alinhadas em 8 bytes):
+    
+    MAGIC (8 bytes) | tamanho do diretório (uint32) | diretório JSON | colunas...
+
+- Colunas de dicionário (órgão, função, nível): códigos uint16/uint32 por
+  linha + dicionário de strings (offsets uint32 + blob UTF-8)
+- Colunas de data: int32 AAAAMMDD por linha (0 = vazio)
+- Colunas de texto (nome, CPF): offsets uint64 (linhas + 1) + blob UTF-8
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from .models import PEPRecord
+
+
+MAGIC = b'PEPCOL1\x00'
+VERSION = 1
+
+STRING_COLUMNS = ('cpf', 'nome')
+DICTIONARY_COLUMNS = ('sigla_funcao', 'descricao_funcao', 'nivel_funcao', 'orgao')
+DATE_COLUMNS = ('data_inicio', 'data_fim', 'data_carencia')
+
+
+def date_to_int(value: Optional[date]) -> int:
+    """Converte date em inteiro AAAAMMDD (0 para vazio)."""
+    return value.year * 10000 + value.month * 100 + value.day if value else 0
+
+
+def int_to_date(value: int) -> Optional[date]:
+    """Converte inteiro AAAAMMDD em date (None para 0)."""
+    return date(value // 10000, value // 100 % 100, value % 100) if value else None
+
+
+def _little_endian_bytes(values: array) -> bytes:
+    """Serializa um array numérico sempre em little-endian."""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class ColumnarWriter:
+    """Converte registros PEP no formato colunar."""
+    
+    def write(self, records: Iterable[PEPRecord], path: str) -> int:
+        """
+        Grava os registros no arquivo colunar (de forma atômica).
+        
+        Args:
+            records: Registros a gravar (ex: RecordReader.iter_records)
+            path: Caminho do arquivo de saída
+        
+        Returns:
+            int: Número de linhas gravadas
+        """
+        strings = {name: (array('Q', [0]), bytearray()) for name in STRING_COLUMNS}
+        dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+        codes = {name: array('I') for name in DICTIONARY_COLUMNS}
+        dates = {name: array('i') for name in DATE_COLUMNS}
+        
+        rows = 0
+        for record in records:
+            for name in STRING_COLUMNS:
+                offsets, blob = strings[name]
+                blob += getattr(record, name).encode('utf-8')
+                offsets.append(len(blob))
+            for name in DICTIONARY_COLUMNS:
+                value = getattr(record, name)
+                dictionary = dictionaries[name]
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                codes[name].append(code)
+            for name in DATE_COLUMNS:
+                dates[name].append(date_to_int(getattr(record, name)))
+            rows += 1
+        
+        # Monta as seções e o diretório com offsets relativos ao início dos dados
+        sections: List[bytes] = []
+        directory = {'version': VERSION, 'rows': rows, 'columns': {}}
+        position = 0
+        
+        def add_section(data: bytes) -> dict:
+            nonlocal position
+            padding = (-position) % 8
+            if padding:
+                sections.append(b'\x00' * padding)
+                position += padding
+            sections.append(data)
+            location = {'offset': position, 'length': len(data)}
+            position += len(data)
+            return location
+        
+        for name in STRING_COLUMNS:
+            offsets, blob = strings[name]
+            directory['columns'][name] = {
+                'kind': 'string',
+                'offsets': add_section(_little_endian_bytes(offsets)),
+                'blob': add_section(bytes(blob)),
+            }
+        
+        for name in DICTIONARY_COLUMNS:
+            values = list(dictionaries[name])
+            code_type = 'H' if len(values) <= 0xFFFF else 'I'
+            value_offsets = array('I', [0])
+            value_blob = bytearray()
+            for value in values:
+                value_blob += value.encode('utf-8')
+                value_offsets.append(len(value_blob))
+            directory['columns'][name] = {
+                'kind': 'dictionary',
+                'code_type': code_type,
+                'size': len(values),
+                'codes': add_section(_little_endian_bytes(array(code_type, codes[name]))),
+                'value_offsets': add_section(_little_endian_bytes(value_offsets)),
+                'value_blob': add_section(bytes(value_blob)),
+            }
+        
+        for name in DATE_COLUMNS:
+            directory['columns'][name] = {
+                'kind': 'date',
+                'values': add_section(_little_endian_bytes(dates[name])),
+            }
+        
+        directory_bytes = json.dumps(directory).encode('utf-8')
+        header_size = len(MAGIC) + 4 + len(directory_bytes)
+        header_padding = (-header_size) % 8
+        
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<I', len(directory_bytes)))
+            file.write(directory_bytes)
+            file.write(b'\x00' * header_padding)
+            for section in sections:
+                file.write(section)
+        os.replace(temp_path, path)
+        
+        return rows
+
+
+class ColumnarSnapshot:
+    """
+    Leitor de snapshot colunar via mmap: colunas são lidas sob demanda, sem carregar o arquivo.
+    
+    codes() e dates() devolvem memoryviews do próprio mapeamento (sem cópia).
+    Elas continuam válidas depois de close(): o mapeamento só é desfeito
+    quando a última delas deixa de ser referenciada.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._view: Optional[memoryview] = None
+        self._dictionary_cache: Dict[str, List[str]] = {}
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Arquivo colunar vazio: {path}")
+        
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo colunar inválido: {path}")
+        
+        directory_size = struct.unpack_from('<I', self._mmap, len(MAGIC))[0]
+        directory_start = len(MAGIC) + 4
+        self.directory = json.loads(self._mmap[directory_start:directory_start + directory_size])
+        header_size = directory_start + directory_size
+        self._data_start = header_size + (-header_size) % 8
+        self._view = memoryview(self._mmap)
+    
+    def __len__(self) -> int:
+        return self.directory['rows']
+    
+    def __enter__(self) -> "ColumnarSnapshot":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Libera o mapeamento e o arquivo."""
+        self._dictionary_cache.clear()
+        view, self._view = self._view, None
+        mapping, self._mmap = self._mmap, None
+        if view is not None:
+            view.release()
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # colunas ainda referenciadas: o mapeamento é liberado junto com a última
+        self._file.close()
+    
+    @property
+    def columns(self) -> List[str]:
+        return list(self.directory['columns'])
+    
+    def codes(self, name: str) -> Union[memoryview, array]:
+        """Códigos por linha de uma coluna de dicionário (índices em dictionary(name))."""
+        column = self._column(name, 'dictionary')
+        return self._numeric(column['codes'], column['code_type'])
+    
+    def dictionary(self, name: str) -> List[str]:
+        """Valores distintos de uma coluna de dicionário."""
+        if name not in self._dictionary_cache:
+            column = self._column(name, 'dictionary')
+            offsets = self._numeric(column['value_offsets'], 'I')
+            blob = self._section(column['value_blob'])
+            self._dictionary_cache[name] = [
+                bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in range(column['size'])
+            ]
+        return self._dictionary_cache[name]
+    
+    def dates(self, name: str) -> Union[memoryview, array]:
+        """Datas por linha como inteiros AAAAMMDD (0 = vazio)."""
+        return self._numeric(self._column(name, 'date')['values'], 'i')
+    
+    def string_at(self, name: str, row: int) -> str:
+        """Valor de uma coluna de texto em uma linha."""
+        column = self._column(name, 'string')
+        offsets = self._numeric(column['offsets'], 'Q')
+        blob = self._section(column['blob'])
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode('utf-8')
+    
+    def iter_strings(self, name: str) -> Iterator[str]:
+        """Percorre uma coluna de texto sem materializá-la."""
+        column = self._column(name, 'string')
+        offsets = self._numeric(column['offsets'], 'Q')
+        blob = self._section(column['blob'])
+        for row in range(len(self)):
+            yield bytes(blob[offsets[row]:offsets[row + 1]]).decode('utf-8')
+    
+    def iter_column(self, name: str) -> Iterator:
+        """Percorre os valores decodificados de qualquer coluna."""
+        kind = self.directory['columns'][name]['kind']
+        if kind == 'string':
+            yield from self.iter_strings(name)
+        elif kind == 'dictionary':
+            values = self.dictionary(name)
+            for code in self.codes(name):
+                yield values[code]
+        else:
+            for value in self.dates(name):
+                yield int_to_date(value)
+    
+    def record(self, row: int) -> PEPRecord:
+        """Reconstrói o registro completo de uma linha."""
+        fields = {name: self.string_at(name, row) for name in STRING_COLUMNS}
+        for name in DICTIONARY_COLUMNS:
+            fields[name] = self.dictionary(name)[self.codes(name)[row]]
+        for name in DATE_COLUMNS:
+            fields[name] = int_to_date(self.dates(name)[row])
+        return PEPRecord(**fields)
+    
+    def iter_records(self) -> Iterator[PEPRecord]:
+        """Percorre todos os registros reconstruídos."""
+        columns = {name: self.iter_column(name) for name in STRING_COLUMNS + DICTIONARY_COLUMNS + DATE_COLUMNS}
+        for _ in range(len(self)):
+            yield PEPRecord(**{name: next(values) for name, values in columns.items()})
+    
+    def _column(self, name: str, kind: str) -> dict:
+        column = self.directory['columns'].get(name)
+        if column is None or column['kind'] != kind:
+            raise KeyError(f"Coluna '{name}' do tipo '{kind}' não encontrada")
+        return column
+    
+    def _section(self, location: dict) -> memoryview:
+        start = self._data_start + location['offset']
+        return self._view[start:start + location['length']]
+    
+    def _numeric(self, location: dict, typecode: str) -> Union[memoryview, array]:
+        """Seção numérica como memoryview sem cópia (ou array convertido em big-endian)."""
+        section = self._section(location)
+        if sys.byteorder == 'little':
+            return section.cast(typecode)
+        values = array(typecode)
+        values.frombytes(section)
+        values.byteswap()
+        return values
\ No newline at end of file
@@ -1,32 +1,214 @@
 """
 Sistema de logging para console do PEP Downloader Bot.
+
+O nível é conferido antes de montar o registro. Argumentos no estilo %
+(logger.debug("Verificando: %s", url)) só são interpolados quando a mensagem
+é emitida; mensagens montadas com f-string já chegam formatadas, por isso os
+caminhos repetidos (por linha, por mês, por requisição) usam a forma com
+argumentos. As mensagens emitidas entram em uma fila e são formatadas e
+gravadas por uma thread em segundo plano, de modo que um stdout lento
+(drivers de log de contêiner, pipes) não bloqueia o loop de download.
 """
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
 from datetime import datetime
+from typing import Optional, TextIO
+
+
+# Loggers com thread de gravação ativa, esvaziados uma única vez ao encerrar o processo
+_active_loggers: "weakref.WeakSet[ConsoleLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for logger in list(_active_loggers):
+        logger.flush()
 
 
 class ConsoleLogger:
     """Gerencia logs de console com diferentes níveis."""
     
-    def __init__(self, verbose: bool = False):
+    DEBUG = 10
+    INFO = 20
+    SUCCESS = 25
+    WARNING = 30
+    ERROR = 40
+    
+    FORMAT_TEXT = "text"
+    FORMAT_JSON = "json"
+    
+    LEVEL_NAMES = {
+        'debug': DEBUG,
+        'info': INFO,
+        'success': SUCCESS,
+        'warning': WARNING,
+        'error': ERROR,
+    }
+    
+    _TEXT_PREFIXES = {
+        DEBUG: "DEBUG",
+        INFO: "INFO",
+        SUCCESS: "[OK] SUCESSO",
+        WARNING: "[WARN] AVISO",
+        ERROR: "[ERROR] ERRO",
+    }
+    _JSON_LEVELS = {value: name for name, value in LEVEL_NAMES.items()}
+    
+    def __init__(self, verbose: bool = False, level: Optional[str] = None,
+                 log_format: str = FORMAT_TEXT, stream: Optional[TextIO] = None,
+                 background: bool = True, progress_interval: float = 1.0):
+        """
+        Args:
+            verbose: Exibir mensagens de debug (equivale a level='debug')
+            level: Nível mínimo ('debug', 'info', 'success', 'warning', 'error');
+                tem prioridade sobre verbose
+            log_format: 'text' (padrão) ou 'json' (uma linha JSON por mensagem)
+            stream: Destino das mensagens (padrão: o sys.stdout do momento de cada chamada)
+            background: Gravar em uma thread separada; False grava na própria chamada
+            progress_interval: Intervalo mínimo em segundos entre mensagens de progresso
+        """
+        if level is not None and level.lower() not in self.LEVEL_NAMES:
+            raise ValueError(f"Nível de log inválido: {level}")
+        if log_format not in (self.FORMAT_TEXT, self.FORMAT_JSON):
+            raise ValueError(f"Formato de log inválido: {log_format}")
+        
         self.verbose = verbose
+        self.level = self.LEVEL_NAMES[level.lower()] if level else (self.DEBUG if verbose else self.INFO)
+        self.log_format = log_format
+        self.stream = stream
+        self.background = background
+        self.progress_interval = progress_interval
+        self._last_progress = 0.0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
     
-    def _get_timestamp(self) -> str:
-        """Retorna timestamp formatado."""
-        return datetime.now().strftime('%H:%M:%S')
+    def is_enabled(self, level: int) -> bool:
+        """Indica se mensagens do nível serão emitidas."""
+        return level >= self.level
     
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args) -> None:
         """Log de informações."""
-        print(f"[{self._get_timestamp()}] INFO: {message}")
+        if self.level <= self.INFO:
+            self._log(self.INFO, message, args)
     
-    def success(self, message: str) -> None:
+    def success(self, message: str, *args) -> None:
         """Log de sucesso."""
-        print(f"[{self._get_timestamp()}] [OK] SUCESSO: {message}")
+        if self.level <= self.SUCCESS:
+            self._log(self.SUCCESS, message, args)
     
-    def error(self, message: str) -> None:
+    def warning(self, message: str, *args) -> None:
+        """Log de avisos."""
+        if self.level <= self.WARNING:
+            self._log(self.WARNING, message, args)
+    
+    def error(self, message: str, *args) -> None:
         """Log de erros."""
-        print(f"[{self._get_timestamp()}] [ERROR] ERRO: {message}")
+        if self.level <= self.ERROR:
+            self._log(self.ERROR, message, args)
     
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args) -> None:
         """Log de debug (apenas em modo verbose)."""
-        if self.verbose:
-            print(f"[{self._get_timestamp()}] DEBUG: {message}")
\ No newline at end of file
+        if self.level <= self.DEBUG:
+            self._log(self.DEBUG, message, args)
+    
+    def progress(self, done: int, total: int, label: str = "Progresso") -> None:
+        """
+        Log de progresso (nível debug) limitado a uma mensagem por progress_interval.
+        
+        A conclusão (done >= total) é sempre emitida. Quando o nível debug está
+        desligado, o custo é apenas uma comparação.
+        
+        Args:
+            done: Quantidade já processada (ex: bytes baixados)
+            total: Quantidade total (0 se desconhecida)
+            label: Prefixo da mensagem
+        """
+        if self.level > self.DEBUG or total <= 0:
+            return
+        now = time.monotonic()
+        if done < total and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        self._log(self.DEBUG, "%s: %.1f%%", (label, done / total * 100))
+    
+    def flush(self) -> None:
+        """Aguarda a gravação de todas as mensagens já registradas."""
+        if self._writer is not None and self._writer.is_alive() and self._writer_pid == os.getpid():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+    
+    def _log(self, level: int, message: str, args: tuple) -> None:
+        # Só o mínimo na thread chamadora; a formatação fica com o writer
+        record = (time.time(), level, message, args, self.stream or sys.stdout)
+        if not self.background:
+            self._write([record])
+            return
+        if self._writer_pid != os.getpid():
+            self._start_writer()
+        self._queue.put(record)
+    
+    def _start_writer(self) -> None:
+        with self._start_lock:
+            if self._writer_pid == os.getpid():
+                return
+            # Após um fork, a thread do processo pai não existe no filho
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._run_writer, args=(self._queue,),
+                                            name="ConsoleLoggerWriter", daemon=True)
+            self._writer.start()
+            self._writer_pid = os.getpid()
+            _active_loggers.add(self)
+    
+    def _run_writer(self, records: "queue.SimpleQueue") -> None:
+        while True:
+            batch = [records.get()]
+            # Agrupa o que já estiver na fila em uma única escrita
+            while len(batch) < 512:
+                try:
+                    batch.append(records.get_nowait())
+                except queue.Empty:
+                    break
+            events = [item for item in batch if isinstance(item, threading.Event)]
+            self._write([item for item in batch if not isinstance(item, threading.Event)])
+            for event in events:
+                event.set()
+    
+    def _write(self, records: list) -> None:
+        by_stream = {}
+        for record in records:
+            stream = record[4]
+            by_stream.setdefault(id(stream), (stream, []))[1].append(self._format(record))
+        
+        with self._write_lock:
+            for stream, lines in by_stream.values():
+                try:
+                    stream.write(''.join(lines))
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass  # stream fechado ou pipe rompido: o log não deve derrubar o bot
+    
+    def _format(self, record: tuple) -> str:
+        timestamp, level, message, args, _ = record
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args}"
+        
+        if self.log_format == self.FORMAT_JSON:
+            return json.dumps({
+                'time': datetime.fromtimestamp(timestamp).astimezone().isoformat(timespec='milliseconds'),
+                'level': self._JSON_LEVELS[level],
+                'message': str(message),
+            }, ensure_ascii=False) + '\n'
+        return f"[{datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')}] {self._TEXT_PREFIXES[level]}: {message}\n"
\ No newline at end of file
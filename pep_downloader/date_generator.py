@@ -54,4 +54,48 @@ class DateGenerator:
             
             months.append(f"{year:04d}{month:02d}")
         
-        return months
\ No newline at end of file
+        return months
+    
+    def get_month_range(self, start_month: str, end_month: str) -> list[str]:
+        """
+        Gera lista de meses entre dois meses, inclusive (do mais antigo para o mais recente).
+        
+        Args:
+            start_month: Mês inicial no formato AAAAMM
+            end_month: Mês final no formato AAAAMM
+            
+        Returns:
+            list: Lista de strings no formato AAAAMM
+        """
+        start_year, start_mon = self._parse_year_month(start_month)
+        end_year, end_mon = self._parse_year_month(end_month)
+        
+        if (start_year, start_mon) > (end_year, end_mon):
+            raise ValueError(f"Mês inicial {start_month} é posterior ao mês final {end_month}")
+        
+        months = []
+        year, month = start_year, start_mon
+        while (year, month) <= (end_year, end_mon):
+            months.append(f"{year:04d}{month:02d}")
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+        
+        return months
+    
+    def next_month(self, year_month: str) -> str:
+        """Retorna o mês seguinte no formato AAAAMM."""
+        year, month = self._parse_year_month(year_month)
+        return f"{year + 1:04d}01" if month == 12 else f"{year:04d}{month + 1:02d}"
+    
+    def _parse_year_month(self, year_month: str) -> tuple[int, int]:
+        """Valida e converte uma string AAAAMM em (ano, mês)."""
+        if len(year_month) != 6 or not year_month.isdigit():
+            raise ValueError(f"Mês inválido (esperado AAAAMM): {year_month}")
+        
+        year, month = int(year_month[:4]), int(year_month[4:])
+        if not 1 <= month <= 12:
+            raise ValueError(f"Mês inválido (esperado AAAAMM): {year_month}")
+        
+        return year, month
\ No newline at end of file
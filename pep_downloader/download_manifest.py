@@ -0,0 +1,134 @@
+"""
+Manifesto persistente dos arquivos baixados para o PEP Downloader Bot.
+"""
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from .console_logger import ConsoleLogger
+from .file_lock import FileLock
+from .models import ManifestEntry
+
+
+class DownloadManifest:
+    """
+    Registra URL, ETag, Last-Modified, tamanho e hash de cada arquivo baixado.
+    
+    O manifesto pode ser compartilhado por vários processos (crons simultâneos
+    ou nós no mesmo armazenamento): cada alteração relê o arquivo sob uma
+    trava (FileLock) antes de gravar, sem perder registros de outros processos.
+    Falhas de disco ao gravar são registradas no log sem interromper o bot: o
+    arquivo baixado é mantido e o registro vale para a execução atual.
+    """
+    
+    MANIFEST_FILENAME = ".pep_manifest.json"
+    VERSION = 1
+    
+    def __init__(self, download_dir: str = "downloads", logger: Optional[ConsoleLogger] = None):
+        self.download_dir = download_dir
+        self.manifest_path = os.path.join(download_dir, self.MANIFEST_FILENAME)
+        self.logger = logger or ConsoleLogger()
+        self._entries: Optional[Dict[str, ManifestEntry]] = None
+        self._lock = threading.Lock()
+    
+    def get(self, filename: str) -> Optional[ManifestEntry]:
+        """Retorna o registro do arquivo ou None se não houver."""
+        with self._lock:
+            return self._load().get(filename)
+    
+    def record(self, filename: str, entry: ManifestEntry) -> None:
+        """Grava (ou substitui) o registro de um arquivo e persiste o manifesto."""
+        entry.updated_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            try:
+                with FileLock(self.manifest_path, self.logger):
+                    self._entries = None
+                    self._load()[filename] = entry
+                    self._save()
+            except OSError as e:
+                self._load()[filename] = entry
+                self.logger.error(f"Não foi possível atualizar o manifesto: {str(e)}")
+    
+    def record_file(self, filename: str, url: str,
+                    etag: Optional[str] = None,
+                    last_modified: Optional[str] = None,
+                    sha256: Optional[str] = None) -> ManifestEntry:
+        """Registra o arquivo local no manifesto (o SHA-256 só é calculado se não informado)."""
+        file_path = os.path.join(self.download_dir, filename)
+        entry = ManifestEntry(
+            url=url,
+            size=os.path.getsize(file_path),
+            sha256=sha256 or self.hash_file(file_path),
+            etag=etag,
+            last_modified=last_modified
+        )
+        self.record(filename, entry)
+        return entry
+    
+    def months(self) -> List[str]:
+        """Meses (AAAAMM) com arquivo registrado, do mais antigo para o mais recente."""
+        with self._lock:
+            filenames = list(self._load())
+        return sorted(name[:6] for name in filenames
+                      if name.endswith('_PEP.zip') and len(name) == 14 and name[:6].isdigit())
+    
+    def remove(self, filename: str) -> None:
+        """Remove o registro de um arquivo (ex: arquivo corrompido descartado)."""
+        with self._lock:
+            try:
+                with FileLock(self.manifest_path, self.logger):
+                    self._entries = None
+                    if self._load().pop(filename, None) is not None:
+                        self._save()
+            except OSError as e:
+                self._load().pop(filename, None)
+                self.logger.error(f"Não foi possível atualizar o manifesto: {str(e)}")
+    
+    def reload(self) -> None:
+        """Descarta os registros em memória; a próxima consulta relê o disco (ex: após esperar outro processo)."""
+        with self._lock:
+            self._entries = None
+    
+    @staticmethod
+    def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """Calcula o SHA-256 de um arquivo em blocos."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _load(self) -> Dict[str, ManifestEntry]:
+        """Carrega o manifesto do disco na primeira utilização."""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                for filename, fields in data.get('files', {}).items():
+                    self._entries[filename] = ManifestEntry(**fields)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.error(f"Não foi possível ler o manifesto: {str(e)}")
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"Manifesto inválido ignorado ({self.manifest_path}): {str(e)}")
+        return self._entries
+    
+    def _save(self) -> None:
+        """Persiste o manifesto de forma atômica (arquivo temporário + rename)."""
+        data = {
+            'version': self.VERSION,
+            'files': {filename: asdict(entry) for filename, entry in sorted(self._entries.items())}
+        }
+        temp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            # Sem o manifesto o próximo download não é condicional, mas o arquivo baixado continua válido
+            self.logger.error(f"Não foi possível gravar o manifesto: {str(e)}")
\ No newline at end of file
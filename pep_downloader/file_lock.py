@@ -0,0 +1,81 @@
+"""
+Trava de arquivos entre processos para o PEP Downloader Bot.
+"""
+import os
+from typing import Optional
+from .console_logger import ConsoleLogger
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock
+    fcntl = None
+
+
+class FileLock:
+    """
+    Trava consultiva exclusiva (fcntl.flock) associada a um arquivo de destino.
+    
+    A trava fica em "<destino>.lock", ao lado do destino, e vale entre processos
+    (vários crons ou nós no mesmo armazenamento compartilhado) e entre threads,
+    já que cada FileLock abre o arquivo de trava por conta própria. O sistema
+    libera a trava se o processo terminar. O arquivo de trava não é removido:
+    removê-lo enquanto outro processo espera nele quebraria a exclusão.
+    
+    Sem fcntl (Windows), a trava não tem efeito.
+    """
+    
+    SUFFIX = ".lock"
+    
+    def __init__(self, path: str, logger: Optional[ConsoleLogger] = None):
+        """
+        Args:
+            path: Arquivo protegido pela trava
+            logger: Logger para mensagens
+        """
+        self.path = path
+        self.lock_path = f"{path}{self.SUFFIX}"
+        self.logger = logger or ConsoleLogger()
+        self._fd: Optional[int] = None
+    
+    def acquire(self) -> bool:
+        """
+        Obtém a trava, esperando o processo que a detém terminar.
+        
+        Returns:
+            bool: True se foi preciso esperar por outro processo
+        """
+        if fcntl is None:
+            return False
+        
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            waited = False
+        except BlockingIOError:
+            self.logger.debug(f"Aguardando outro processo concluir {os.path.basename(self.path)}...")
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+            waited = True
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return waited
+    
+    def release(self) -> None:
+        """Libera a trava (fechar o descritor desfaz o flock)."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self) -> "FileLock":
+        if self._fd is None:
+            self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
\ No newline at end of file
@@ -8,6 +8,49 @@ from typing import Optional
 from .console_logger import ConsoleLogger
 
 
+# Folga mantida livre além do tamanho real dos arquivos a gravar
+DISK_SPACE_MARGIN = 16 * 1024 * 1024
+
+
+def free_space(path: str) -> int:
+    """Bytes livres no sistema de arquivos de `path` (ou do primeiro diretório existente acima)."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return shutil.disk_usage(path).free
+
+
+def space_error(path: str, required_bytes: int) -> Optional[str]:
+    """
+    Verifica se cabem `required_bytes` (mais a folga) no sistema de arquivos de `path`.
+    
+    Returns:
+        Optional[str]: Mensagem de erro, ou None se há espaço (ou se não foi possível verificar)
+    """
+    try:
+        available = free_space(path)
+    except OSError:
+        return None
+    if available < required_bytes + DISK_SPACE_MARGIN:
+        return (f"Espaço insuficiente em disco. Disponível: {available / (1024*1024):.1f}MB, "
+                f"Necessário: {(required_bytes + DISK_SPACE_MARGIN) / (1024*1024):.1f}MB")
+    return None
+
+
+def preallocate(fd: int, size: int) -> None:
+    """Reserva o espaço de um arquivo antecipadamente (posix_fallocate ou ftruncate)."""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
 class FileManager:
     """Gerencia operações de arquivo e diretório."""
     
@@ -28,25 +71,27 @@ class FileManager:
         """Retorna caminho completo para download."""
         return os.path.join(self.download_dir, filename)
     
-    def check_disk_space(self, required_mb: int = 100) -> bool:
+    def check_disk_space(self, required_bytes: int = 0) -> bool:
         """
         Verifica se há espaço suficiente em disco.
         
+        O tamanho real de cada arquivo só é conhecido na resposta do servidor (e é
+        verificado pelo HTTPClient); sem `required_bytes`, confere apenas a folga
+        mínima (DISK_SPACE_MARGIN).
+        
         Args:
-            required_mb: Espaço mínimo necessário em MB
+            required_bytes: Bytes que serão gravados
             
         Returns:
             bool: True se há espaço suficiente
         """
         try:
-            free_bytes = shutil.disk_usage(self.download_dir).free
-            free_mb = free_bytes / (1024 * 1024)
-            
-            if free_mb < required_mb:
-                self.logger.error(f"Espaço insuficiente. Disponível: {free_mb:.1f}MB, Necessário: {required_mb}MB")
+            error = space_error(self.download_dir, required_bytes)
+            if error:
+                self.logger.error(error)
                 return False
             
-            self.logger.debug(f"Espaço disponível: {free_mb:.1f}MB")
+            self.logger.debug(f"Espaço disponível: {free_space(self.download_dir) / (1024*1024):.1f}MB")
             return True
             
         except Exception as e:
@@ -64,6 +109,10 @@ class FileManager:
         
         return exists
     
+    def get_modified_time(self, filename: str) -> float:
+        """Retorna a data de modificação do arquivo (timestamp)."""
+        return os.path.getmtime(self.get_download_path(filename))
+    
     def get_file_size(self, filename: str) -> int:
         """Retorna tamanho do arquivo em bytes."""
         filepath = self.get_download_path(filename)
@@ -1,92 +1,746 @@
 """
 Cliente HTTP para download de arquivos PEP.
 """
+import hashlib
+import os
 import requests
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Optional
+from urllib3.exceptions import HTTPError as Urllib3Error
 from .console_logger import ConsoleLogger
+from .file_manager import preallocate, space_error
+from .metrics import Metrics
+from .models import Resolution, TransferResult
+from .rate_limiter import RateLimitedAdapter, RateLimiter
+
+
+class _CountingHash:
+    """SHA-256 incremental que registra quantos bytes já foram processados."""
+    
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self.bytes_hashed = 0
+    
+    def update(self, data: bytes) -> None:
+        self._digest.update(data)
+        self.bytes_hashed += len(data)
+    
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
 
 
 class HTTPClient:
-    """Gerencia requisições HTTP com headers apropriados e retry logic."""
+    """
+    Gerencia requisições HTTP com headers apropriados e retry logic.
+    
+    Todas as requisições da sessão passam pelo RateLimiter (taxa, concorrência
+    adaptativa, Retry-After e circuit breaker); as novas tentativas esperam um
+    backoff exponencial com jitter completo.
+    """
+    
+    # Tamanho mínimo de cada segmento no modo multi-segmento
+    MIN_SEGMENT_SIZE = 1024 * 1024
+    
+    # Buffer de leitura do corpo das respostas (reutilizado por thread)
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+    MIN_BUFFER_SIZE = 16 * 1024
     
-    def __init__(self, logger: Optional[ConsoleLogger] = None, max_retries: int = 3):
+    # Headers para simular navegador real
+    BROWSER_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    }
+    
+    def __init__(self, logger: Optional[ConsoleLogger] = None, max_retries: int = 3,
+                 pool_size: int = 10, segments: int = 1, metrics: Optional[Metrics] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            logger: Logger para mensagens
+            max_retries: Número máximo de tentativas (por segmento no modo multi-segmento)
+            pool_size: Tamanho do pool de conexões HTTP
+            segments: Número de conexões paralelas por arquivo (1 = stream único)
+            metrics: Registro de métricas (etapas head/ttfb/transfer/hash, status e retries)
+            buffer_size: Bytes lidos e gravados por operação no download
+            rate_limiter: Controle de taxa e concorrência (padrão: RateLimiter com a janela do pool)
+        """
         self.logger = logger or ConsoleLogger()
+        self.metrics = metrics or Metrics()
         self.max_retries = max_retries
+        self.segments = max(1, segments)
+        self.buffer_size = max(self.MIN_BUFFER_SIZE, buffer_size)
+        self._buffers = threading.local()
         self.session = requests.Session()
         
+        # Pool de conexões compartilhado entre as threads de verificação e download
+        pool_size = max(pool_size, self.segments)
+        self.rate_limiter = rate_limiter or RateLimiter(max_concurrency=pool_size, logger=self.logger,
+                                                        metrics=self.metrics)
+        adapter = RateLimitedAdapter(self.rate_limiter, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Headers para simular navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
+        self.session.headers.update(self.BROWSER_HEADERS)
     
-    def download_file(self, url: str, filepath: str) -> bool:
+    def download_file(self, url: str, filepath: str, resolution: Optional[Resolution] = None) -> bool:
         """
         Baixa arquivo do URL especificado com retry automático.
         
         Args:
             url: URL do arquivo para download
             filepath: Caminho onde salvar o arquivo
+            resolution: Resolução da verificação (MonthProbe.resolution) para pular o HEAD
             
         Returns:
             bool: True se download foi bem-sucedido, False caso contrário
         """
+        return self.download(url, filepath, resolution=resolution).success
+    
+    def download(self, url: str, filepath: str,
+                 etag: Optional[str] = None,
+                 last_modified: Optional[str] = None,
+                 resolution: Optional[Resolution] = None) -> TransferResult:
+        """
+        Baixa arquivo do URL especificado com retry automático.
+        
+        O conteúdo é gravado em "<filepath>.part" e só é renomeado para o destino
+        final quando completo. Se o servidor anunciar "Accept-Ranges: bytes", as
+        novas tentativas continuam do ponto em que pararam (Range + If-Range).
+        
+        Com `etag`/`last_modified` de um download anterior, as requisições são
+        condicionais (If-None-Match/If-Modified-Since): um 304 indica que a cópia
+        local está atualizada e nenhum conteúdo é transferido.
+        
+        O SHA-256 do arquivo é calculado junto com a gravação, sem reler o
+        arquivo (exceto um .part de execução anterior, ao retomar).
+        
+        Com Content-Length, o espaço em disco é verificado pelo tamanho real e o
+        .part é pré-alocado; o corpo é lido com readinto em um buffer reutilizado
+        de `buffer_size` bytes (ver _copy_body).
+        
+        Com a `resolution` do HEAD da verificação, a primeira tentativa não repete
+        o HEAD: vai direto ao GET na URL final (sem redirecionamentos) e, se a
+        versão resolvida for a mesma da cópia local, nem faz o GET. Se a URL
+        final não responder mais (ex: link temporário expirado), o GET é refeito
+        na URL original.
+        
+        Args:
+            url: URL do arquivo para download
+            filepath: Caminho onde salvar o arquivo
+            etag: ETag da cópia local, se houver
+            last_modified: Last-Modified da cópia local, se houver
+            resolution: Resolução da verificação (MonthProbe.resolution), se houver
+            
+        Returns:
+            TransferResult: Resultado da transferência
+        """
+        conditional_headers = {}
+        if etag:
+            conditional_headers['If-None-Match'] = etag
+        if last_modified:
+            conditional_headers['If-Modified-Since'] = last_modified
+        
+        if resolution is not None and resolution.is_unchanged(etag, last_modified):
+            self.logger.info("Arquivo local já está atualizado (mesma versão da verificação)")
+            return TransferResult(success=True, not_modified=True, etag=etag,
+                                  last_modified=last_modified, final_url=resolution.final_url)
+        
+        if self.segments > 1:
+            segmented_result = self._try_segmented_download(url, filepath, conditional_headers, resolution)
+            if segmented_result is not None:
+                return segmented_result
+        
+        part_path = f"{filepath}.part"
+        validator = None          # ETag (ou Last-Modified) da versão sendo baixada
+        accept_ranges = False
+        part_is_ours = False      # .part escrito nesta chamada (mesma versão do arquivo)
+        response_etag = None
+        response_last_modified = None
+        digest = None             # SHA-256 calculado durante a gravação do .part
+        
         for attempt in range(self.max_retries):
+            response = None
             try:
                 self.logger.info(f"Iniciando download (tentativa {attempt + 1}/{self.max_retries}): {url}")
                 
-                # Primeiro fazer uma requisição HEAD para verificar se o arquivo existe
-                head_response = self.session.head(url, timeout=10, allow_redirects=True)
-                self.logger.debug(f"Status da verificação HEAD: {head_response.status_code}")
+                get_url = url
+                if resolution is not None and attempt == 0:
+                    # HEAD já feito na verificação: GET direto na URL final
+                    get_url = resolution.final_url
+                    accept_ranges = resolution.accept_ranges
+                    validator = resolution.validator
+                    self.logger.debug(f"Usando a resolução da verificação: {get_url}")
+                else:
+                    # Primeiro fazer uma requisição HEAD para verificar se o arquivo existe
+                    head_response = self.head(url, headers=conditional_headers)
+                    self.logger.debug(f"Status da verificação HEAD: {head_response.status_code}")
+                    
+                    if head_response.status_code == 404:
+                        self.logger.error(f"Arquivo não encontrado no servidor: {url}")
+                        return TransferResult(success=False, error_message="Arquivo não encontrado no servidor (404)")
+                    elif head_response.status_code == 304:
+                        self.logger.info("Arquivo local já está atualizado (304 Not Modified)")
+                        return TransferResult(success=True, not_modified=True, etag=etag,
+                                              last_modified=last_modified, final_url=head_response.url)
+                    elif head_response.status_code in RateLimiter.THROTTLE_STATUSES:
+                        # O RateLimitedAdapter já reenviou o HEAD: não repetir a espera aqui
+                        error_msg = f"Servidor limitou as requisições ({head_response.status_code})"
+                        self.logger.error(error_msg)
+                        return TransferResult(success=False, error_message=error_msg)
+                    elif head_response.status_code == 403:
+                        self.logger.warning("Acesso negado na verificação HEAD, tentando download direto...")
+                    elif head_response.ok:
+                        accept_ranges = accept_ranges or self._accepts_ranges(head_response)
+                        validator = validator or self._get_validator(head_response)
+                
+                # Retomar de onde parou quando possível
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                headers = {}
+                if offset > 0 and accept_ranges and (validator or part_is_ours):
+                    headers['Range'] = f"bytes={offset}-"
+                    headers['Accept-Encoding'] = 'identity'
+                    if validator:
+                        headers['If-Range'] = validator
+                    self.logger.info(f"Retomando download a partir de {offset / (1024*1024):.2f} MB")
+                else:
+                    offset = 0
+                    headers.update(conditional_headers)
+                
+                response = self._get(get_url, headers)
+                if get_url != url and response.status_code in (403, 404, 410):
+                    # URL final não vale mais: volta ao endereço original (com redirecionamentos)
+                    response.close()
+                    self.logger.debug(f"URL resolvida respondeu {response.status_code}, usando {url}")
+                    response = self._get(url, headers)
                 
-                if head_response.status_code == 404:
+                if response.status_code == 404:
+                    response.close()
                     self.logger.error(f"Arquivo não encontrado no servidor: {url}")
-                    return False
-                elif head_response.status_code == 403:
-                    self.logger.warning("Acesso negado na verificação HEAD, tentando download direto...")
+                    return TransferResult(success=False, error_message="Arquivo não encontrado no servidor (404)")
+                
+                if response.status_code == 304:
+                    response.close()
+                    self.logger.info("Arquivo local já está atualizado (304 Not Modified)")
+                    return TransferResult(success=True, not_modified=True, etag=etag,
+                                          last_modified=last_modified, final_url=response.url)
+                
+                if response.status_code in RateLimiter.THROTTLE_STATUSES:
+                    # O RateLimitedAdapter já reenviou o GET: não repetir a espera aqui
+                    response.close()
+                    error_msg = f"Servidor limitou as requisições ({response.status_code})"
+                    self.logger.error(error_msg)
+                    return TransferResult(success=False, error_message=error_msg)
+                
+                if response.status_code == 416 and offset > 0:
+                    # Range inválido: o .part não corresponde mais ao arquivo remoto
+                    response.close()
+                    self._remove_part(part_path)
+                    part_is_ours = False
+                    raise requests.exceptions.RequestException("Range não satisfatível, reiniciando download")
                 
-                response = self.session.get(url, stream=True, timeout=30, allow_redirects=True)
                 response.raise_for_status()
                 
+                mode = 'wb'
+                if response.status_code == 206:
+                    range_start, total_size = self._parse_content_range(response.headers.get('content-range', ''))
+                    response_validator = self._get_validator(response)
+                    if range_start != offset or (validator and response_validator and response_validator != validator):
+                        response.close()
+                        self._remove_part(part_path)
+                        part_is_ours = False
+                        raise requests.exceptions.RequestException("Content-Range inesperado, reiniciando download")
+                    mode = 'ab'
+                else:
+                    # Resposta completa (servidor ignorou o Range ou o arquivo mudou)
+                    offset = 0
+                    total_size = int(response.headers.get('content-length', 0))
+                    accept_ranges = accept_ranges or self._accepts_ranges(response)
+                    validator = self._get_validator(response) or validator
+                
+                response_etag = response.headers.get('etag') or response_etag
+                response_last_modified = response.headers.get('last-modified') or response_last_modified
+                
                 # Obter tamanho do arquivo se disponível
-                total_size = int(response.headers.get('content-length', 0))
                 if total_size > 0:
                     self.logger.info(f"Tamanho do arquivo: {total_size / (1024*1024):.2f} MB")
                 
+                # Espaço para o que falta baixar, pelo tamanho real da resposta
+                error = space_error(filepath, total_size - offset) if total_size > 0 else None
+                if error:
+                    response.close()
+                    self.logger.error(error)
+                    return TransferResult(success=False, error_message=error)
+                
+                # Hash incremental: continua do ponto já gravado ou recomeça
+                if offset == 0:
+                    digest = _CountingHash()
+                elif digest is None or digest.bytes_hashed != offset:
+                    with self.metrics.span('hash'):
+                        digest = self._hash_part(part_path, offset)
+                
                 # Download com progresso
-                downloaded = 0
-                with open(filepath, 'wb') as file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            file.write(chunk)
-                            downloaded += len(chunk)
-                            
-                            # Mostrar progresso a cada 1MB baixado
-                            if total_size > 0 and downloaded % (1024*1024) == 0:
-                                progress = (downloaded / total_size) * 100
-                                self.logger.debug(f"Progresso: {progress:.1f}%")
+                downloaded = offset
+                transfer_start = time.perf_counter()
+                try:
+                    with open(part_path, mode, buffering=0) as file:
+                        part_is_ours = True
+                        if mode == 'wb' and total_size > 0:
+                            self._preallocate(file.fileno(), total_size)
+                        try:
+                            self._copy_body(response, file, digest, total_size)
+                        finally:
+                            downloaded = file.tell()
+                            # O tamanho do .part é o ponto de retomada: descarta a pré-alocação não usada
+                            if downloaded < total_size:
+                                file.truncate(downloaded)
+                finally:
+                    self._record_transfer(transfer_start, downloaded - offset)
+                
+                if total_size > 0 and downloaded != total_size:
+                    raise requests.exceptions.RequestException(
+                        f"Download incompleto: {downloaded} de {total_size} bytes"
+                    )
                 
+                # Publicar somente o arquivo completo
+                os.replace(part_path, filepath)
                 self.logger.success(f"Download concluído: {filepath}")
-                return True
+                return TransferResult(
+                    success=True,
+                    file_size=downloaded,
+                    etag=response_etag,
+                    last_modified=response_last_modified,
+                    final_url=response.url,
+                    sha256=digest.hexdigest()
+                )
                 
             except requests.exceptions.RequestException as e:
                 self.logger.error(f"Erro na tentativa {attempt + 1}: {str(e)}")
+                if response is not None:
+                    response.close()  # devolve a conexão (e a vaga do limitador)
                 
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Backoff exponencial
-                    self.logger.info(f"Aguardando {wait_time}s antes da próxima tentativa...")
+                    self.metrics.inc('http_retries_total')
+                    wait_time = self.rate_limiter.backoff(attempt)
+                    self.logger.info(f"Aguardando {wait_time:.1f}s antes da próxima tentativa...")
                     time.sleep(wait_time)
                 else:
                     self.logger.error("Todas as tentativas de download falharam")
-                    return False
+                    return TransferResult(success=False, error_message=f"Falha após {self.max_retries} tentativas: {str(e)}")
             
             except Exception as e:
                 self.logger.error(f"Erro inesperado: {str(e)}")
-                return False
+                if response is not None:
+                    response.close()
+                return TransferResult(success=False, error_message=f"Erro inesperado: {str(e)}")
+        
+        return TransferResult(success=False, error_message="Nenhuma tentativa de download realizada")
+    
+    def iter_download(self, url: str, filepath: str,
+                      chunk_size: int = 64 * 1024) -> Generator[bytes, None, TransferResult]:
+        """
+        Baixa o arquivo repassando cada bloco recebido (modo pipeline).
+        
+        Os blocos são gravados em "<filepath>.part" (e entram no SHA-256) antes de
+        serem entregues; o arquivo só é publicado quando completo. Como os bytes
+        já entregues não podem ser descartados, uma queda só é recuperada se o
+        servidor aceitar Range: a nova tentativa continua do ponto exato.
+        
+        Args:
+            url: URL do arquivo para download
+            filepath: Caminho onde salvar o arquivo
+            chunk_size: Tamanho dos blocos lidos da resposta
+        
+        Yields:
+            bytes: Blocos do arquivo, em ordem
+        
+        Returns:
+            TransferResult: Resultado da transferência (valor de retorno do gerador)
+        """
+        part_path = f"{filepath}.part"
+        digest = _CountingHash()
+        received = 0
+        total_size = 0
+        validator = None
+        accept_ranges = False
+        response_etag = None
+        response_last_modified = None
+        final_url = url
+        
+        for attempt in range(self.max_retries):
+            headers = {}
+            if received > 0:
+                if not accept_ranges:
+                    return TransferResult(success=False, error_message="Conexão interrompida e o servidor não aceita Range")
+                headers['Range'] = f"bytes={received}-"
+                headers['Accept-Encoding'] = 'identity'
+                if validator:
+                    headers['If-Range'] = validator
+                self.logger.info(f"Retomando download a partir de {received / (1024*1024):.2f} MB")
+            
+            try:
+                self.logger.info(f"Iniciando download em pipeline (tentativa {attempt + 1}/{self.max_retries}): {url}")
+                with self._get(final_url, headers) as response:
+                    if response.status_code == 404:
+                        self.logger.error(f"Arquivo não encontrado no servidor: {url}")
+                        return TransferResult(success=False, error_message="Arquivo não encontrado no servidor (404)")
+                    if response.status_code in RateLimiter.THROTTLE_STATUSES:
+                        # O RateLimitedAdapter já reenviou o GET: não repetir a espera aqui
+                        error_msg = f"Servidor limitou as requisições ({response.status_code})"
+                        self.logger.error(error_msg)
+                        return TransferResult(success=False, error_message=error_msg)
+                    response.raise_for_status()
+                    
+                    if received > 0:
+                        range_start, _ = self._parse_content_range(response.headers.get('content-range', ''))
+                        if response.status_code != 206 or range_start != received:
+                            return TransferResult(success=False,
+                                                  error_message="Arquivo mudou no servidor durante o download")
+                    else:
+                        total_size = int(response.headers.get('content-length', 0))
+                        accept_ranges = self._accepts_ranges(response)
+                        validator = self._get_validator(response)
+                        response_etag = response.headers.get('etag')
+                        response_last_modified = response.headers.get('last-modified')
+                        final_url = response.url
+                        error = space_error(filepath, total_size) if total_size > 0 else None
+                        if error:
+                            self.logger.error(error)
+                            return TransferResult(success=False, error_message=error)
+                    
+                    # Inclui o tempo em que o consumidor processa cada bloco (pipeline)
+                    transfer_start = time.perf_counter()
+                    attempt_start = received
+                    try:
+                        with open(part_path, 'ab' if received > 0 else 'wb') as file:
+                            for chunk in response.iter_content(chunk_size=chunk_size):
+                                if chunk:
+                                    file.write(chunk)
+                                    digest.update(chunk)
+                                    received += len(chunk)
+                                    self.logger.progress(received, total_size)
+                                    yield chunk
+                    finally:
+                        self._record_transfer(transfer_start, received - attempt_start)
+                
+                if total_size > 0 and received != total_size:
+                    raise requests.exceptions.RequestException(
+                        f"Download incompleto: {received} de {total_size} bytes"
+                    )
+                
+                os.replace(part_path, filepath)
+                self.logger.success(f"Download concluído: {filepath}")
+                return TransferResult(
+                    success=True,
+                    file_size=received,
+                    etag=response_etag,
+                    last_modified=response_last_modified,
+                    final_url=final_url,
+                    sha256=digest.hexdigest()
+                )
+            
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Erro na tentativa {attempt + 1}: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    self.metrics.inc('http_retries_total')
+                    time.sleep(self.rate_limiter.backoff(attempt))
+        
+        return TransferResult(success=False, error_message=f"Falha após {self.max_retries} tentativas")
+    
+    def _try_segmented_download(self, url: str, filepath: str, conditional_headers: dict,
+                                resolution: Optional[Resolution] = None) -> Optional[TransferResult]:
+        """
+        Tenta baixar o arquivo em vários segmentos paralelos.
         
-        return False
\ No newline at end of file
+        Com a resolução da verificação, o HEAD não é repetido.
+        
+        Returns:
+            Optional[TransferResult]: Resultado do download, ou None se o servidor não
+            suportar Range (ou o arquivo for pequeno) e o stream único deve ser usado
+        """
+        if resolution is None:
+            try:
+                head_response = self.head(url, headers=conditional_headers)
+            except requests.exceptions.RequestException as e:
+                self.logger.debug(f"HEAD falhou, usando stream único: {str(e)}")
+                return None
+            
+            if head_response.status_code == 304:
+                self.logger.info("Arquivo local já está atualizado (304 Not Modified)")
+                return TransferResult(success=True, not_modified=True,
+                                      etag=conditional_headers.get('If-None-Match'),
+                                      last_modified=conditional_headers.get('If-Modified-Since'),
+                                      final_url=head_response.url)
+            resolution = self.resolution(url, head_response)
+        
+        total_size = resolution.content_length
+        if not resolution.accept_ranges or total_size <= 0:
+            self.logger.debug("Servidor não suporta Range, usando stream único")
+            return None
+        
+        segments = min(self.segments, total_size // self.MIN_SEGMENT_SIZE)
+        if segments < 2:
+            return None
+        
+        # Segmentos vão direto para a URL final, sem repetir a cadeia de redirecionamentos
+        final_url = resolution.final_url
+        validator = resolution.validator
+        part_path = f"{filepath}.part"
+        
+        segment_size = total_size // segments
+        ranges = [(i * segment_size, total_size - 1 if i == segments - 1 else (i + 1) * segment_size - 1)
+                  for i in range(segments)]
+        
+        self.logger.info(f"Download em {segments} segmentos: {final_url} ({total_size / (1024*1024):.2f} MB)")
+        
+        error = space_error(filepath, total_size)
+        if error:
+            self.logger.error(error)
+            return TransferResult(success=False, error_message=error)
+        
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            self._preallocate(fd, total_size)
+            write_lock = threading.Lock()
+            with self.metrics.span('transfer', mode='segmented'):
+                with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="pep-segment") as executor:
+                    results = list(executor.map(
+                        lambda byte_range: self._download_segment(final_url, fd, byte_range, validator, write_lock),
+                        ranges
+                    ))
+        finally:
+            os.close(fd)
+        
+        if not all(results):
+            self.logger.error("Falha em um ou mais segmentos do download")
+            self._remove_part(part_path)
+            return TransferResult(success=False, error_message="Falha em um ou mais segmentos do download")
+        
+        # Segmentos chegam fora de ordem: o hash é calculado em uma leitura sequencial
+        with self.metrics.span('hash'):
+            digest = self._hash_part(part_path, total_size)
+        
+        os.replace(part_path, filepath)
+        self.logger.success(f"Download concluído: {filepath}")
+        return TransferResult(
+            success=True,
+            file_size=total_size,
+            etag=resolution.etag,
+            last_modified=resolution.last_modified,
+            final_url=final_url,
+            sha256=digest.hexdigest()
+        )
+    
+    def _download_segment(self, url: str, fd: int, byte_range: tuple[int, int],
+                          validator: Optional[str], write_lock: threading.Lock) -> bool:
+        """Baixa um intervalo de bytes com retry próprio, gravando por posição no arquivo."""
+        start, end = byte_range
+        position = start
+        
+        for attempt in range(self.max_retries):
+            try:
+                headers = {'Range': f"bytes={position}-{end}", 'Accept-Encoding': 'identity'}
+                if validator:
+                    headers['If-Range'] = validator
+                
+                with self._get(url, headers) as response:
+                    if response.status_code in RateLimiter.THROTTLE_STATUSES:
+                        # O RateLimitedAdapter já reenviou o GET: não repetir a espera aqui
+                        self.logger.error(f"Servidor limitou o segmento {start}-{end} ({response.status_code})")
+                        return False
+                    response.raise_for_status()
+                    range_start, _ = self._parse_content_range(response.headers.get('content-range', ''))
+                    if response.status_code != 206 or range_start != position:
+                        # Arquivo mudou no servidor ou Range ignorado: segmento não pode continuar
+                        self.logger.error(f"Resposta inesperada para o segmento {start}-{end}: {response.status_code}")
+                        return False
+                    
+                    attempt_start = position
+                    try:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            if chunk:
+                                chunk = chunk[:end + 1 - position]
+                                self._write_at(fd, chunk, position, write_lock)
+                                position += len(chunk)
+                    finally:
+                        self.metrics.inc('bytes_downloaded_total', position - attempt_start)
+                
+                if position > end:
+                    self.logger.debug("Segmento %d-%d concluído", start, end)
+                    return True
+                raise requests.exceptions.RequestException(
+                    f"Segmento {start}-{end} incompleto: {position - start} de {end - start + 1} bytes"
+                )
+            
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Erro no segmento {start}-{end} (tentativa {attempt + 1}): {str(e)}")
+                if attempt < self.max_retries - 1:
+                    self.metrics.inc('http_retries_total')
+                    time.sleep(self.rate_limiter.backoff(attempt))
+        
+        return False
+    
+    @staticmethod
+    def resolution(url: str, response) -> Resolution:
+        """
+        Monta a resolução de um HEAD (requests.Response ou HeadResponse do cliente assíncrono).
+        
+        Tamanho, validadores e Accept-Ranges só são considerados em respostas 2xx
+        (um 403 do armazenamento que recusa HEAD traz apenas a URL final).
+        """
+        status = getattr(response, 'status_code', None) or getattr(response, 'status', 0)
+        resolution = Resolution(url=url, final_url=str(response.url))
+        if 200 <= status < 300:
+            headers = response.headers
+            resolution.content_length = int(headers.get('content-length') or 0)
+            resolution.etag = headers.get('etag')
+            resolution.last_modified = headers.get('last-modified')
+            resolution.accept_ranges = headers.get('accept-ranges', '').lower() == 'bytes'
+        return resolution
+    
+    def head(self, url: str, headers: Optional[dict] = None, timeout: int = 10) -> requests.Response:
+        """Executa uma requisição HEAD seguindo redirecionamentos (etapa `head` e contagem de status)."""
+        with self.metrics.span('head'):
+            response = self.session.head(url, timeout=timeout, allow_redirects=True, headers=headers)
+        self.metrics.inc('http_responses_total', method='HEAD', status=response.status_code)
+        return response
+    
+    def _get(self, url: str, headers: dict) -> requests.Response:
+        """GET em stream; o tempo até os headers da resposta é a etapa `ttfb`."""
+        with self.metrics.span('ttfb'):
+            response = self.session.get(url, stream=True, timeout=30, allow_redirects=True, headers=headers)
+        self.metrics.inc('http_responses_total', method='GET', status=response.status_code)
+        return response
+    
+    def _copy_body(self, response: requests.Response, file, digest: _CountingHash, total_size: int) -> None:
+        """
+        Copia o corpo da resposta para o arquivo (aberto sem buffer), a partir da posição atual.
+        
+        Sem Content-Encoding, o corpo é lido com readinto em um buffer reutilizado
+        (um por thread) e cada fatia é gravada e entra no hash como memoryview:
+        uma leitura e uma escrita por `buffer_size` bytes, em vez de um objeto
+        bytes e um write por bloco pequeno. Respostas compactadas passam pelo
+        iter_content, que decodifica o conteúdo.
+        """
+        received = file.tell()
+        encoding = response.headers.get('content-encoding', 'identity').strip().lower()
+        try:
+            if encoding not in ('', 'identity') or not hasattr(response.raw, 'readinto'):
+                for chunk in response.iter_content(chunk_size=self.buffer_size):
+                    if chunk:
+                        self._write_all(file, chunk)
+                        digest.update(chunk)
+                        received += len(chunk)
+                        self.logger.progress(received, total_size)
+                return
+            
+            buffer = self._buffer()
+            while True:
+                count = response.raw.readinto(buffer)
+                if not count:
+                    break
+                view = buffer[:count]
+                self._write_all(file, view)
+                digest.update(view)
+                received += count
+                # Mostrar progresso (limitado por tempo no logger)
+                self.logger.progress(received, total_size)
+        except Urllib3Error as e:
+            # Leitura direta do urllib3: mesma exceção que o iter_content levantaria
+            raise requests.exceptions.ConnectionError(e) from e
+    
+    def _buffer(self) -> memoryview:
+        """Buffer de leitura da thread atual (criado uma vez por thread)."""
+        buffer = getattr(self._buffers, 'view', None)
+        if buffer is None or len(buffer) != self.buffer_size:
+            buffer = memoryview(bytearray(self.buffer_size))
+            self._buffers.view = buffer
+        return buffer
+    
+    @staticmethod
+    def _write_all(file, data) -> None:
+        """Grava todos os bytes em um arquivo sem buffer (write pode ser parcial)."""
+        view = memoryview(data)
+        while view:
+            view = view[file.write(view):]
+    
+    def _record_transfer(self, start: float, received: int) -> None:
+        """Registra a etapa `transfer` (corpo da resposta) e os bytes recebidos."""
+        self.metrics.record_span('transfer', time.perf_counter() - start)
+        self.metrics.inc('bytes_downloaded_total', received)
+    
+    def _write_at(self, fd: int, data: bytes, position: int, write_lock: threading.Lock) -> None:
+        """Grava dados em uma posição do arquivo (pwrite quando disponível)."""
+        if hasattr(os, 'pwrite'):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, position)
+                view = view[written:]
+                position += written
+        else:
+            with write_lock:
+                os.lseek(fd, position, os.SEEK_SET)
+                os.write(fd, data)
+    
+    def _preallocate(self, fd: int, size: int) -> None:
+        """Reserva o espaço do arquivo de destino antecipadamente."""
+        preallocate(fd, size)
+    
+    @staticmethod
+    def _accepts_ranges(response: requests.Response) -> bool:
+        """Verifica se o servidor aceita requisições parciais em bytes."""
+        return response.headers.get('accept-ranges', '').lower() == 'bytes'
+    
+    @staticmethod
+    def _get_validator(response: requests.Response) -> Optional[str]:
+        """Retorna o validador forte da resposta para uso em If-Range (ETag ou Last-Modified)."""
+        etag = response.headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return response.headers.get('last-modified')
+    
+    @staticmethod
+    def _parse_content_range(content_range: str) -> tuple[int, int]:
+        """
+        Interpreta o cabeçalho Content-Range ("bytes início-fim/total").
+        
+        Returns:
+            tuple: (início, total); total é 0 se desconhecido e início é -1 se inválido
+        """
+        try:
+            unit, _, spec = content_range.partition(' ')
+            byte_range, _, total = spec.partition('/')
+            start = int(byte_range.split('-')[0])
+            if unit.lower() != 'bytes':
+                return -1, 0
+            return start, int(total) if total.isdigit() else 0
+        except ValueError:
+            return -1, 0
+    
+    @staticmethod
+    def _hash_part(part_path: str, length: int) -> _CountingHash:
+        """SHA-256 dos primeiros `length` bytes de um arquivo parcial."""
+        digest = _CountingHash()
+        remaining = length
+        with open(part_path, 'rb') as file:
+            while remaining > 0:
+                chunk = file.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest
+    
+    @staticmethod
+    def _remove_part(part_path: str) -> None:
+        """Remove arquivo parcial descartado."""
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
\ No newline at end of file
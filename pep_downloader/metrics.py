@@ -0,0 +1,212 @@
+"""
+Instrumentação do bot: etapas cronometradas (spans), contadores, gauges e
+histogramas, com exportação em JSON e no formato texto do Prometheus.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Limites dos buckets (segundos) do histograma de duração das etapas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Descrições exportadas no # HELP do Prometheus
+METRIC_HELP = {
+    'stage_duration_seconds': "Duração das etapas (probe, head, ttfb, transfer, hash, verify, extract, parse, throttle)",
+    'http_responses_total': "Respostas HTTP por método e status",
+    'http_retries_total': "Novas tentativas de requisições HTTP",
+    'http_throttled_total': "Respostas que indicaram sobrecarga ou limite do servidor (429, 5xx, 403 em GET, erros)",
+    'concurrency_limit': "Janela atual de requisições simultâneas (AIMD)",
+    'circuit_breaker_trips_total': "Aberturas do circuito após falhas seguidas do servidor",
+    'bytes_downloaded_total': "Bytes recebidos nos downloads",
+    'files_total': "Arquivos processados por resultado",
+    'watch_checks_total': "Verificações do modo watch por resultado",
+    'probe_cache_total': "Meses resolvidos pelo cache de verificações (hit) ou no servidor (miss)",
+    'download_throughput_bytes_per_second': "Taxa do último download concluído",
+    'last_run_timestamp_seconds': "Horário de término da última execução (epoch)",
+    'last_run_duration_seconds': "Duração da última execução",
+    'last_run_success': "1 se a última execução terminou com sucesso",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Histograma cumulativo com limites fixos (semântica do Prometheus)."""
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+    
+    def to_dict(self) -> dict:
+        return {
+            'buckets': dict(zip((str(bound) for bound in self.buckets), self.counts)),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class Metrics:
+    """
+    Registro de métricas de uma execução, compartilhado entre threads.
+    
+    As etapas são medidas com `span` (ou `record_span`): cada uma entra no
+    histograma `stage_duration_seconds` e na lista de spans (início relativo e
+    duração), que mostra onde o tempo foi gasto.
+    """
+    
+    PREFIX = "pep"
+    MAX_SPANS = 10_000
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self.spans: deque = deque(maxlen=self.MAX_SPANS)
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+    
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """Cronometra o bloco como uma etapa (registrada mesmo se houver exceção)."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(stage, time.perf_counter() - start_time, **labels)
+    
+    def record_span(self, stage: str, duration: float, **labels) -> None:
+        """Registra uma etapa já medida (duração em segundos)."""
+        with self._lock:
+            self.spans.append({
+                'stage': stage,
+                'labels': {name: str(value) for name, value in labels.items()},
+                'start': round(time.time() - duration - self._started, 6),
+                'duration': round(duration, 6),
+            })
+        self.observe('stage_duration_seconds', duration, stage=stage, **labels)
+    
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Incrementa um contador."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Define o valor atual de um gauge."""
+        with self._lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+    
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        """Registra uma observação em um histograma."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+    
+    def counter_value(self, name: str, **labels) -> float:
+        """Valor atual de um contador (0 se ainda não incrementado)."""
+        with self._lock:
+            return self.counters.get(name, {}).get(_label_key(labels), 0)
+    
+    def stage_totals(self) -> Dict[str, float]:
+        """Tempo total por etapa (segundos), do maior para o menor."""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for key, histogram in self.histograms.get('stage_duration_seconds', {}).items():
+                stage = dict(key)['stage']
+                totals[stage] = totals.get(stage, 0.0) + histogram.sum
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+    
+    def to_dict(self) -> dict:
+        """Estado completo em estruturas serializáveis em JSON."""
+        def series(values: Dict[str, Dict[LabelKey, object]], convert) -> Dict[str, List[dict]]:
+            return {
+                name: [{'labels': dict(key), 'value': convert(value)} for key, value in entries.items()]
+                for name, entries in values.items()
+            }
+        
+        with self._lock:
+            return {
+                'started_at': self._started,
+                'spans': list(self.spans),
+                'counters': series(self.counters, lambda value: value),
+                'gauges': series(self.gauges, lambda value: value),
+                'histograms': series(self.histograms, lambda value: value.to_dict()),
+            }
+    
+    def to_prometheus(self) -> str:
+        """Métricas no formato texto do Prometheus (nomes com o prefixo `pep_`)."""
+        lines: List[str] = []
+        
+        def header(name: str, metric_type: str) -> str:
+            full_name = f"{self.PREFIX}_{name}"
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {full_name} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            return full_name
+        
+        with self._lock:
+            for metric_type, values in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted(values):
+                    full_name = header(name, metric_type)
+                    for key, value in sorted(values[name].items()):
+                        lines.append(f"{full_name}{_format_labels(key)} {_format_value(value)}")
+            
+            for name in sorted(self.histograms):
+                full_name = header(name, 'histogram')
+                for key, histogram in sorted(self.histograms[name].items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{full_name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {count}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {histogram.count}")
+        
+        return '\n'.join(lines) + '\n'
+    
+    def write_json(self, path: str) -> None:
+        """Grava as métricas em JSON (gravação atômica)."""
+        self._write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+    
+    def write_prometheus(self, path: str) -> None:
+        """Grava as métricas para o textfile collector do node_exporter (gravação atômica)."""
+        self._write_atomic(path, self.to_prometheus())
+    
+    @staticmethod
+    def _write_atomic(path: str, content: str) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, path)
\ No newline at end of file
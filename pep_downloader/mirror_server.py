@@ -0,0 +1,258 @@
+"""
+Modo espelho: serve o diretório de download por HTTP para outros bots da rede.
+"""
+import os
+import re
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple, Optional, Tuple
+from .console_logger import ConsoleLogger
+from .download_manifest import DownloadManifest
+
+
+class MirroredFile(NamedTuple):
+    """Arquivo servido pelo espelho (aberto) com seus validadores."""
+    file: object
+    size: int
+    etag: str
+    last_modified: str
+    modified_ts: float
+
+
+class _MirrorHandler(BaseHTTPRequestHandler):
+    """Atende HEAD/GET de <prefixo>/AAAAMM com Range, If-Range e requisições condicionais."""
+    
+    protocol_version = "HTTP/1.1"
+    server_version = "PEPMirror"
+    
+    def do_HEAD(self):
+        self._serve(send_body=False)
+    
+    def do_GET(self):
+        self._serve(send_body=True)
+    
+    def log_message(self, format, *args):
+        self.server.mirror.logger.debug("Espelho %s - " + format, self.address_string(), *args)
+    
+    def _serve(self, send_body: bool):
+        mirror = self.server.mirror
+        match = mirror.PATH_PATTERN.match(self.path.split('?')[0])
+        mirrored = mirror.open_month(match.group(1)) if match else None
+        if mirrored is None:
+            self._send_empty(404)
+            return
+        
+        with mirrored.file as file:
+            if self._not_modified(mirrored):
+                self._send_empty(304, mirrored)
+                return
+            
+            start, end, status = 0, mirrored.size - 1, 200
+            byte_range = self._requested_range(mirrored)
+            if byte_range == ():
+                self._send_empty(416, extra={'Content-Range': f"bytes */{mirrored.size}"})
+                return
+            if byte_range:
+                start, end = byte_range
+                status = 206
+            
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/zip')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('ETag', mirrored.etag)
+            self.send_header('Last-Modified', mirrored.last_modified)
+            self.send_header('Accept-Ranges', 'bytes')
+            if status == 206:
+                self.send_header('Content-Range', f"bytes {start}-{end}/{mirrored.size}")
+            self.end_headers()
+            
+            if send_body and end >= start:
+                # sendfile: o conteúdo vai do cache de páginas para o socket sem passar pelo Python
+                self.wfile.flush()
+                try:
+                    self.connection.sendfile(file, offset=start, count=end - start + 1)
+                except OSError:
+                    self.close_connection = True  # cliente desconectou no meio da transferência
+    
+    def _not_modified(self, mirrored: MirroredFile) -> bool:
+        """If-None-Match (prioritário) ou If-Modified-Since da cópia do cliente."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or mirrored.etag in tags or f"W/{mirrored.etag}" in tags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(mirrored.modified_ts) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def _requested_range(self, mirrored: MirroredFile):
+        """
+        Intervalo pedido em Range (um único intervalo), respeitando If-Range.
+        
+        Returns:
+            (início, fim) inclusivo; None para o arquivo inteiro; () se não satisfatível
+        """
+        range_header = self.headers.get('Range', '')
+        if not range_header.startswith('bytes=') or ',' in range_header:
+            return None
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range not in (mirrored.etag, mirrored.last_modified):
+            return None  # cópia parcial do cliente é de outra versão: envia o arquivo inteiro
+        
+        first, _, last = range_header[len('bytes='):].strip().partition('-')
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else mirrored.size - 1
+            else:
+                start, end = max(0, mirrored.size - int(last)), mirrored.size - 1
+        except ValueError:
+            return None
+        if start >= mirrored.size or end < start:
+            return ()
+        return start, min(end, mirrored.size - 1)
+    
+    def _send_empty(self, status: int, mirrored: Optional[MirroredFile] = None, extra: Optional[dict] = None):
+        self.send_response(status)
+        if mirrored is not None:
+            self.send_header('ETag', mirrored.etag)
+            self.send_header('Last-Modified', mirrored.last_modified)
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class _MirrorHTTPServer(ThreadingHTTPServer):
+    """Servidor com threads daemon que não registra conexões encerradas pelo cliente."""
+    
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        self.mirror.logger.debug("Conexão encerrada pelo cliente %s", client_address[0])
+
+
+class MirrorServer:
+    """
+    Serve os arquivos mensais do diretório de download para outros bots.
+    
+    O endereço imita o do portal: <url>/AAAAMM responde com o AAAAMM_PEP.zip
+    local (ou 404), com suporte a Range/If-Range e a requisições condicionais
+    (If-None-Match/If-Modified-Since). ETag e Last-Modified são os do portal,
+    registrados no manifesto: a cópia baixada do espelho continua válida para
+    as requisições condicionais feitas ao portal, e vice-versa.
+    
+    Os outros nós usam `url` como espelho (--mirror) e recorrem ao portal
+    quando o espelho não tem o mês. Só arquivos completos são servidos: os
+    downloads em andamento ficam em .part até o rename final.
+    """
+    
+    PATH_PREFIX = "/pep"
+    PATH_PATTERN = re.compile(r'^/pep/(\d{6})(?:_PEP\.zip)?$')
+    DEFAULT_PORT = 8080
+    
+    def __init__(self, download_dir: str = "downloads", host: str = "0.0.0.0",
+                 port: int = DEFAULT_PORT, logger: Optional[ConsoleLogger] = None):
+        """
+        Args:
+            download_dir: Diretório com os arquivos e o manifesto a servir
+            host: Endereço de escuta (0.0.0.0 = todas as interfaces)
+            port: Porta de escuta (0 = escolhida pelo sistema)
+            logger: Logger para mensagens
+        """
+        self.download_dir = download_dir
+        self.logger = logger or ConsoleLogger()
+        self._manifest: Optional[DownloadManifest] = None
+        self._manifest_mtime = None
+        self._manifest_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._httpd = _MirrorHTTPServer((host, port), _MirrorHandler)
+        self._httpd.mirror = self
+    
+    @property
+    def url(self) -> str:
+        """URL base a configurar nos outros bots (--mirror)."""
+        host, port = self._httpd.server_address[:2]
+        if host in ("0.0.0.0", ""):
+            host = "127.0.0.1"
+        return f"http://{host}:{port}{self.PATH_PREFIX}"
+    
+    def start(self) -> "MirrorServer":
+        """Atende em uma thread em segundo plano (ex: junto com o modo watch)."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="pep-mirror", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Espelho servindo {self.download_dir} em {self.url}")
+        return self
+    
+    def serve_forever(self) -> None:
+        """Atende na thread atual até stop() ou Ctrl+C."""
+        self.logger.info(f"Espelho servindo {self.download_dir} em {self.url}")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+            self.logger.info("Espelho encerrado")
+    
+    def stop(self) -> None:
+        """Encerra o servidor (e a thread de segundo plano, se houver)."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def open_month(self, year_month: str) -> Optional[MirroredFile]:
+        """
+        Abre o arquivo do mês, se houver, com os validadores a anunciar.
+        
+        Returns:
+            MirroredFile: Arquivo aberto (o chamador fecha), ou None se ausente
+        """
+        filename = f"{year_month}_PEP.zip"
+        try:
+            file = open(os.path.join(self.download_dir, filename), 'rb')
+        except OSError:
+            return None
+        
+        stat = os.fstat(file.fileno())
+        entry = self._manifest_entry(filename)
+        if entry is not None and entry.size == stat.st_size and entry.etag:
+            etag = entry.etag
+        else:
+            # Sem registro do portal (ou registro de outra versão): validador local
+            etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = (entry.last_modified if entry is not None and entry.size == stat.st_size
+                         and entry.last_modified else formatdate(stat.st_mtime, usegmt=True))
+        try:
+            modified_ts = parsedate_to_datetime(last_modified).timestamp()
+        except (TypeError, ValueError):
+            modified_ts = stat.st_mtime
+        return MirroredFile(file, stat.st_size, etag, last_modified, modified_ts)
+    
+    def _manifest_entry(self, filename: str):
+        """Registro do manifesto, recarregado quando o arquivo do manifesto muda (ex: outro processo)."""
+        manifest_path = os.path.join(self.download_dir, DownloadManifest.MANIFEST_FILENAME)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._manifest_lock:
+            if self._manifest is None or mtime != self._manifest_mtime:
+                self._manifest = DownloadManifest(self.download_dir, self.logger)
+                self._manifest_mtime = mtime
+            manifest = self._manifest
+        return manifest.get(filename)
+    
+    @classmethod
+    def parse_address(cls, value: str) -> Tuple[str, int]:
+        """Converte "PORTA" ou "HOST:PORTA" em (host, porta)."""
+        host, _, port = value.rpartition(':')
+        return host or "0.0.0.0", int(port or cls.DEFAULT_PORT)
\ No newline at end of file
@@ -1,8 +1,9 @@
 """
 Modelos de dados para o PEP Downloader Bot.
 """
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -14,9 +15,13 @@ class DownloadResult:
     file_size: int
     download_time: float
     error_message: Optional[str] = None
+    skipped: bool = False
+    sha256: Optional[str] = None
     
     def __str__(self) -> str:
-        if self.success:
+        if self.success and self.skipped:
+            return f"Download ignorado (já existe): {self.filename} ({self.file_size / (1024*1024):.2f} MB)"
+        elif self.success:
             return f"Download bem-sucedido: {self.filename} ({self.file_size / (1024*1024):.2f} MB em {self.download_time:.1f}s)"
         else:
             return f"Download falhou: {self.filename} - {self.error_message}"
@@ -29,9 +34,280 @@ class ExtractionResult:
     extracted_files: List[str]
     extraction_path: str
     error_message: Optional[str] = None
+    file_sizes: Dict[str, int] = field(default_factory=dict)
+    extraction_time: float = 0.0
+    
+    @property
+    def total_size(self) -> int:
+        return sum(self.file_sizes.values())
     
     def __str__(self) -> str:
         if self.success:
             return f"Extração bem-sucedida: {len(self.extracted_files)} arquivos em {self.extraction_path}"
         else:
-            return f"Extração falhou: {self.error_message}"
\ No newline at end of file
+            return f"Extração falhou: {self.error_message}"
+
+
+@dataclass
+class TransferResult:
+    """Resultado de uma transferência HTTP (HTTPClient.download)."""
+    success: bool
+    not_modified: bool = False
+    file_size: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    final_url: Optional[str] = None
+    error_message: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+@dataclass
+class ManifestEntry:
+    """Registro de um arquivo baixado no manifesto do diretório de download."""
+    url: str
+    size: int
+    sha256: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+@dataclass
+class ProbeCacheEntry:
+    """Resultado de verificação de um mês guardado no cache de disponibilidade."""
+    available: bool
+    status_code: Optional[int]
+    checked_at: float
+    expires_at: Optional[float] = None  # None = permanente (mês publicado)
+    
+    def is_fresh(self, now: float) -> bool:
+        """Indica se o resultado ainda pode ser usado sem nova requisição."""
+        return self.expires_at is None or now < self.expires_at
+
+
+@dataclass
+class BackfillResult:
+    """Resultado de um download de vários meses (backfill)."""
+    results: List[Tuple[DownloadResult, Optional[ExtractionResult]]]
+    total_time: float
+    
+    @property
+    def downloaded_bytes(self) -> int:
+        """Bytes efetivamente transferidos (ignora arquivos já existentes)."""
+        return sum(d.file_size for d, _ in self.results if d.success and not d.skipped)
+    
+    @property
+    def succeeded(self) -> List[DownloadResult]:
+        return [d for d, _ in self.results if d.success]
+    
+    @property
+    def failed(self) -> List[DownloadResult]:
+        return [d for d, _ in self.results if not d.success]
+    
+    @property
+    def skipped(self) -> List[DownloadResult]:
+        return [d for d, _ in self.results if d.success and d.skipped]
+    
+    @property
+    def extraction_failed(self) -> List[ExtractionResult]:
+        return [e for _, e in self.results if e is not None and not e.success]
+    
+    @property
+    def throughput_mb_s(self) -> float:
+        """Vazão agregada de download em MB/s."""
+        if self.total_time <= 0:
+            return 0.0
+        return self.downloaded_bytes / (1024*1024) / self.total_time
+    
+    def __str__(self) -> str:
+        return (f"Backfill: {len(self.succeeded)}/{len(self.results)} meses OK "
+                f"({len(self.skipped)} já existentes, {len(self.failed)} falhas), "
+                f"{self.downloaded_bytes / (1024*1024):.2f} MB em {self.total_time:.1f}s "
+                f"({self.throughput_mb_s:.2f} MB/s)")
+
+
+@dataclass
+class Resolution:
+    """
+    Destino de um arquivo resolvido pelo HEAD da verificação, reutilizado no
+    download para ir direto ao GET na URL final (sem outro HEAD nem a cadeia
+    de redirecionamentos).
+    """
+    url: str
+    final_url: str
+    content_length: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    accept_ranges: bool = False
+    
+    @property
+    def validator(self) -> Optional[str]:
+        """Validador forte para If-Range (ETag não fraco ou Last-Modified)."""
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+    
+    def is_unchanged(self, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """Indica se a versão resolvida é a mesma da cópia local (ETag ou, sem ele, Last-Modified)."""
+        if self.etag and etag:
+            return self.etag == etag
+        if self.last_modified and last_modified:
+            return self.last_modified == last_modified
+        return False
+
+
+@dataclass
+class MonthProbe:
+    """Resultado da verificação de disponibilidade de um mês."""
+    year_month: str
+    url: str
+    available: bool
+    status_code: Optional[int] = None
+    error_message: Optional[str] = None
+    resolution: Optional[Resolution] = None
+    cached: bool = False  # resultado vindo do cache de disponibilidade (sem requisição)
+    
+    @property
+    def filename(self) -> str:
+        return f"{self.year_month}_PEP.zip"
+
+
+@dataclass
+class ProbeResult:
+    """Resultado de uma verificação de vários meses (modo 'latest' ou 'all')."""
+    mode: str
+    probes: List[MonthProbe]
+    probe_time: float
+    
+    @property
+    def available_files(self) -> List[str]:
+        """Arquivos disponíveis, do mais recente para o mais antigo."""
+        return [probe.filename for probe in self.probes if probe.available]
+    
+    @property
+    def latest(self) -> Optional[MonthProbe]:
+        """Mês mais recente disponível ou None."""
+        for probe in self.probes:
+            if probe.available:
+                return probe
+        return None
+    
+    def __str__(self) -> str:
+        return f"Verificação ({self.mode}): {len(self.available_files)}/{len(self.probes)} meses disponíveis em {self.probe_time:.1f}s"
+
+
+@dataclass
+class PEPRecord:
+    """Registro de uma Pessoa Exposta Politicamente (uma linha do CSV do portal)."""
+    __slots__ = ('cpf', 'nome', 'sigla_funcao', 'descricao_funcao', 'nivel_funcao',
+                 'orgao', 'data_inicio', 'data_fim', 'data_carencia')
+    
+    cpf: str
+    nome: str
+    sigla_funcao: str
+    descricao_funcao: str
+    nivel_funcao: str
+    orgao: str
+    data_inicio: Optional[date]
+    data_fim: Optional[date]
+    data_carencia: Optional[date]
+
+
+@dataclass
+class ScreeningMatch:
+    """Ocorrência da lista PEP encontrada para um nome consultado."""
+    query: str
+    score: float
+    cpf: str
+    nome: str
+    funcao: str
+    orgao: str
+    
+    def __str__(self) -> str:
+        return f"{self.query} -> {self.nome} ({self.cpf}, {self.funcao}, {self.orgao}) [{self.score:.2f}]"
+
+
+@dataclass
+class RecordChange:
+    """Diferença de um registro PEP entre dois snapshots mensais."""
+    change: str                          # 'inserted', 'removed' ou 'modified'
+    before: Optional[PEPRecord]
+    after: Optional[PEPRecord]
+    changed_fields: List[str] = field(default_factory=list)
+    
+    @property
+    def record(self) -> PEPRecord:
+        """Registro mais recente (o anterior, se removido)."""
+        return self.after if self.after is not None else self.before
+
+
+@dataclass
+class DiffResult:
+    """Resultado da comparação entre dois snapshots mensais."""
+    month_a: str
+    month_b: str
+    inserted: int = 0
+    removed: int = 0
+    modified: int = 0
+    unchanged: int = 0
+    output_path: Optional[str] = None
+    diff_time: float = 0.0
+    error_message: Optional[str] = None
+    
+    @property
+    def success(self) -> bool:
+        return self.error_message is None
+    
+    @property
+    def total_changes(self) -> int:
+        return self.inserted + self.removed + self.modified
+    
+    def __str__(self) -> str:
+        if not self.success:
+            return f"Diff falhou: {self.month_a} -> {self.month_b} - {self.error_message}"
+        return (f"Diff {self.month_a} -> {self.month_b}: {self.inserted} incluídos, "
+                f"{self.removed} removidos, {self.modified} alterados ({self.unchanged} sem alteração)")
+
+
+@dataclass
+class LoadResult:
+    """Resultado da carga de um snapshot no banco SQLite."""
+    success: bool
+    year_month: str
+    rows: int
+    load_time: float
+    incremental: bool = False
+    error_message: Optional[str] = None
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.load_time if self.load_time > 0 else 0.0
+    
+    def __str__(self) -> str:
+        if self.success:
+            mode = "incremental" if self.incremental else "inicial"
+            return (f"Carga SQLite ({mode}) de {self.year_month}: {self.rows} registros em "
+                    f"{self.load_time:.1f}s ({self.rows_per_second:,.0f} linhas/s)")
+        else:
+            return f"Carga SQLite falhou: {self.year_month} - {self.error_message}"
+
+
+@dataclass
+class WatchStatus:
+    """Estado do modo watch, gravado no arquivo de status a cada verificação."""
+    state: str
+    pid: int
+    started_at: str
+    updated_at: str
+    expected_month: Optional[str] = None
+    latest_month: Optional[str] = None
+    checks: int = 0
+    last_check_at: Optional[str] = None
+    last_check_result: Optional[str] = None
+    next_check_at: Optional[str] = None
+    consecutive_errors: int = 0
+    last_error: Optional[str] = None
+    last_download_at: Optional[str] = None
+    last_download_file: Optional[str] = None
+    healthy: bool = True
+    publication_days: List[int] = field(default_factory=list)
\ No newline at end of file
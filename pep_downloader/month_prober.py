@@ -0,0 +1,246 @@
+"""
+Verificação concorrente de disponibilidade dos arquivos PEP mensais.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .async_http_client import AsyncHTTPClient
+from .console_logger import ConsoleLogger
+from .http_client import HTTPClient
+from .models import MonthProbe, ProbeResult, Resolution
+from .probe_cache import ProbeCache
+from .rate_limiter import RateLimiter
+
+
+class MonthProber:
+    """
+    Verifica vários meses em paralelo usando um pool de threads limitado.
+    
+    Com um ProbeCache, os meses com resultado ainda válido no cache não são
+    verificados de novo e os novos resultados são gravados nele.
+    """
+    
+    MODE_LATEST = "latest"
+    MODE_ALL = "all"
+    
+    def __init__(self,
+                 http_client: HTTPClient,
+                 base_url: str,
+                 logger: Optional[ConsoleLogger] = None,
+                 max_workers: int = 6,
+                 timeout: int = 10,
+                 cache: Optional[ProbeCache] = None,
+                 refresh: bool = False):
+        """
+        Inicializa o verificador.
+        
+        Args:
+            http_client: Cliente HTTP cuja sessão (e pool de conexões) será usada
+            base_url: URL base do portal (sem o AAAAMM)
+            logger: Logger para mensagens
+            max_workers: Número máximo de verificações simultâneas
+            timeout: Timeout de cada requisição HEAD em segundos
+            cache: Cache persistente de disponibilidade (None = sempre verificar)
+            refresh: Ignorar o cache na leitura (os resultados novos ainda são gravados)
+        """
+        self.http_client = http_client
+        self.base_url = base_url
+        self.logger = logger or ConsoleLogger()
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.cache = cache
+        self.refresh = refresh
+    
+    def probe(self, months: List[str], mode: str = MODE_LATEST, refresh: Optional[bool] = None) -> ProbeResult:
+        """
+        Verifica a disponibilidade dos meses informados.
+        
+        No modo 'latest' retorna assim que o mês disponível mais recente é
+        conhecido (todos os meses mais novos já responderam) e cancela as
+        verificações mais antigas ainda pendentes. No modo 'all' aguarda todos.
+        
+        Args:
+            months: Meses no formato AAAAMM, do mais recente para o mais antigo
+            mode: MODE_LATEST ou MODE_ALL
+            refresh: Ignorar o cache na leitura (padrão: o `refresh` do verificador)
+        
+        Returns:
+            ProbeResult: Resultados na mesma ordem dos meses informados
+        """
+        if mode not in (self.MODE_LATEST, self.MODE_ALL):
+            raise ValueError(f"Modo de verificação inválido: {mode}")
+        
+        start_time = time.time()
+        months, cached = self._cached_probes(months, mode, refresh)
+        pending = [year_month for year_month in months if year_month not in cached]
+        probes = []
+        
+        if pending:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(pending)),
+                thread_name_prefix="pep-probe"
+            )
+            try:
+                futures = [executor.submit(self._probe_month, year_month) for year_month in pending]
+                
+                # Resultados consumidos em ordem: ao chegar no mês i, todos os mais novos já resolveram
+                for future in futures:
+                    probe = future.result()
+                    probes.append(probe)
+                    if probe.available and mode == self.MODE_LATEST:
+                        break
+            finally:
+                # Verificações mais antigas ainda na fila são descartadas
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        probes = self._merge(months, mode, cached, probes)
+        probe_time = time.time() - start_time
+        self.http_client.metrics.record_span('probe', probe_time)
+        return ProbeResult(mode=mode, probes=probes, probe_time=probe_time)
+    
+    async def probe_async(self, async_client: AsyncHTTPClient, months: List[str],
+                          mode: str = MODE_LATEST, refresh: Optional[bool] = None) -> ProbeResult:
+        """
+        Variante assíncrona de probe: as verificações rodam como tarefas no
+        event loop, limitadas a max_workers simultâneas por um semáforo.
+        
+        Args:
+            async_client: Cliente assíncrono cuja sessão (e pool de conexões) será usada
+            months: Meses no formato AAAAMM, do mais recente para o mais antigo
+            mode: MODE_LATEST ou MODE_ALL
+            refresh: Ignorar o cache na leitura (padrão: o `refresh` do verificador)
+        
+        Returns:
+            ProbeResult: Resultados na mesma ordem dos meses informados
+        """
+        if mode not in (self.MODE_LATEST, self.MODE_ALL):
+            raise ValueError(f"Modo de verificação inválido: {mode}")
+        
+        start_time = time.time()
+        months, cached = self._cached_probes(months, mode, refresh)
+        pending = [year_month for year_month in months if year_month not in cached]
+        probes = []
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def bounded(year_month: str) -> MonthProbe:
+            async with semaphore:
+                return await self._probe_month_async(async_client, year_month)
+        
+        tasks = [asyncio.ensure_future(bounded(year_month)) for year_month in pending]
+        try:
+            # Mesma regra do modo síncrono: resultados consumidos em ordem
+            for task in tasks:
+                probe = await task
+                probes.append(probe)
+                if probe.available and mode == self.MODE_LATEST:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        probes = self._merge(months, mode, cached, probes)
+        probe_time = time.time() - start_time
+        async_client.metrics.record_span('probe', probe_time)
+        return ProbeResult(mode=mode, probes=probes, probe_time=probe_time)
+    
+    def _cached_probes(self, months: List[str], mode: str,
+                       refresh: Optional[bool]) -> Tuple[List[str], Dict[str, MonthProbe]]:
+        """
+        Separa os meses com resultado válido no cache.
+        
+        No modo 'latest', um mês disponível no cache encerra a lista: os meses
+        mais antigos não precisam ser verificados.
+        
+        Returns:
+            tuple: (meses a considerar, verificações vindas do cache por mês)
+        """
+        if self.cache is None or (self.refresh if refresh is None else refresh):
+            return months, {}
+        
+        cached = {}
+        for index, year_month in enumerate(months):
+            entry = self.cache.get(year_month)
+            if entry is None:
+                continue
+            cached[year_month] = MonthProbe(year_month, f"{self.base_url}/{year_month}", entry.available,
+                                            entry.status_code, cached=True)
+            if entry.available and mode == self.MODE_LATEST:
+                months = months[:index + 1]
+                break
+        
+        self.http_client.metrics.inc('probe_cache_total', len(cached), result='hit')
+        self.http_client.metrics.inc('probe_cache_total', len(months) - len(cached), result='miss')
+        if cached:
+            self.logger.debug(f"Cache de verificações: {len(cached)} de {len(months)} meses sem requisição")
+        return months, cached
+    
+    def _merge(self, months: List[str], mode: str, cached: Dict[str, MonthProbe],
+               fetched: List[MonthProbe]) -> List[MonthProbe]:
+        """Junta as verificações do cache e do servidor na ordem dos meses e grava as novas no cache."""
+        if self.cache is not None and fetched:
+            self.cache.store(fetched)
+        if not cached:
+            return fetched
+        
+        by_month = {probe.year_month: probe for probe in fetched}
+        by_month.update(cached)
+        probes = []
+        for year_month in months:
+            probe = by_month.get(year_month)
+            if probe is None:
+                break  # verificação cancelada: um mês mais novo já está disponível
+            probes.append(probe)
+            if probe.available and mode == self.MODE_LATEST:
+                break
+        return probes
+    
+    def _probe_month(self, year_month: str) -> MonthProbe:
+        """Executa a requisição HEAD para um único mês."""
+        url = f"{self.base_url}/{year_month}"
+        
+        try:
+            self.logger.debug("Verificando: %s", url)
+            # 429/503 já são reenviados pelo RateLimitedAdapter (Retry-After ou backoff)
+            response = self.http_client.head(url, timeout=self.timeout)
+            return self._month_probe(year_month, url, response.status_code, bool(response.history),
+                                     HTTPClient.resolution(url, response))
+        except Exception as e:
+            self.logger.debug("✗ Erro ao verificar %s_PEP.zip: %s", year_month, e)
+            return MonthProbe(year_month, url, False, error_message=str(e))
+    
+    async def _probe_month_async(self, async_client: AsyncHTTPClient, year_month: str) -> MonthProbe:
+        """Executa a requisição HEAD assíncrona para um único mês."""
+        url = f"{self.base_url}/{year_month}"
+        
+        try:
+            self.logger.debug("Verificando: %s", url)
+            # 429/503 já são reenviados pelo AsyncHTTPClient.head (Retry-After ou backoff)
+            response = await async_client.head(url, timeout=self.timeout)
+            return self._month_probe(year_month, url, response.status, response.redirected,
+                                     HTTPClient.resolution(url, response))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.debug("✗ Erro ao verificar %s_PEP.zip: %s", year_month, str(e) or type(e).__name__)
+            return MonthProbe(year_month, url, False, error_message=str(e) or type(e).__name__)
+    
+    def _month_probe(self, year_month: str, url: str, status_code: int, redirected: bool = False,
+                     resolution: Optional[Resolution] = None) -> MonthProbe:
+        """Interpreta o status da requisição HEAD de um mês (a resolução só é mantida se disponível)."""
+        filename = f"{year_month}_PEP.zip"
+        # Status 200 (OK) ou 302 (Redirect) indicam que o arquivo está disponível;
+        # 403 após o redirecionamento vem do armazenamento que recusa HEAD
+        if status_code in [200, 302] or (redirected and status_code == 403):
+            self.logger.debug("✓ Disponível: %s (Status: %s)", filename, status_code)
+            return MonthProbe(year_month, url, True, status_code, resolution=resolution)
+        
+        if status_code in RateLimiter.THROTTLE_STATUSES:
+            # Sem resposta conclusiva: erro (não vai para o cache nem conta como "não publicado")
+            self.logger.debug("✗ Servidor limitou a verificação de %s (Status: %s)", filename, status_code)
+            return MonthProbe(year_month, url, False, status_code,
+                              error_message=f"Servidor limitou as requisições ({status_code})")
+        
+        self.logger.debug("✗ Não disponível: %s (Status: %s)", filename, status_code)
+        return MonthProbe(year_month, url, False, status_code)
\ No newline at end of file
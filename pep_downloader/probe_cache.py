@@ -0,0 +1,152 @@
+"""
+Cache persistente de disponibilidade dos meses para o PEP Downloader Bot.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from .console_logger import ConsoleLogger
+from .date_generator import DateGenerator
+from .file_lock import FileLock
+from .models import MonthProbe, ProbeCacheEntry
+
+
+class ProbeCache:
+    """
+    Guarda o resultado das verificações HEAD por mês (AAAAMM) no diretório de download.
+    
+    Um mês publicado continua publicado: resultados positivos não expiram.
+    Um 404 vale por pouco tempo, de acordo com o atraso de publicação do
+    portal: o arquivo de um mês só sai depois que o mês termina, então a
+    ausência de um mês em andamento vale até o início do mês seguinte; para um
+    mês já encerrado (aguardando publicação), vale `negative_ttl`. Outros
+    status e erros de rede não são guardados.
+    
+    O cache é associado à URL base: apontar o bot para outro servidor descarta
+    os registros existentes. As gravações relêem o arquivo sob uma trava
+    (FileLock), preservando os registros de outros processos. Falhas de disco
+    (trava, leitura ou gravação) só geram um aviso: o cache nunca interrompe
+    o bot.
+    """
+    
+    CACHE_FILENAME = ".pep_probe_cache.json"
+    VERSION = 1
+    
+    # Validade de um 404 de mês já encerrado (a publicação pode sair a qualquer momento)
+    NEGATIVE_TTL = 60 * 60
+    
+    def __init__(self, download_dir: str = "downloads", base_url: str = "",
+                 logger: Optional[ConsoleLogger] = None, negative_ttl: float = NEGATIVE_TTL):
+        """
+        Args:
+            download_dir: Diretório onde o arquivo do cache é gravado
+            base_url: URL base verificada (registros de outra URL são ignorados)
+            logger: Logger para mensagens
+            negative_ttl: Segundos de validade de um 404 de mês já encerrado
+        """
+        self.download_dir = download_dir
+        self.cache_path = os.path.join(download_dir, self.CACHE_FILENAME)
+        self.base_url = base_url
+        self.logger = logger or ConsoleLogger()
+        self.negative_ttl = negative_ttl
+        self.date_generator = DateGenerator()
+        self._entries: Optional[Dict[str, ProbeCacheEntry]] = None
+        self._lock = threading.Lock()
+    
+    def get(self, year_month: str, now: Optional[float] = None) -> Optional[ProbeCacheEntry]:
+        """Retorna o registro do mês se ainda for válido, senão None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._load().get(year_month)
+        return entry if entry is not None and entry.is_fresh(now) else None
+    
+    def store(self, probes: Iterable[MonthProbe], now: Optional[float] = None) -> int:
+        """
+        Registra as verificações que podem ser guardadas e persiste o cache.
+        
+        Args:
+            probes: Verificações feitas no servidor
+            now: Horário da verificação (epoch; padrão: agora)
+        
+        Returns:
+            int: Quantidade de meses registrados
+        """
+        now = time.time() if now is None else now
+        entries = {}
+        for probe in probes:
+            if probe.cached or probe.error_message:
+                continue
+            if probe.available:
+                entries[probe.year_month] = ProbeCacheEntry(True, probe.status_code, now)
+            elif probe.status_code in (404, 410):
+                entries[probe.year_month] = ProbeCacheEntry(False, probe.status_code, now,
+                                                            self.negative_expiry(probe.year_month, now))
+        
+        if entries:
+            with self._lock:
+                try:
+                    with FileLock(self.cache_path, self.logger):
+                        self._entries = None
+                        self._load().update(entries)
+                        self._save()
+                except OSError as e:
+                    self._entries = None
+                    self.logger.warning(f"Não foi possível atualizar o cache de verificações: {str(e)}")
+        return len(entries)
+    
+    def forget(self, year_month: str) -> None:
+        """Remove o registro de um mês (ex: download de um mês "publicado" que falhou)."""
+        with self._lock:
+            try:
+                with FileLock(self.cache_path, self.logger):
+                    self._entries = None
+                    if self._load().pop(year_month, None) is not None:
+                        self._save()
+            except OSError as e:
+                self._entries = None
+                self.logger.warning(f"Não foi possível atualizar o cache de verificações: {str(e)}")
+    
+    def negative_expiry(self, year_month: str, now: float) -> float:
+        """Horário (epoch) até o qual um 404 do mês é considerado válido."""
+        next_month = self.date_generator.next_month(year_month)
+        month_end = self.date_generator.brasilia_tz.localize(
+            datetime(int(next_month[:4]), int(next_month[4:]), 1)).timestamp()
+        return max(now + self.negative_ttl, month_end)
+    
+    def _load(self) -> Dict[str, ProbeCacheEntry]:
+        """Carrega o cache do disco na primeira utilização."""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                if data.get('base_url') == self.base_url:
+                    for year_month, fields in data.get('months', {}).items():
+                        self._entries[year_month] = ProbeCacheEntry(**fields)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"Não foi possível ler o cache de verificações: {str(e)}")
+            except (ValueError, TypeError, AttributeError) as e:
+                self.logger.warning(f"Cache de verificações inválido ignorado ({self.cache_path}): {str(e)}")
+        return self._entries
+    
+    def _save(self) -> None:
+        """Persiste o cache de forma atômica (arquivo temporário + rename)."""
+        data = {
+            'version': self.VERSION,
+            'base_url': self.base_url,
+            'months': {year_month: asdict(entry) for year_month, entry in sorted(self._entries.items())}
+        }
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(self.download_dir, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            # O cache só evita requisições: falhar ao gravá-lo não interrompe o bot
+            self.logger.warning(f"Não foi possível gravar o cache de verificações: {str(e)}")
\ No newline at end of file
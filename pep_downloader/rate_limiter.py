@@ -0,0 +1,370 @@
+"""
+Controle de taxa e de concorrência das requisições ao portal.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .console_logger import ConsoleLogger
+from .metrics import Metrics
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Requisição recusada localmente: o circuito está aberto após falhas seguidas do servidor."""
+
+
+class _Slot:
+    """Vaga de concorrência ocupada por uma requisição (liberação idempotente)."""
+    
+    __slots__ = ('_limiter', '_released', '_trial')
+    
+    def __init__(self, limiter: "RateLimiter", trial: int = 0):
+        self._limiter = limiter
+        self._released = False
+        self._trial = trial  # identificador da requisição de teste do circuito (0 = comum)
+    
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release(self._trial)
+
+
+class RateLimiter:
+    """
+    Limita as requisições ao servidor, compartilhado entre threads e o cliente assíncrono.
+    
+    - Balde de tokens: taxa média de `rate` requisições/s com rajadas de até `burst`.
+    - Concorrência adaptativa (AIMD): a janela de requisições simultâneas cresce
+      1/janela a cada resposta normal e cai pela metade (no máximo uma vez por
+      DECREASE_INTERVAL) a cada sinal de sobrecarga: 429, 5xx, erro de conexão
+      ou 403 em GET (403 em HEAD é a recusa normal do armazenamento do portal).
+      A taxa efetiva acompanha a janela (rate * janela / max_concurrency).
+    - Retry-After: pausa todas as requisições pelo tempo pedido pelo servidor.
+      A cada sinal de sobrecarga o balde é esvaziado: após a pausa, as
+      requisições voltam no ritmo da taxa, sem a rajada acumulada.
+    - Circuit breaker: após `failure_threshold` falhas seguidas (5xx ou erro
+      de conexão; 429 é tratado pelo Retry-After e pela janela), as requisições
+      falham na hora (CircuitOpenError) por `reset_timeout` segundos; depois,
+      uma requisição de teste decide se o circuito fecha ou volta a abrir.
+    
+    Uma requisição ocupa sua vaga até o corpo da resposta ser lido ou fechado.
+    """
+    
+    DEFAULT_RATE = 5.0
+    DEFAULT_BURST = 5
+    
+    # Respostas que indicam limite de requisições ou sobrecarga do servidor
+    THROTTLE_STATUSES = (429, 503)
+    # Falhas do servidor que contam para o circuit breaker
+    FAILURE_STATUSES = (500, 502, 503, 504)
+    
+    # Backoff exponencial com jitter completo: uniforme em [0, min(CAP, BASE * 2^tentativa)]
+    BACKOFF_BASE = 1.0
+    BACKOFF_CAP = 60.0
+    
+    # Maior pausa aceita de um Retry-After
+    MAX_RETRY_AFTER = 300.0
+    
+    # Reenvios de um GET/HEAD que recebeu 429/503, antes de entregar a resposta a quem chamou
+    THROTTLE_RETRIES = 5
+    
+    # Intervalo mínimo entre reduções da janela (respostas de um mesmo episódio contam uma vez)
+    DECREASE_INTERVAL = 1.0
+    
+    # Intervalo de nova tentativa de vaga no cliente assíncrono
+    POLL_INTERVAL = 0.05
+    
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+    
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_concurrency: int = 10, min_concurrency: int = 1,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 logger: Optional[ConsoleLogger] = None, metrics: Optional[Metrics] = None):
+        """
+        Args:
+            rate: Requisições por segundo com a janela completa (0 = sem limite de taxa)
+            burst: Requisições que podem sair de uma vez após um período ocioso
+            max_concurrency: Maior janela de requisições simultâneas
+            min_concurrency: Menor janela após reduções
+            failure_threshold: Falhas seguidas que abrem o circuito
+            reset_timeout: Segundos com o circuito aberto antes da requisição de teste
+            logger: Logger para mensagens
+            metrics: Registro de métricas (espera, janela, respostas limitadas e aberturas do circuito)
+        """
+        self.rate = max(0.0, rate)
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.logger = logger or ConsoleLogger()
+        self.metrics = metrics or Metrics()
+        
+        self.concurrency = float(self.max_concurrency)
+        self.state = self.STATE_CLOSED
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_id = 0
+        self.metrics.set_gauge('concurrency_limit', self.max_concurrency)
+    
+    def acquire(self) -> _Slot:
+        """
+        Aguarda vaga, token e o fim de pausas (Retry-After) para uma requisição.
+        
+        Returns:
+            _Slot: Vaga a ser liberada com `release()` ao fim da requisição
+        
+        Raises:
+            CircuitOpenError: Circuito aberto
+        """
+        start_time = time.monotonic()
+        with self._cond:
+            # A requisição de teste não é verificada de novo: seria recusada pelo próprio teste
+            trial = self._check_circuit()
+            try:
+                while self._in_flight >= int(self.concurrency):
+                    self._cond.wait()
+                    if not trial:
+                        trial = self._check_circuit()
+            except BaseException:
+                self._end_trial(trial)
+                raise
+            self._in_flight += 1
+            delay = self._reserve(time.monotonic())
+        
+        slot = _Slot(self, trial)
+        try:
+            if delay > 0:
+                time.sleep(delay)
+        except BaseException:
+            slot.release()
+            raise
+        self._record_wait(time.monotonic() - start_time)
+        return slot
+    
+    async def acquire_async(self) -> _Slot:
+        """Variante de `acquire` para o event loop (aguarda sem bloquear a thread)."""
+        start_time = time.monotonic()
+        trial = 0
+        try:
+            while True:
+                with self._cond:
+                    if not trial:
+                        trial = self._check_circuit()
+                    if self._in_flight < int(self.concurrency):
+                        self._in_flight += 1
+                        delay = self._reserve(time.monotonic())
+                        break
+                await asyncio.sleep(self.POLL_INTERVAL)
+        except BaseException:
+            with self._cond:
+                self._end_trial(trial)
+            raise
+        
+        slot = _Slot(self, trial)
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            slot.release()
+            raise
+        self._record_wait(time.monotonic() - start_time)
+        return slot
+    
+    def record(self, status: Optional[int], retry_after: Optional[float] = None, method: str = 'GET') -> None:
+        """
+        Ajusta janela, pausa e circuito conforme a resposta recebida.
+        
+        Args:
+            status: Status HTTP da resposta (None = erro de conexão ou timeout)
+            retry_after: Segundos pedidos pelo servidor no Retry-After, se houver
+            method: Método da requisição (403 só indica bloqueio fora do HEAD)
+        """
+        now = time.monotonic()
+        failure = status is None or status in self.FAILURE_STATUSES
+        overloaded = failure or status == 429 or (status == 403 and method != 'HEAD')
+        
+        with self._cond:
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + min(retry_after, self.MAX_RETRY_AFTER))
+            
+            if overloaded:
+                self._tokens = min(self._tokens, 0.0)
+                if now - self._last_decrease >= self.DECREASE_INTERVAL:
+                    self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+                    self._last_decrease = now
+            else:
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            
+            if failure:
+                self._failures += 1
+                if self.state == self.STATE_HALF_OPEN or (self.state == self.STATE_CLOSED
+                                                         and self._failures >= self.failure_threshold):
+                    self._open(now)
+            else:
+                self._failures = 0
+                if self.state != self.STATE_CLOSED:
+                    self.state = self.STATE_CLOSED
+                    self.logger.info("Servidor respondendo normalmente, circuito fechado")
+            
+            if self.state != self.STATE_HALF_OPEN:
+                self._trial_in_flight = False
+            concurrency = self.concurrency
+            self._cond.notify_all()
+        
+        if overloaded:
+            self.metrics.inc('http_throttled_total', status=status or 'error')
+            self.logger.debug("Sobrecarga do servidor (%s): janela %.1f", status or 'erro de conexão', concurrency)
+        self.metrics.set_gauge('concurrency_limit', int(concurrency))
+    
+    def backoff(self, attempt: int) -> float:
+        """
+        Espera antes da nova tentativa `attempt + 1`: jitter completo, sem sair
+        antes do fim de uma pausa pedida pelo servidor ou do circuito aberto.
+        """
+        jitter = random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+        return max(jitter, self.blocked_for())
+    
+    def blocked_for(self) -> float:
+        """Segundos até o fim da pausa (Retry-After) ou do circuito aberto (0 se liberado)."""
+        now = time.monotonic()
+        with self._cond:
+            blocked = self._paused_until - now
+            if self.state == self.STATE_OPEN:
+                blocked = max(blocked, self._opened_at + self.reset_timeout - now)
+        return max(0.0, blocked)
+    
+    @staticmethod
+    def retry_after(headers) -> Optional[float]:
+        """Segundos pedidos no header Retry-After (número de segundos ou data HTTP), se houver."""
+        value = headers.get('retry-after') if headers is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    
+    def _check_circuit(self) -> int:
+        """
+        Recusa a requisição com o circuito aberto; após reset_timeout, libera uma de teste.
+        
+        Returns:
+            int: Identificador da requisição de teste, ou 0 para uma requisição comum
+        """
+        if self.state == self.STATE_CLOSED:
+            return 0
+        if self.state == self.STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.STATE_HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.STATE_HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            self._trial_id += 1
+            return self._trial_id
+        raise CircuitOpenError("Circuito aberto: servidor com falhas seguidas, aguardando para tentar novamente")
+    
+    def _open(self, now: float) -> None:
+        self.state = self.STATE_OPEN
+        self._opened_at = now
+        self.metrics.inc('circuit_breaker_trips_total')
+        self.logger.warning(f"{self._failures} falhas seguidas do servidor: circuito aberto por {self.reset_timeout:.0f}s")
+    
+    def _reserve(self, now: float) -> float:
+        """Reserva um token e retorna quanto a requisição deve esperar."""
+        paused = max(0.0, self._paused_until - now)
+        if self.rate <= 0:
+            return paused
+        
+        # Taxa efetiva proporcional à janela atual
+        rate = self.rate * self.concurrency / self.max_concurrency
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        self._tokens -= 1
+        return max(paused, -self._tokens / rate if self._tokens < 0 else 0.0)
+    
+    def _end_trial(self, trial: int) -> None:
+        """Libera o teste do circuito que terminou sem resposta registrada (ex: erro local ou cancelamento)."""
+        if trial and trial == self._trial_id and self.state == self.STATE_HALF_OPEN:
+            self._trial_in_flight = False
+    
+    def _release(self, trial: int = 0) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._end_trial(trial)
+            self._cond.notify_all()
+    
+    def _record_wait(self, waited: float) -> None:
+        if waited >= 0.001:
+            self.metrics.record_span('throttle', waited)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Adapter do requests que passa cada requisição da sessão (inclusive cada
+    redirecionamento) pelo RateLimiter e informa a resposta a ele.
+    
+    Um GET/HEAD que recebe 429/503 é reenviado aqui mesmo (até THROTTLE_RETRIES
+    vezes), após o Retry-After ou o backoff, sem consumir as tentativas do
+    download. Em respostas em stream, a vaga só é liberada quando a conexão
+    volta ao pool (corpo lido até o fim ou resposta fechada).
+    """
+    
+    def __init__(self, limiter: RateLimiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+    
+    def send(self, request, stream=False, **kwargs):
+        for attempt in range(self.limiter.THROTTLE_RETRIES + 1):
+            response = self._send(request, stream, **kwargs)
+            if (response.status_code not in RateLimiter.THROTTLE_STATUSES
+                    or request.method not in ('GET', 'HEAD') or attempt == self.limiter.THROTTLE_RETRIES):
+                return response
+            response.close()
+            time.sleep(self.limiter.backoff(attempt))
+    
+    def _send(self, request, stream, **kwargs):
+        slot = self.limiter.acquire()
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            slot.release()
+            self.limiter.record(None, method=request.method)
+            raise
+        except BaseException:
+            slot.release()
+            raise
+        
+        self.limiter.record(response.status_code, RateLimiter.retry_after(response.headers), request.method)
+        raw = response.raw
+        if stream and raw is not None and hasattr(raw, 'release_conn'):
+            release_conn = raw.release_conn
+            
+            def release():
+                slot.release()
+                release_conn()
+            
+            raw.release_conn = release
+            # Resposta descartada sem ser lida nem fechada
+            weakref.finalize(response, slot.release)
+        else:
+            slot.release()
+        return response
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Leitura em streaming dos registros PEP diretamente do arquivo ZIP.
+"""
+import csv
+import io
+import unicodedata
+import zipfile
+from datetime import date
+from typing import Dict, Iterable, Iterator, Optional
+from .console_logger import ConsoleLogger
+from .models import PEPRecord
+
+
+# Cabeçalho do CSV do portal (normalizado) -> campo de PEPRecord
+COLUMN_FIELDS = {
+    'CPF': 'cpf',
+    'NOME_PEP': 'nome',
+    'SIGLA_FUNCAO': 'sigla_funcao',
+    'DESCRICAO_FUNCAO': 'descricao_funcao',
+    'NIVEL_FUNCAO': 'nivel_funcao',
+    'NOME_ORGAO': 'orgao',
+    'DATA_INICIO_EXERCICIO': 'data_inicio',
+    'DATA_FIM_EXERCICIO': 'data_fim',
+    'DATA_FIM_CARENCIA': 'data_carencia',
+}
+
+# Colunas com poucos valores distintos: uma única instância de cada string
+CATEGORICAL_FIELDS = ('sigla_funcao', 'descricao_funcao', 'nivel_funcao', 'orgao')
+
+
+def normalize_header(name: str) -> str:
+    """Normaliza um nome de coluna ("Descrição_Função" -> "DESCRICAO_FUNCAO")."""
+    decomposed = unicodedata.normalize('NFKD', name.strip().strip('"').lstrip('\ufeff'))
+    ascii_name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ascii_name.upper().replace(' ', '_')
+
+
+def parse_date(value: str) -> Optional[date]:
+    """Converte "dd/mm/aaaa" em date; valores vazios ou inválidos viram None."""
+    if len(value) != 10 or value[2] != '/' or value[5] != '/':
+        return None
+    try:
+        return date(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+    except ValueError:
+        return None
+
+
+class RecordReader:
+    """Lê o CSV PEP (";" e Latin-1) de dentro do ZIP sem extraí-lo para o disco."""
+    
+    ENCODING = 'latin-1'
+    DELIMITER = ';'
+    
+    def __init__(self, logger: Optional[ConsoleLogger] = None, encoding: str = ENCODING):
+        self.logger = logger or ConsoleLogger()
+        self.encoding = encoding
+    
+    def iter_records(self, zip_path: str, member: Optional[str] = None) -> Iterator[PEPRecord]:
+        """
+        Percorre os registros do CSV dentro do ZIP, um por vez.
+        
+        O arquivo é descompactado e decodificado de forma incremental, então o
+        uso de memória não depende do tamanho do arquivo.
+        
+        Args:
+            zip_path: Caminho para o arquivo ZIP
+            member: Nome do CSV dentro do ZIP (padrão: primeiro .csv encontrado)
+        
+        Yields:
+            PEPRecord: Registros na ordem do arquivo
+        """
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            member_name = member or self.find_csv_member(zip_ref)
+            if member_name is None:
+                raise ValueError(f"Nenhum arquivo CSV encontrado em: {zip_path}")
+            
+            self.logger.debug(f"Lendo registros de {zip_path}:{member_name}")
+            with zip_ref.open(member_name, 'r') as raw_stream:
+                text_stream = io.TextIOWrapper(raw_stream, encoding=self.encoding, newline='')
+                yield from self.iter_csv_records(text_stream)
+    
+    def iter_csv_records(self, lines: Iterable[str]) -> Iterator[PEPRecord]:
+        """
+        Converte linhas de texto do CSV do portal (com cabeçalho) em registros.
+        
+        Args:
+            lines: Iterável de linhas já decodificadas (arquivo texto, gerador, ...)
+        
+        Yields:
+            PEPRecord: Registros na ordem das linhas
+        """
+        reader = csv.reader(lines, delimiter=self.DELIMITER, quotechar='"')
+        header = next(reader, None)
+        if header is None:
+            return
+        
+        positions = self._map_columns(header)
+        width = len(header)
+        interned: Dict[str, Dict[str, str]] = {field: {} for field in CATEGORICAL_FIELDS}
+        
+        def text(row, field):
+            index = positions.get(field)
+            return row[index].strip() if index is not None else ''
+        
+        def category(row, field):
+            value = text(row, field)
+            return interned[field].setdefault(value, value)
+        
+        for row in reader:
+            if len(row) < width:
+                if row:
+                    self.logger.debug("Linha ignorada (colunas insuficientes): %s", row)
+                continue
+            
+            yield PEPRecord(
+                cpf=text(row, 'cpf'),
+                nome=text(row, 'nome'),
+                sigla_funcao=category(row, 'sigla_funcao'),
+                descricao_funcao=category(row, 'descricao_funcao'),
+                nivel_funcao=category(row, 'nivel_funcao'),
+                orgao=category(row, 'orgao'),
+                data_inicio=parse_date(text(row, 'data_inicio')),
+                data_fim=parse_date(text(row, 'data_fim')),
+                data_carencia=parse_date(text(row, 'data_carencia'))
+            )
+    
+    def find_csv_member(self, zip_ref: zipfile.ZipFile) -> Optional[str]:
+        """Retorna o nome do primeiro arquivo .csv do ZIP."""
+        for name in zip_ref.namelist():
+            if name.lower().endswith('.csv'):
+                return name
+        return None
+    
+    def _map_columns(self, header: list) -> Dict[str, int]:
+        """Mapeia os campos de PEPRecord para as posições das colunas do cabeçalho."""
+        positions = {}
+        for index, name in enumerate(header):
+            field = COLUMN_FIELDS.get(normalize_header(name))
+            if field:
+                positions[field] = index
+        
+        missing = [column for column, field in COLUMN_FIELDS.items() if field not in positions]
+        if 'cpf' not in positions or 'nome' not in positions:
+            raise ValueError(f"Cabeçalho PEP não reconhecido: {header}")
+        if missing:
+            self.logger.warning(f"Colunas ausentes no CSV: {', '.join(missing)}")
+        
+        return positions
\ No newline at end of file
@@ -0,0 +1,499 @@
+"""
+Índice de triagem (screening) de nomes e CPFs contra a lista PEP.
+
+Layout do arquivo .idx (little-endian, seções alinhadas em 8 bytes):
+    
+    MAGIC (8 bytes) | tamanho do diretório (uint32) | diretório JSON | seções...
+
+Só dados: tabelas de strings (offsets uint64 + blob UTF-8), arrays numéricos
+e listas (offsets uint64 + valores). Tudo é validado na carga, já que o
+diretório de download pode ser compartilhado com outros processos e nós.
+"""
+import json
+import math
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from .models import PEPRecord, ScreeningMatch
+from .record_reader import RecordReader
+
+
+MAGIC = b'PEPIDX2\x00'
+
+# Campos de cada linha guardados no índice (cpf, nome, função, órgão)
+ROW_FIELDS = 4
+
+
+def normalize_name(name: str) -> str:
+    """Remove acentos e pontuação, aplica casefold e colapsa espaços."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    letters = [char if char.isalnum() else ' ' for char in decomposed if not unicodedata.combining(char)]
+    return ' '.join(''.join(letters).casefold().split())
+
+
+def normalize_cpf(cpf: str) -> str:
+    """
+    Extrai os 6 dígitos visíveis do CPF mascarado do portal ("***.456.789-**").
+    
+    Um CPF completo (11 dígitos) é reduzido aos mesmos dígitos (4º ao 9º).
+    """
+    digits = ''.join(char for char in cpf if char.isdigit())
+    return digits[3:9] if len(digits) == 11 else digits
+
+
+def trigrams(normalized_name: str) -> Set[str]:
+    """Trigramas de um nome normalizado, com espaços nas bordas."""
+    padded = f"  {normalized_name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_length(size: int, threshold: float) -> int:
+    """Quantos trigramas (os mais raros) bastam para garantir Jaccard >= threshold."""
+    return size - math.ceil(threshold * size - 1e-9) + 1
+
+
+def _little_endian(values: array) -> bytes:
+    """Serializa um array numérico sempre em little-endian."""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _string_table(values: Iterable[str]) -> Tuple[array, bytes]:
+    """Strings como offsets uint64 (n + 1) e blob UTF-8."""
+    offsets = array('Q', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def _list_table(lists: Iterable[array]) -> Tuple[array, array]:
+    """Listas de inteiros como offsets uint64 (n + 1) e valores uint32 concatenados."""
+    offsets = array('Q', [0])
+    values = array('I')
+    for items in lists:
+        values.extend(items)
+        offsets.append(len(values))
+    return offsets, values
+
+
+class _IndexReader:
+    """Lê e valida as seções de um arquivo .idx (ValueError se inconsistente)."""
+    
+    def __init__(self, data: bytes, path: str):
+        self.path = path
+        if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + 4:
+            raise ValueError(f"Arquivo de índice inválido: {path}")
+        directory_size = struct.unpack_from('<I', data, len(MAGIC))[0]
+        directory_start = len(MAGIC) + 4
+        try:
+            self.directory = json.loads(data[directory_start:directory_start + directory_size])
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Diretório do índice inválido: {path}") from e
+        if not isinstance(self.directory, dict) or not isinstance(self.directory.get('sections'), dict):
+            raise ValueError(f"Diretório do índice inválido: {path}")
+        header_size = directory_start + directory_size
+        self._data = memoryview(data)[header_size + (-header_size) % 8:]
+    
+    def array(self, name: str, typecodes: Sequence[str] = ('I',), limit: Optional[int] = None) -> array:
+        """Seção numérica; com `limit`, todos os valores devem ser menores que ele."""
+        location = self.directory['sections'].get(name)
+        if not isinstance(location, dict):
+            raise ValueError(f"Seção ausente no índice ({name}): {self.path}")
+        typecode = location.get('typecode')
+        offset, length = location.get('offset'), location.get('length')
+        if (typecode not in typecodes or not isinstance(offset, int) or not isinstance(length, int)
+                or offset < 0 or length < 0 or offset + length > len(self._data)
+                or length % array(typecode).itemsize):
+            raise ValueError(f"Seção inválida no índice ({name}): {self.path}")
+        values = array(typecode)
+        values.frombytes(self._data[offset:offset + length])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        if limit is not None and values and max(values) >= limit:
+            raise ValueError(f"Valor fora do intervalo na seção {name}: {self.path}")
+        return values
+    
+    def offsets(self, name: str, count: int, total: int, typecodes: Sequence[str] = ('Q',)) -> array:
+        """Offsets (count + 1) crescentes, de 0 até `total`."""
+        offsets = self.array(name, typecodes)
+        if (len(offsets) != count + 1 or offsets[0] != 0 or offsets[-1] != total
+                or any(offsets[i] > offsets[i + 1] for i in range(count))):
+            raise ValueError(f"Offsets inválidos na seção {name}: {self.path}")
+        return offsets
+    
+    def strings(self, name: str, count: int) -> List[str]:
+        blob = self.array(f"{name}_blob", ('B',))
+        offsets = self.offsets(f"{name}_offsets", count, len(blob))
+        data = blob.tobytes()
+        try:
+            return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)]
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Texto inválido na seção {name}: {self.path}") from e
+    
+    def lists(self, name: str, count: int, limit: int) -> List[array]:
+        values = self.array(f"{name}_values", ('I',), limit)
+        offsets = self.offsets(f"{name}_offsets", count, len(values))
+        return [values[offsets[i]:offsets[i + 1]] for i in range(count)]
+
+
+class ScreeningIndex:
+    """
+    Índice em memória para triagem de alto volume.
+    
+    - Busca exata por nome normalizado e por (CPF mascarado, nome) via hash
+    - Busca aproximada por similaridade de Jaccard entre trigramas usando
+      filtro de prefixo: com os trigramas ordenados do mais raro para o mais
+      comum, dois nomes com similaridade >= t compartilham ao menos um trigrama
+      em seus prefixos. Cada nome indexa só o próprio prefixo, o que mantém as
+      listas invertidas curtas mesmo para sobrenomes muito comuns.
+    
+    O limiar usado na construção é o menor aceito nas consultas.
+    """
+    
+    FORMAT_VERSION = 2
+    DEFAULT_THRESHOLD = 0.7
+    
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Limiar de similaridade inválido: {threshold}")
+        self.threshold = threshold
+        self.rows: List[Tuple[str, str, str, str]] = []          # (cpf, nome, função, órgão)
+        self.names: List[str] = []                                # nomes normalizados distintos
+        self.name_rows: List[array] = []                          # nome -> linhas
+        self.name_ids: Dict[str, int] = {}
+        self.cpf_name_rows: Dict[Tuple[str, int], array] = {}     # (cpf, nome) -> linhas
+        self.name_trigrams = array('H')                          # ranks dos trigramas de cada nome
+        self.name_offsets = array('I', [0])                       # nome -> início em name_trigrams
+        self.trigram_rank: Dict[str, int] = {}                    # trigrama -> posição na ordem global
+        self.postings: Dict[int, array] = {}                      # (trigrama, tamanho) -> nomes (só prefixos)
+    
+    @classmethod
+    def build(cls, records: Iterable[PEPRecord], threshold: float = DEFAULT_THRESHOLD) -> "ScreeningIndex":
+        """
+        Constrói o índice a partir de um fluxo de registros.
+        
+        Args:
+            records: Registros PEP (ex: RecordReader.iter_records)
+            threshold: Menor similaridade que poderá ser consultada
+        """
+        index = cls(threshold)
+        for record in records:
+            row_id = len(index.rows)
+            index.rows.append((record.cpf, record.nome, record.descricao_funcao, record.orgao))
+            
+            normalized = normalize_name(record.nome)
+            name_id = index.name_ids.get(normalized)
+            if name_id is None:
+                name_id = index.name_ids[normalized] = len(index.names)
+                index.names.append(normalized)
+                index.name_rows.append(array('I'))
+            index.name_rows[name_id].append(row_id)
+            
+            key = (normalize_cpf(record.cpf), name_id)
+            cpf_rows = index.cpf_name_rows.get(key)
+            if cpf_rows is None:
+                cpf_rows = index.cpf_name_rows[key] = array('I')
+            cpf_rows.append(row_id)
+        
+        index._build_trigram_index()
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def lookup(self, name: str, cpf: Optional[str] = None) -> List[ScreeningMatch]:
+        """
+        Busca exata pelo nome normalizado (e pelo CPF, se informado).
+        
+        Args:
+            name: Nome a consultar
+            cpf: CPF completo ou mascarado (opcional)
+        
+        Returns:
+            list: Ocorrências encontradas (score 1.0)
+        """
+        name_id = self.name_ids.get(normalize_name(name))
+        if name_id is None:
+            return []
+        if cpf is not None:
+            row_ids = self.cpf_name_rows.get((normalize_cpf(cpf), name_id), ())
+        else:
+            row_ids = self.name_rows[name_id]
+        return [self._match(name, row_id, 1.0) for row_id in row_ids]
+    
+    def search(self, name: str, threshold: Optional[float] = None, limit: int = 10) -> List[ScreeningMatch]:
+        """
+        Busca aproximada por similaridade de trigramas.
+        
+        Args:
+            name: Nome a consultar
+            threshold: Similaridade mínima (padrão: limiar do índice)
+            limit: Número máximo de nomes distintos retornados
+        
+        Returns:
+            list: Ocorrências ordenadas pela similaridade (maior primeiro)
+        """
+        threshold = self._check_threshold(threshold)
+        normalized = normalize_name(name)
+        
+        name_id = self.name_ids.get(normalized)
+        if name_id is not None and threshold >= 1.0:
+            return [self._match(name, row_id, 1.0) for row_id in self.name_rows[name_id]]
+        
+        scored = self._similar_names(normalized, threshold)
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        
+        matches = []
+        for candidate_id, score in scored[:limit]:
+            matches.extend(self._match(name, row_id, score) for row_id in self.name_rows[candidate_id])
+        return matches
+    
+    def screen(self, names: Iterable[str], threshold: Optional[float] = None,
+               limit: int = 10) -> Dict[str, List[ScreeningMatch]]:
+        """
+        Triagem em lote: nomes repetidos são consultados uma única vez.
+        
+        Args:
+            names: Nomes a consultar
+            threshold: Similaridade mínima (padrão: limiar do índice)
+            limit: Número máximo de nomes distintos por consulta
+        
+        Returns:
+            dict: Nome consultado -> ocorrências (lista vazia se nenhuma)
+        """
+        threshold = self._check_threshold(threshold)
+        results: Dict[str, List[ScreeningMatch]] = {}
+        for name in names:
+            if name not in results:
+                results[name] = self.search(name, threshold=threshold, limit=limit)
+        return results
+    
+    def save(self, path: str) -> None:
+        """Persiste o índice no formato .idx (só dados, gravação atômica)."""
+        sections = {}
+        
+        def add(name: str, values: array) -> None:
+            sections[name] = values
+        
+        def add_strings(name: str, values: Iterable[str]) -> None:
+            offsets, blob = _string_table(values)
+            add(f"{name}_offsets", offsets)
+            add(f"{name}_blob", array('B', blob))
+        
+        def add_lists(name: str, lists: Iterable[array]) -> None:
+            offsets, values = _list_table(lists)
+            add(f"{name}_offsets", offsets)
+            add(f"{name}_values", values)
+        
+        cpf_keys = list(self.cpf_name_rows)
+        posting_keys = list(self.postings)
+        trigrams_by_rank = sorted(self.trigram_rank, key=self.trigram_rank.__getitem__)
+        
+        add_strings('rows', (field for row in self.rows for field in row))
+        add_strings('names', self.names)
+        add_lists('name_rows', self.name_rows)
+        add_strings('cpfs', (cpf for cpf, _ in cpf_keys))
+        add('cpf_name_ids', array('I', (name_id for _, name_id in cpf_keys)))
+        add_lists('cpf_rows', (self.cpf_name_rows[key] for key in cpf_keys))
+        add('name_trigrams', self.name_trigrams)
+        add('name_offsets', self.name_offsets)
+        add_strings('trigrams', trigrams_by_rank)
+        add('posting_keys', array('Q', posting_keys))
+        add_lists('postings', (self.postings[key] for key in posting_keys))
+        
+        directory = {
+            'version': self.FORMAT_VERSION,
+            'threshold': self.threshold,
+            'rows': len(self.rows),
+            'names': len(self.names),
+            'cpf_keys': len(cpf_keys),
+            'trigrams': len(trigrams_by_rank),
+            'postings': len(posting_keys),
+            'sections': {},
+        }
+        payload = []
+        position = 0
+        for name, values in sections.items():
+            data = _little_endian(values)
+            directory['sections'][name] = {'typecode': values.typecode, 'offset': position, 'length': len(data)}
+            padding = (-len(data)) % 8
+            payload.append(data + b'\x00' * padding)
+            position += len(data) + padding
+        
+        directory_bytes = json.dumps(directory).encode('utf-8')
+        header_size = len(MAGIC) + 4 + len(directory_bytes)
+        
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<I', len(directory_bytes)))
+            file.write(directory_bytes)
+            file.write(b'\x00' * ((-header_size) % 8))
+            for data in payload:
+                file.write(data)
+        os.replace(temp_path, path)
+    
+    @staticmethod
+    def path_for(zip_path: str) -> str:
+        """Caminho do índice persistido ao lado do ZIP (AAAAMM_PEP.idx)."""
+        return os.path.splitext(zip_path)[0] + ".idx"
+    
+    @classmethod
+    def for_snapshot(cls, zip_path: str, record_reader: Optional[RecordReader] = None,
+                     threshold: float = DEFAULT_THRESHOLD) -> "ScreeningIndex":
+        """
+        Carrega o índice salvo ao lado do ZIP ou o constrói (e salva) se ausente ou desatualizado.
+        
+        Args:
+            zip_path: Caminho do snapshot AAAAMM_PEP.zip
+            record_reader: Leitor de registros (padrão: RecordReader())
+            threshold: Menor similaridade que poderá ser consultada
+        
+        Returns:
+            ScreeningIndex: Índice pronto para consulta
+        """
+        index_path = cls.path_for(zip_path)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(zip_path):
+            try:
+                index = cls.load(index_path)
+                if index.threshold <= threshold:
+                    return index
+            except (ValueError, OSError):
+                pass  # índice inválido ou de versão anterior: reconstruído abaixo
+        
+        reader = record_reader or RecordReader()
+        index = cls.build(reader.iter_records(zip_path), threshold=threshold)
+        index.save(index_path)
+        return index
+    
+    @classmethod
+    def load(cls, path: str) -> "ScreeningIndex":
+        """
+        Carrega um índice salvo por save().
+        
+        O arquivo só contém dados (nenhum objeto é reconstruído por código
+        do arquivo) e cada seção é validada: tamanhos, offsets e referências
+        entre linhas, nomes e trigramas.
+        
+        Raises:
+            ValueError: Arquivo inválido, inconsistente ou de outra versão
+        """
+        with open(path, 'rb') as file:
+            reader = _IndexReader(file.read(), path)
+        directory = reader.directory
+        if directory.get('version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Versão de índice incompatível: {path}")
+        counts = [directory.get(key) for key in ('rows', 'names', 'cpf_keys', 'trigrams', 'postings')]
+        threshold = directory.get('threshold')
+        if (not all(isinstance(count, int) and count >= 0 for count in counts)
+                or not isinstance(threshold, (int, float))):
+            raise ValueError(f"Diretório do índice inválido: {path}")
+        rows, names, cpf_keys, trigram_count, posting_count = counts
+        
+        index = cls(threshold)
+        fields = reader.strings('rows', rows * ROW_FIELDS)
+        index.rows = [tuple(fields[i:i + ROW_FIELDS]) for i in range(0, len(fields), ROW_FIELDS)]
+        index.names = reader.strings('names', names)
+        index.name_rows = reader.lists('name_rows', names, rows)
+        cpfs = reader.strings('cpfs', cpf_keys)
+        cpf_name_ids = reader.array('cpf_name_ids', limit=names)
+        cpf_rows = reader.lists('cpf_rows', cpf_keys, rows)
+        if len(cpf_name_ids) != cpf_keys:
+            raise ValueError(f"Seção inválida no índice (cpf_name_ids): {path}")
+        index.cpf_name_rows = {(cpf, name_id): row_ids for cpf, name_id, row_ids in zip(cpfs, cpf_name_ids, cpf_rows)}
+        index.name_trigrams = reader.array('name_trigrams', ('H', 'I'), trigram_count)
+        index.name_offsets = reader.offsets('name_offsets', names, len(index.name_trigrams), ('I',))
+        index.trigram_rank = {trigram: rank for rank, trigram in enumerate(reader.strings('trigrams', trigram_count))}
+        posting_keys = reader.array('posting_keys', ('Q',))
+        if len(posting_keys) != posting_count or any(key >> 16 >= trigram_count for key in posting_keys):
+            raise ValueError(f"Seção inválida no índice (posting_keys): {path}")
+        index.postings = dict(zip(posting_keys, reader.lists('postings', posting_count, names)))
+        index.name_ids = {name: name_id for name_id, name in enumerate(index.names)}
+        if len(index.name_ids) != names:
+            raise ValueError(f"Nomes repetidos no índice: {path}")
+        return index
+    
+    def _build_trigram_index(self) -> None:
+        """Ordena os trigramas por frequência e indexa o prefixo de cada nome."""
+        frequency = Counter()
+        for name in self.names:
+            frequency.update(trigrams(name))
+        ordered = sorted(frequency, key=lambda trigram: (frequency[trigram], trigram))
+        self.trigram_rank = {trigram: rank for rank, trigram in enumerate(ordered)}
+        
+        rank = self.trigram_rank.__getitem__
+        postings: Dict[int, array] = {}
+        self.name_trigrams = array('H' if len(ordered) <= 0xFFFF else 'I')
+        self.name_offsets = array('I', [0])
+        for name_id, name in enumerate(self.names):
+            name_ranks = sorted(rank(trigram) for trigram in trigrams(name))
+            size = min(len(name_ranks), 0xFFFF)
+            self.name_trigrams.extend(name_ranks)
+            self.name_offsets.append(len(self.name_trigrams))
+            for trigram_rank in name_ranks[:prefix_length(size, self.threshold)]:
+                key = self._posting_key(trigram_rank, size)
+                posting = postings.get(key)
+                if posting is None:
+                    posting = postings[key] = array('I')
+                posting.append(name_id)
+        self.postings = postings
+    
+    @staticmethod
+    def _posting_key(trigram_rank: int, size: int) -> int:
+        """Listas invertidas são particionadas pelo número de trigramas do nome (filtro de tamanho)."""
+        return (trigram_rank << 16) | size
+    
+    def _similar_names(self, normalized: str, threshold: float) -> List[Tuple[int, float]]:
+        """Nomes com similaridade de Jaccard >= threshold, com o score de cada um."""
+        if not normalized:
+            return []
+        
+        # Trigramas desconhecidos não geram candidatos, mas contam no tamanho da consulta
+        rank = self.trigram_rank.get
+        query_trigrams = trigrams(normalized)
+        query_size = len(query_trigrams)
+        query_ranks = {rank(trigram) for trigram in query_trigrams} - {None}
+        unknown = query_size - len(query_ranks)
+        prefix = sorted(query_ranks)[:max(0, prefix_length(query_size, self.threshold) - unknown)]
+        
+        # Jaccard >= t exige |B| entre t*|A| e |A|/t
+        min_size = math.ceil(threshold * query_size - 1e-9)
+        max_size = math.floor(query_size / threshold + 1e-9)
+        
+        postings = self.postings
+        name_trigrams = self.name_trigrams
+        name_offsets = self.name_offsets
+        scored = []
+        for size in range(min_size, max_size + 1):
+            candidates = set()
+            for trigram_rank in prefix:
+                posting = postings.get(self._posting_key(trigram_rank, size))
+                if posting is not None:
+                    candidates.update(posting)
+            
+            for name_id in candidates:
+                start = name_offsets[name_id]
+                common = len(query_ranks.intersection(name_trigrams[start:start + size]))
+                score = common / (query_size + size - common)
+                if score >= threshold:
+                    scored.append((name_id, score))
+        return scored
+    
+    def _check_threshold(self, threshold: Optional[float]) -> float:
+        if threshold is None:
+            return self.threshold
+        if not self.threshold <= threshold <= 1:
+            raise ValueError(f"Limiar {threshold} fora do intervalo suportado pelo índice ({self.threshold} a 1)")
+        return threshold
+    
+    def _match(self, query: str, row_id: int, score: float) -> ScreeningMatch:
+        cpf, nome, funcao, orgao = self.rows[row_id]
+        return ScreeningMatch(query=query, score=score, cpf=cpf, nome=nome, funcao=funcao, orgao=orgao)
\ No newline at end of file
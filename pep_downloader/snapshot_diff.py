@@ -0,0 +1,243 @@
+"""
+Comparação entre snapshots mensais PEP (incluídos, removidos e alterados).
+"""
+import csv
+import heapq
+import itertools
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .console_logger import ConsoleLogger
+from .models import DiffResult, PEPRecord, RecordChange
+from .record_reader import RecordReader
+
+
+# Pessoa + função identificam o registro; os demais campos podem mudar entre meses
+KEY_FIELDS = ('cpf', 'nome', 'sigla_funcao', 'descricao_funcao', 'orgao')
+VALUE_FIELDS = ('nivel_funcao', 'data_inicio', 'data_fim', 'data_carencia')
+ROW_FIELDS = KEY_FIELDS + VALUE_FIELDS
+DATE_FIELDS = ('data_inicio', 'data_fim', 'data_carencia')
+
+KEY_SIZE = len(KEY_FIELDS)
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+
+def record_to_row(record: PEPRecord) -> Tuple[str, ...]:
+    """Converte o registro em tupla de strings ordenável (chave primeiro, datas ISO)."""
+    return tuple(
+        value.isoformat() if isinstance(value, date) else (value or '')
+        for value in (getattr(record, name) for name in ROW_FIELDS)
+    )
+
+
+def row_to_record(row: Iterable[str]) -> PEPRecord:
+    """Reconstrói o registro a partir da tupla gerada por record_to_row."""
+    fields = dict(zip(ROW_FIELDS, row))
+    for name in DATE_FIELDS:
+        fields[name] = date.fromisoformat(fields[name]) if fields[name] else None
+    return PEPRecord(**fields)
+
+
+class SnapshotDiff:
+    """
+    Compara dois snapshots com memória limitada.
+    
+    Cada snapshot é lido em streaming e ordenado externamente: blocos de até
+    `chunk_size` linhas são ordenados em memória e gravados em arquivos
+    temporários, depois intercalados (heapq.merge). As duas sequências
+    ordenadas são então percorridas juntas (merge join) pela chave pessoa+função.
+    """
+    
+    DEFAULT_CHUNK_SIZE = 250_000
+    
+    def __init__(self,
+                 record_reader: Optional[RecordReader] = None,
+                 logger: Optional[ConsoleLogger] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 temp_dir: Optional[str] = None):
+        self.logger = logger or ConsoleLogger()
+        self.record_reader = record_reader or RecordReader(self.logger)
+        self.chunk_size = max(1, chunk_size)
+        self.temp_dir = temp_dir
+        self.unchanged = 0                   # linhas idênticas na última comparação
+    
+    def diff(self, zip_a: str, zip_b: str) -> Iterator[RecordChange]:
+        """
+        Percorre as diferenças do snapshot A (anterior) para o B (posterior).
+        
+        Args:
+            zip_a: Caminho do snapshot anterior (AAAAMM_PEP.zip)
+            zip_b: Caminho do snapshot posterior
+        
+        Yields:
+            RecordChange: Alterações em ordem de chave
+        """
+        with tempfile.TemporaryDirectory(prefix="pep-diff-", dir=self.temp_dir) as work_dir:
+            rows_a = self._sorted_rows(self.record_reader.iter_records(zip_a), work_dir, 'a')
+            rows_b = self._sorted_rows(self.record_reader.iter_records(zip_b), work_dir, 'b')
+            yield from self.merge_sorted(rows_a, rows_b)
+    
+    def write(self, zip_a: str, zip_b: str, output_path: str, output_format: str = FORMAT_CSV,
+              month_a: str = '', month_b: str = '') -> DiffResult:
+        """
+        Compara os snapshots e grava as diferenças em CSV ou JSON Lines (gravação atômica).
+        
+        Args:
+            zip_a: Caminho do snapshot anterior
+            zip_b: Caminho do snapshot posterior
+            output_path: Arquivo de saída
+            output_format: 'csv' ou 'jsonl'
+            month_a: Rótulo do mês anterior (AAAAMM)
+            month_b: Rótulo do mês posterior (AAAAMM)
+        
+        Returns:
+            DiffResult: Contagens por tipo de alteração
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Formato de saída inválido: {output_format} (use {' ou '.join(FORMATS)})")
+        
+        result = DiffResult(month_a=month_a, month_b=month_b, output_path=output_path)
+        start_time = time.time()
+        
+        def counted(changes: Iterable[RecordChange]) -> Iterator[RecordChange]:
+            for change in changes:
+                setattr(result, change.change, getattr(result, change.change) + 1)
+                yield change
+        
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8', newline='') as file:
+            changes = counted(self.diff(zip_a, zip_b))
+            if output_format == FORMAT_CSV:
+                write_csv(changes, file)
+            else:
+                write_jsonl(changes, file)
+        os.replace(temp_path, output_path)
+        
+        result.unchanged = self.unchanged
+        result.diff_time = time.time() - start_time
+        return result
+    
+    def merge_sorted(self, rows_a: Iterable[Tuple[str, ...]],
+                     rows_b: Iterable[Tuple[str, ...]]) -> Iterator[RecordChange]:
+        """
+        Merge join de duas sequências de linhas ordenadas (ver record_to_row).
+        
+        Linhas idênticas se anulam; dentro de uma mesma chave, as restantes são
+        pareadas como alteração e o excedente vira inclusão ou remoção.
+        """
+        self.unchanged = 0
+        groups_a = itertools.groupby(rows_a, key=_row_key)
+        groups_b = itertools.groupby(rows_b, key=_row_key)
+        current_a = next(groups_a, None)
+        current_b = next(groups_b, None)
+        
+        while current_a is not None or current_b is not None:
+            if current_b is None or (current_a is not None and current_a[0] < current_b[0]):
+                for row in current_a[1]:
+                    yield RecordChange('removed', row_to_record(row), None)
+                current_a = next(groups_a, None)
+            elif current_a is None or current_b[0] < current_a[0]:
+                for row in current_b[1]:
+                    yield RecordChange('inserted', None, row_to_record(row))
+                current_b = next(groups_b, None)
+            else:
+                yield from self._compare_group(list(current_a[1]), list(current_b[1]))
+                current_a = next(groups_a, None)
+                current_b = next(groups_b, None)
+    
+    def _compare_group(self, rows_a: List[Tuple[str, ...]], rows_b: List[Tuple[str, ...]]) -> Iterator[RecordChange]:
+        """Compara as linhas de uma mesma chave nos dois snapshots."""
+        remaining_b = list(rows_b)
+        remaining_a = []
+        for row in rows_a:
+            if row in remaining_b:
+                remaining_b.remove(row)
+                self.unchanged += 1
+            else:
+                remaining_a.append(row)
+        
+        for before, after in zip(remaining_a, remaining_b):
+            changed = [name for name, old, new in zip(VALUE_FIELDS, before[KEY_SIZE:], after[KEY_SIZE:]) if old != new]
+            yield RecordChange('modified', row_to_record(before), row_to_record(after), changed)
+        for row in remaining_a[len(remaining_b):]:
+            yield RecordChange('removed', row_to_record(row), None)
+        for row in remaining_b[len(remaining_a):]:
+            yield RecordChange('inserted', None, row_to_record(row))
+    
+    def _sorted_rows(self, records: Iterable[PEPRecord], work_dir: str, prefix: str) -> Iterator[Tuple[str, ...]]:
+        """Ordena os registros por chave com ordenação externa (runs em disco + merge)."""
+        runs: List[str] = []
+        chunk: List[Tuple[str, ...]] = []
+        
+        for record in records:
+            chunk.append(record_to_row(record))
+            if len(chunk) >= self.chunk_size:
+                runs.append(self._write_run(chunk, work_dir, f"{prefix}{len(runs)}"))
+                chunk = []
+        
+        # Snapshot que cabe em um único bloco não passa pelo disco
+        if not runs:
+            chunk.sort()
+            return iter(chunk)
+        
+        if chunk:
+            runs.append(self._write_run(chunk, work_dir, f"{prefix}{len(runs)}"))
+        self.logger.debug(f"Ordenação externa: {len(runs)} blocos de até {self.chunk_size} linhas")
+        return heapq.merge(*[_read_run(path) for path in runs])
+    
+    def _write_run(self, chunk: List[Tuple[str, ...]], work_dir: str, name: str) -> str:
+        chunk.sort()
+        path = os.path.join(work_dir, f"{name}.run")
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            csv.writer(file).writerows(chunk)
+        return path
+
+
+def _row_key(row: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(row[:KEY_SIZE])
+
+
+def _read_run(path: str) -> Iterator[Tuple[str, ...]]:
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            yield tuple(row)
+
+
+def _record_dict(record: Optional[PEPRecord]) -> Optional[dict]:
+    if record is None:
+        return None
+    values = dict(zip(ROW_FIELDS, record_to_row(record)))
+    for name in DATE_FIELDS:
+        values[name] = values[name] or None
+    return values
+
+
+def write_csv(changes: Iterable[RecordChange], file) -> None:
+    """
+    Grava as alterações em CSV (";"): valores atuais de todos os campos e
+    valores anteriores dos campos variáveis (colunas "anterior_*").
+    """
+    writer = csv.writer(file, delimiter=';')
+    writer.writerow(('alteracao',) + ROW_FIELDS + tuple(f"anterior_{name}" for name in VALUE_FIELDS) + ('campos_alterados',))
+    for change in changes:
+        current = record_to_row(change.record)
+        previous = record_to_row(change.before)[KEY_SIZE:] if change.change == 'modified' else ('',) * len(VALUE_FIELDS)
+        writer.writerow((change.change,) + current + previous + (','.join(change.changed_fields),))
+
+
+def write_jsonl(changes: Iterable[RecordChange], file) -> None:
+    """Grava as alterações em JSON Lines (um objeto por alteração)."""
+    for change in changes:
+        file.write(json.dumps({
+            'change': change.change,
+            'before': _record_dict(change.before),
+            'after': _record_dict(change.after),
+            'changed_fields': change.changed_fields,
+        }, ensure_ascii=False))
+        file.write('\n')
\ No newline at end of file
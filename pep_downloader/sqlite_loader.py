@@ -0,0 +1,176 @@
+"""
+Carga dos snapshots PEP em um banco SQLite com atualização incremental por mês.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Iterable, Optional
+from .console_logger import ConsoleLogger
+from .models import LoadResult, PEPRecord
+from .snapshot_diff import KEY_FIELDS
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pep (
+    id INTEGER PRIMARY KEY,
+    cpf TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    sigla_funcao TEXT NOT NULL,
+    descricao_funcao TEXT NOT NULL,
+    orgao TEXT NOT NULL,
+    nivel_funcao TEXT NOT NULL,
+    data_inicio TEXT,
+    data_fim TEXT,
+    data_carencia TEXT,
+    primeiro_mes TEXT NOT NULL,
+    ultimo_mes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    mes TEXT PRIMARY KEY,
+    registros INTEGER NOT NULL,
+    carregado_em TEXT NOT NULL
+);
+"""
+
+# Índices criados só depois da carga inicial (inserção sem manutenção de índice)
+INDEXES = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS pep_chave ON pep ({', '.join(KEY_FIELDS)})",
+    "CREATE INDEX IF NOT EXISTS pep_cpf ON pep (cpf)",
+    "CREATE INDEX IF NOT EXISTS pep_nome ON pep (nome)",
+    "CREATE INDEX IF NOT EXISTS pep_orgao ON pep (orgao)",
+)
+
+COLUMNS = ('cpf', 'nome', 'sigla_funcao', 'descricao_funcao', 'orgao', 'nivel_funcao',
+           'data_inicio', 'data_fim', 'data_carencia', 'primeiro_mes', 'ultimo_mes')
+
+INSERT_SQL = f"INSERT INTO pep ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# Registro já existente: o snapshot mais recente define os valores; o período visto só cresce
+UPSERT_SQL = INSERT_SQL + f""" ON CONFLICT ({', '.join(KEY_FIELDS)}) DO UPDATE SET
+    nivel_funcao = CASE WHEN excluded.ultimo_mes >= ultimo_mes THEN excluded.nivel_funcao ELSE nivel_funcao END,
+    data_inicio = CASE WHEN excluded.ultimo_mes >= ultimo_mes THEN excluded.data_inicio ELSE data_inicio END,
+    data_fim = CASE WHEN excluded.ultimo_mes >= ultimo_mes THEN excluded.data_fim ELSE data_fim END,
+    data_carencia = CASE WHEN excluded.ultimo_mes >= ultimo_mes THEN excluded.data_carencia ELSE data_carencia END,
+    primeiro_mes = MIN(primeiro_mes, excluded.primeiro_mes),
+    ultimo_mes = MAX(ultimo_mes, excluded.ultimo_mes)"""
+
+# Registros repetidos na carga inicial: mantém a última ocorrência de cada chave
+DEDUPLICATE_SQL = f"DELETE FROM pep WHERE id NOT IN (SELECT MAX(id) FROM pep GROUP BY {', '.join(KEY_FIELDS)})"
+
+
+def _iso(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class SQLiteLoader:
+    """
+    Carrega snapshots mensais na tabela `pep` de um banco SQLite.
+    
+    A primeira carga insere em uma tabela sem índices (executemany em lotes,
+    uma única transação, WAL e synchronous=OFF) e cria os índices ao final.
+    As cargas seguintes fazem upsert pela chave pessoa+função: cada registro
+    guarda o primeiro e o último mês em que apareceu (primeiro_mes/ultimo_mes),
+    e a tabela `snapshots` lista os meses já carregados.
+    """
+    
+    DEFAULT_BATCH_SIZE = 50_000
+    
+    def __init__(self, db_path: str, logger: Optional[ConsoleLogger] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.logger = logger or ConsoleLogger()
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+    
+    def load(self, records: Iterable[PEPRecord], year_month: str) -> LoadResult:
+        """
+        Carrega (ou aplica incrementalmente) um snapshot mensal.
+        
+        Args:
+            records: Registros do snapshot (ex: RecordReader.iter_records)
+            year_month: Mês do snapshot no formato AAAAMM
+        
+        Returns:
+            LoadResult: Linhas carregadas, tempo e taxa (linhas/s)
+        """
+        # SQLite aceita um único escritor: cargas simultâneas (backfill) são serializadas
+        with self._lock:
+            start_time = time.time()
+            connection = sqlite3.connect(self.db_path, isolation_level=None)
+            try:
+                rows, incremental = self._load(connection, records, year_month)
+            except Exception as e:
+                return LoadResult(success=False, year_month=year_month, rows=0,
+                                  load_time=time.time() - start_time, error_message=str(e))
+            finally:
+                connection.close()
+            
+            return LoadResult(success=True, year_month=year_month, rows=rows,
+                              load_time=time.time() - start_time, incremental=incremental)
+    
+    def _load(self, connection: sqlite3.Connection, records: Iterable[PEPRecord], year_month: str) -> tuple:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA cache_size=-262144")  # 256 MB
+        connection.executescript(SCHEMA)
+        
+        # A chave única só existe depois da primeira carga concluída
+        incremental = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'pep_chave'"
+        ).fetchone() is not None
+        sql = UPSERT_SQL if incremental else INSERT_SQL
+        self.logger.debug(f"Carga SQLite {'incremental' if incremental else 'inicial'} de {year_month}")
+        
+        rows = (
+            (record.cpf, record.nome, record.sigla_funcao, record.descricao_funcao, record.orgao,
+             record.nivel_funcao, _iso(record.data_inicio), _iso(record.data_fim),
+             _iso(record.data_carencia), year_month, year_month)
+            for record in records
+        )
+        
+        total = 0
+        connection.execute("BEGIN")
+        try:
+            while True:
+                batch = list(itertools.islice(rows, self.batch_size))
+                if not batch:
+                    break
+                connection.executemany(sql, batch)
+                total += len(batch)
+            
+            if not incremental:
+                self._create_indexes(connection)
+            
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots (mes, registros, carregado_em) VALUES (?, ?, datetime('now'))",
+                (year_month, total)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        
+        # Volta à durabilidade padrão do WAL para o uso normal do banco
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA optimize")
+        return total, incremental
+    
+    def _create_indexes(self, connection: sqlite3.Connection) -> None:
+        """Cria os índices após a carga inicial, removendo chaves repetidas se necessário."""
+        try:
+            connection.execute(INDEXES[0])
+        except sqlite3.IntegrityError:
+            removed = connection.execute(DEDUPLICATE_SQL).rowcount
+            self.logger.debug(f"Registros repetidos removidos na carga inicial: {removed}")
+            connection.execute(INDEXES[0])
+        for statement in INDEXES[1:]:
+            connection.execute(statement)
+    
+    @staticmethod
+    def month_from_path(zip_path: str) -> str:
+        """Extrai o mês AAAAMM do nome do snapshot (AAAAMM_PEP.zip)."""
+        return os.path.basename(zip_path)[:6]
\ No newline at end of file
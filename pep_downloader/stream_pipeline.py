@@ -0,0 +1,392 @@
+"""
+Pipeline de download e descompactação: registros são lidos enquanto o ZIP ainda chega.
+"""
+import codecs
+import os
+import queue
+import struct
+import threading
+import zipfile
+import zlib
+from typing import Iterator, List, Optional, Tuple
+from .console_logger import ConsoleLogger
+from .http_client import HTTPClient
+from .models import PEPRecord, TransferResult
+from .record_reader import RecordReader
+
+
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+CENTRAL_DIRECTORY_SIGNATURE = b'PK\x01\x02'
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = b'PK\x05\x06'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+
+
+class StreamingZipDecoder:
+    """
+    Decodificador incremental de ZIP pelos cabeçalhos locais (sem diretório central).
+    
+    Recebe os bytes na ordem em que chegam e devolve o conteúdo descompactado
+    de cada membro (stored ou deflate), validando o CRC-32 ao fim de cada um.
+    O diretório central, no fim do arquivo, não é necessário.
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._state = 'header'
+        self._name = ''
+        self._method = METHOD_STORED
+        self._has_descriptor = False
+        self._zip64 = False
+        self._expected_crc = 0
+        self._remaining = 0
+        self._crc = 0
+        self._decompressor = None
+    
+    @property
+    def finished(self) -> bool:
+        """True ao atingir o diretório central (todos os membros lidos)."""
+        return self._state == 'done'
+    
+    def feed(self, data: bytes) -> List[Tuple[str, bytes]]:
+        """
+        Processa mais um bloco de bytes do arquivo ZIP.
+        
+        Returns:
+            list: Pares (nome do membro, conteúdo descompactado) disponíveis até aqui
+        """
+        if self._state == 'done':
+            return []
+        self._buffer += data
+        output: List[Tuple[str, bytes]] = []
+        
+        while True:
+            if self._state == 'header':
+                if not self._read_header():
+                    break
+            elif self._state == 'data':
+                if not self._buffer or not self._read_data(output):
+                    break
+            elif self._state == 'descriptor':
+                if not self._read_descriptor():
+                    break
+            else:
+                break
+        return output
+    
+    def close(self) -> None:
+        """Confirma que o fluxo terminou em um limite de membro."""
+        if self._state not in ('header', 'done') or (self._state == 'header' and self._buffer):
+            raise zipfile.BadZipFile("ZIP truncado: fluxo terminou no meio de um membro")
+    
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in (CENTRAL_DIRECTORY_SIGNATURE, END_OF_CENTRAL_DIRECTORY_SIGNATURE):
+            self._state = 'done'
+            self._buffer.clear()
+            return False
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabeçalho local inválido: {signature!r}")
+        if len(self._buffer) < LOCAL_HEADER.size:
+            return False
+        
+        (_, _, flags, method, _, _, crc, compressed_size, _,
+         name_length, extra_length) = LOCAL_HEADER.unpack_from(self._buffer)
+        header_size = LOCAL_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+        
+        raw_name = bytes(self._buffer[LOCAL_HEADER.size:LOCAL_HEADER.size + name_length])
+        extra = bytes(self._buffer[LOCAL_HEADER.size + name_length:header_size])
+        del self._buffer[:header_size]
+        
+        if flags & FLAG_ENCRYPTED:
+            raise zipfile.BadZipFile("ZIP criptografado não suportado")
+        if method not in (METHOD_STORED, METHOD_DEFLATED):
+            raise zipfile.BadZipFile(f"Método de compressão não suportado: {method}")
+        
+        self._name = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+        self._method = method
+        self._has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        self._zip64 = compressed_size == 0xFFFFFFFF
+        if self._zip64:
+            compressed_size = self._zip64_compressed_size(extra, compressed_size)
+        if method == METHOD_STORED and self._has_descriptor and compressed_size == 0:
+            raise zipfile.BadZipFile(f"Membro sem tamanho no cabeçalho local: {self._name}")
+        
+        self._expected_crc = crc
+        self._remaining = compressed_size
+        self._crc = 0
+        self._decompressor = zlib.decompressobj(-15) if method == METHOD_DEFLATED else None
+        self._state = 'data'
+        return True
+    
+    def _read_data(self, output: List[Tuple[str, bytes]]) -> bool:
+        # Com data descriptor o tamanho é desconhecido: o fim do deflate marca o fim do membro
+        if self._method == METHOD_DEFLATED and self._has_descriptor:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            chunk = bytes(self._buffer[:self._remaining])
+            del self._buffer[:len(chunk)]
+            self._remaining -= len(chunk)
+        
+        if self._decompressor is not None:
+            data = self._decompressor.decompress(chunk)
+            finished = self._decompressor.eof
+            if finished:
+                data += self._decompressor.flush()
+                if self._decompressor.unused_data:
+                    self._buffer[:0] = self._decompressor.unused_data
+            elif self._remaining == 0 and not self._has_descriptor:
+                raise zipfile.BadZipFile(f"Fluxo deflate incompleto: {self._name}")
+        else:
+            data = chunk
+            finished = self._remaining == 0
+        
+        if data:
+            self._crc = zlib.crc32(data, self._crc)
+            output.append((self._name, data))
+        
+        if not finished:
+            return bool(self._buffer)
+        
+        if self._has_descriptor:
+            self._state = 'descriptor'
+        else:
+            self._check_crc(self._expected_crc)
+            self._state = 'header'
+        return True
+    
+    def _read_descriptor(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        offset = 4 if bytes(self._buffer[:4]) == DATA_DESCRIPTOR_SIGNATURE else 0
+        size = offset + (20 if self._zip64 else 12)
+        if len(self._buffer) < size:
+            return False
+        crc = struct.unpack_from('<I', self._buffer, offset)[0]
+        del self._buffer[:size]
+        self._check_crc(crc)
+        self._state = 'header'
+        return True
+    
+    def _check_crc(self, expected: int) -> None:
+        if self._crc != expected:
+            raise zipfile.BadZipFile(f"CRC-32 inválido no membro {self._name}")
+    
+    @staticmethod
+    def _zip64_compressed_size(extra: bytes, default: int) -> int:
+        """Lê o tamanho compactado do campo extra ZIP64 (id 0x0001)."""
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, length = struct.unpack_from('<HH', extra, position)
+            if header_id == 0x0001 and length >= 16:
+                return struct.unpack_from('<QQ', extra, position + 4)[1]
+            position += 4 + length
+        return default
+
+
+class _StageFailure:
+    """Erro ocorrido em um estágio, repassado ao consumidor pela fila."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+# Marcador de _get para o pipeline interrompido pelo consumidor
+_STOPPED = object()
+
+
+class StreamingPipeline:
+    """
+    Baixa o ZIP e entrega os registros do CSV enquanto o download acontece.
+    
+    Três estágios ligados por filas limitadas (contrapressão):
+        
+        download (grava o .part e repassa os bytes) -> descompactação e
+        decodificação em linhas -> leitura dos registros (consumidor)
+    
+    Ao final o arquivo completo fica no destino, como em HTTPClient.download;
+    o resultado da transferência fica em `result`.
+    """
+    
+    DEFAULT_QUEUE_SIZE = 64
+    
+    def __init__(self, http_client: HTTPClient,
+                 record_reader: Optional[RecordReader] = None,
+                 logger: Optional[ConsoleLogger] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.http_client = http_client
+        self.logger = logger or ConsoleLogger()
+        self.record_reader = record_reader or RecordReader(self.logger)
+        self.queue_size = max(1, queue_size)
+        self.result: Optional[TransferResult] = None
+        self._decode_error: Optional[Exception] = None
+    
+    def iter_records(self, url: str, filepath: str) -> Iterator[PEPRecord]:
+        """
+        Percorre os registros do CSV do ZIP remoto enquanto ele é baixado.
+        
+        Args:
+            url: URL do arquivo ZIP
+            filepath: Caminho onde salvar o arquivo
+        
+        Yields:
+            PEPRecord: Registros na ordem do arquivo
+        
+        Raises:
+            Exception: Falha no download ou ZIP inválido (o arquivo não é publicado)
+        """
+        self.result = None
+        self._decode_error = None
+        raw_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        line_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        
+        stages = [
+            threading.Thread(target=self._download_stage, args=(url, filepath, raw_queue, stop),
+                             name="pep-pipeline-download", daemon=True),
+            threading.Thread(target=self._decode_stage, args=(raw_queue, line_queue, stop),
+                             name="pep-pipeline-decode", daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        
+        try:
+            yield from self.record_reader.iter_csv_records(self._iter_lines(line_queue))
+            # Registros esgotados: aguarda o fim do download (o restante do arquivo)
+            for stage in stages:
+                stage.join()
+            if self.result is None or not self.result.success:
+                raise IOError(self.result.error_message if self.result else "Download interrompido")
+        finally:
+            stop.set()
+            # Consumidor parou antes do fim: `result` só é definitivo com os estágios encerrados
+            for stage in stages:
+                stage.join()
+            if self._decode_error is not None:
+                self._discard_download(stages[0], filepath)
+    
+    def _discard_download(self, download_stage: threading.Thread, filepath: str) -> None:
+        """ZIP inválido: o arquivo não pode ficar publicado mesmo que o download tenha terminado."""
+        download_stage.join()
+        if self.result is not None and self.result.success:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+        self.result = TransferResult(success=False, error_message=f"ZIP inválido: {self._decode_error}")
+    
+    def _download_stage(self, url: str, filepath: str, raw_queue: queue.Queue, stop: threading.Event) -> None:
+        try:
+            chunks = self.http_client.iter_download(url, filepath)
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as finished:
+                    self.result = finished.value
+                    break
+                if not self._put(raw_queue, chunk, stop):
+                    chunks.close()
+                    return
+            if self.result.success:
+                self._put(raw_queue, None, stop)
+            else:
+                self._put(raw_queue, _StageFailure(IOError(self.result.error_message)), stop)
+        except Exception as e:
+            self.result = TransferResult(success=False, error_message=str(e))
+            self._put(raw_queue, _StageFailure(e), stop)
+    
+    def _decode_stage(self, raw_queue: queue.Queue, line_queue: queue.Queue, stop: threading.Event) -> None:
+        decoder = StreamingZipDecoder()
+        text_decoder = codecs.getincrementaldecoder(self.record_reader.encoding)()
+        csv_member = None
+        member_done = False
+        pending = ''
+        
+        try:
+            while True:
+                item = self._get(raw_queue, stop)
+                if item is _STOPPED:
+                    return
+                if isinstance(item, _StageFailure):
+                    self._put(line_queue, item, stop)
+                    return
+                if item is None:
+                    break
+                if member_done:
+                    continue  # só o primeiro CSV interessa; o restante apenas termina de baixar
+                
+                for name, data in decoder.feed(item):
+                    if csv_member is None and name.lower().endswith('.csv'):
+                        csv_member = name
+                        self.logger.debug(f"Lendo registros de {name} durante o download")
+                    if name != csv_member:
+                        member_done = csv_member is not None
+                        continue
+                    
+                    # Linhas completas (com o terminador) para o csv.reader
+                    text = pending + text_decoder.decode(data)
+                    lines = text.split('\n')
+                    pending = lines.pop()
+                    if lines and not self._put(line_queue, [line + '\n' for line in lines], stop):
+                        return
+                member_done = member_done or decoder.finished
+            
+            if not member_done:
+                decoder.close()
+            if csv_member is None:
+                raise zipfile.BadZipFile("Nenhum arquivo CSV encontrado no ZIP")
+            pending += text_decoder.decode(b'', final=True)
+            if pending:
+                self._put(line_queue, [pending], stop)
+            self._put(line_queue, None, stop)
+        except Exception as e:
+            self._decode_error = e
+            self._put(line_queue, _StageFailure(e), stop)
+            # Continua consumindo para não bloquear o estágio de download
+            while not stop.is_set():
+                try:
+                    if raw_queue.get(timeout=0.1) is None:
+                        break
+                except queue.Empty:
+                    continue
+    
+    def _iter_lines(self, line_queue: queue.Queue) -> Iterator[str]:
+        while True:
+            item = line_queue.get()
+            if item is None:
+                return
+            if isinstance(item, _StageFailure):
+                raise item.error
+            yield from item
+    
+    def _get(self, source: queue.Queue, stop: threading.Event):
+        """Retira da fila; _STOPPED se o pipeline foi interrompido."""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
+    
+    def _put(self, target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Enfileira respeitando o limite da fila; False se o pipeline foi interrompido."""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
\ No newline at end of file
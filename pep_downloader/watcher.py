@@ -0,0 +1,294 @@
+"""
+Modo watch: processo contínuo que detecta a publicação de novos meses.
+"""
+import json
+import os
+import signal
+import threading
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from .bot import PEPDownloaderBot
+from .console_logger import ConsoleLogger
+from .models import MonthProbe, Resolution, WatchStatus
+
+
+class PublicationWatcher:
+    """
+    Observa o portal e baixa cada novo arquivo mensal assim que é publicado.
+    
+    Diferente de execuções periódicas pelo cron, o processo mantém o bot (e a
+    sessão HTTP, com as conexões abertas) entre as verificações e, conhecendo
+    os meses já baixados (manifesto), verifica apenas o próximo AAAAMM esperado
+    com um único HEAD. Ao detectar o arquivo, dispara o download e o
+    processamento configurados no bot e passa a esperar o mês seguinte.
+    
+    O intervalo se adapta à época de publicação: dentro da janela de dias do mês
+    em que os arquivos costumam aparecer, verifica a cada `min_interval`; fora
+    dela, a cada `max_interval` (sem passar do início da próxima janela). A
+    janela é aprendida com os dias em que as publicações foram detectadas
+    (guardados no arquivo de status); até lá, usa DEFAULT_PUBLICATION_DAYS.
+    
+    Se o mês esperado continua ausente depois da sua janela de publicação, os
+    meses seguintes também são verificados: quando o portal pula um mês, o
+    processo avança para o mês publicado mais antigo em vez de esperar para
+    sempre.
+    """
+    
+    STATUS_FILENAME = "pep_watch_status.json"
+    
+    # Janela inicial (dias do mês, horário de Brasília) antes de observar publicações
+    DEFAULT_PUBLICATION_DAYS = (1, 10)
+    
+    # Dias de publicação guardados para calcular a janela
+    MAX_PUBLICATION_DAYS = 12
+    
+    # Falhas consecutivas a partir das quais o status deixa de ser saudável
+    MAX_HEALTHY_ERRORS = 3
+    
+    STATE_STARTING = "starting"
+    STATE_WAITING = "waiting"
+    STATE_DOWNLOADING = "downloading"
+    STATE_STOPPED = "stopped"
+    
+    def __init__(self, bot: PEPDownloaderBot,
+                 status_path: Optional[str] = None,
+                 min_interval: float = 15 * 60,
+                 max_interval: float = 6 * 60 * 60,
+                 logger: Optional[ConsoleLogger] = None):
+        """
+        Args:
+            bot: Bot configurado (download, extração e cargas) usado a cada publicação
+            status_path: Arquivo JSON de status/saúde (padrão: no diretório de download)
+            min_interval: Intervalo entre verificações na janela de publicação (segundos)
+            max_interval: Intervalo máximo entre verificações fora da janela (segundos)
+            logger: Logger para mensagens (padrão: o do bot)
+        """
+        self.bot = bot
+        self.status_path = status_path or os.path.join(bot.download_dir, self.STATUS_FILENAME)
+        self.min_interval = max(1.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.logger = logger or bot.logger
+        self._stop = threading.Event()
+        self._unpublished_month: Optional[str] = None  # mês esperado já visto como não publicado
+        
+        now = self._timestamp()
+        self.status = WatchStatus(state=self.STATE_STARTING, pid=os.getpid(), started_at=now, updated_at=now,
+                                  publication_days=self._load_publication_days())
+    
+    def run(self, max_checks: Optional[int] = None) -> WatchStatus:
+        """
+        Executa o laço de verificação até receber SIGINT/SIGTERM (ou `stop`).
+        
+        Args:
+            max_checks: Encerra após este número de verificações (None = sem limite)
+        
+        Returns:
+            WatchStatus: Último estado gravado
+        """
+        self._install_signal_handlers()
+        self.logger.info("=== PEP Downloader Bot - Modo watch ===")
+        self.logger.info(f"Status em {self.status_path}")
+        
+        self.status.latest_month = self._latest_local_month()
+        if self.status.latest_month:
+            self.status.expected_month = self.bot.date_generator.next_month(self.status.latest_month)
+            self.logger.info(f"Último mês baixado: {self.status.latest_month}; aguardando {self.status.expected_month}")
+        
+        try:
+            while not self._stop.is_set():
+                delay = self.check_once()
+                if max_checks is not None and self.status.checks >= max_checks:
+                    break
+                next_check = datetime.now() + timedelta(seconds=delay)
+                self.status.next_check_at = next_check.isoformat(timespec='seconds')
+                self._write_status(self.STATE_WAITING)
+                self.logger.debug(f"Próxima verificação em {delay / 60:.1f} min ({self.status.next_check_at})")
+                if self._stop.wait(delay):
+                    break
+        finally:
+            self.status.next_check_at = None
+            self._write_status(self.STATE_STOPPED)
+            self.logger.info("Modo watch encerrado")
+        return self.status
+    
+    def stop(self) -> None:
+        """Pede o encerramento do laço (atendido ao fim da etapa em andamento)."""
+        self._stop.set()
+    
+    def check_once(self) -> float:
+        """
+        Verifica o próximo mês esperado e baixa o arquivo se já foi publicado.
+        
+        Sem nenhum mês no manifesto, faz a verificação completa dos últimos meses
+        uma vez para descobrir o mais recente.
+        
+        Returns:
+            float: Segundos até a próxima verificação
+        """
+        self.status.checks += 1
+        self.status.last_check_at = self._timestamp()
+        self.bot.file_manager.ensure_download_directory()
+        
+        if self.status.expected_month is None:
+            latest = self.bot.probe_months(mode=self.bot.month_prober.MODE_LATEST).latest
+            if latest is None:
+                return self._record_check("unavailable", None)
+            return self._download(latest.year_month, latest.resolution)
+        
+        # Sempre no servidor: o 404 guardado no cache valeria por mais que o intervalo mínimo
+        probe = self.bot.month_prober.probe([self.status.expected_month], refresh=True).probes[0]
+        self.bot.metrics.inc('watch_checks_total', result='error' if probe.error_message else
+                             'available' if probe.available else 'unavailable')
+        if probe.error_message:
+            return self._record_check("error", probe.error_message)
+        if not probe.available:
+            self.logger.debug(f"{probe.filename} ainda não publicado (Status: {probe.status_code})")
+            self._unpublished_month = probe.year_month
+            newer = self._newer_publication(probe.year_month)
+            if newer is not None:
+                self.logger.warning(f"{probe.filename} não foi publicado na janela de publicação; "
+                                    f"avançando para {newer.filename}")
+                return self._download(newer.year_month, newer.resolution)
+            return self._record_check("unavailable", None)
+        
+        self.logger.success(f"Nova publicação detectada: {probe.filename}")
+        return self._download(probe.year_month, probe.resolution)
+    
+    def _download(self, year_month: str, resolution: Optional[Resolution] = None) -> float:
+        """Dispara o download do mês e avança o mês esperado em caso de sucesso."""
+        self._write_status(self.STATE_DOWNLOADING)
+        download_result, extraction_result = self.bot.download_month(year_month, resolution)
+        
+        if not download_result.success or (extraction_result is not None and not extraction_result.success):
+            error = download_result.error_message or (extraction_result and extraction_result.error_message)
+            return self._record_check("error", error or "Falha no processamento")
+        
+        if year_month == self._unpublished_month:
+            # Só a transição observada (não publicado -> publicado) indica o dia de publicação
+            self._remember_publication_day(self.bot.date_generator.get_brasilia_datetime().day)
+        self.status.latest_month = year_month
+        self.status.expected_month = self.bot.date_generator.next_month(year_month)
+        self.status.last_download_at = self._timestamp()
+        self.status.last_download_file = download_result.filename
+        self._record_check("downloaded", None)
+        # Verifica logo o mês seguinte (recupera vários meses após um período parado)
+        return 0.0
+    
+    def _newer_publication(self, year_month: str, now: Optional[datetime] = None) -> Optional[MonthProbe]:
+        """
+        Mês publicado mais antigo depois de `year_month`, se este já passou da janela de publicação.
+        
+        O arquivo de um mês sai no mês seguinte; passada a janela desse mês, um
+        mês mais novo publicado indica que o portal pulou `year_month`.
+        
+        Args:
+            year_month: Mês esperado ainda não publicado
+            now: Data/hora de referência no fuso de Brasília (padrão: agora)
+        """
+        now = now or self.bot.date_generator.get_brasilia_datetime()
+        current_month = now.strftime('%Y%m')
+        publication_month = self.bot.date_generator.next_month(year_month)
+        if current_month < publication_month or (current_month == publication_month
+                                                 and now.day <= self.publication_window()[1]):
+            return None
+        
+        # Do mês seguinte ao esperado até o anterior ao atual (o mês em andamento não foi publicado)
+        months = self.bot.date_generator.get_month_range(publication_month, current_month)[:-1]
+        if not months:
+            return None
+        probes = self.bot.month_prober.probe(months[::-1], mode=self.bot.month_prober.MODE_ALL,
+                                             refresh=True).probes
+        published = [probe for probe in probes if probe.available]
+        return min(published, key=lambda probe: probe.year_month) if published else None
+    
+    def _record_check(self, result: str, error: Optional[str]) -> float:
+        """Registra o resultado da verificação e calcula o próximo intervalo."""
+        self.status.last_check_result = result
+        if error:
+            self.status.consecutive_errors += 1
+            self.status.last_error = error
+            self.logger.error(f"Falha na verificação ({self.status.consecutive_errors} seguidas): {error}")
+            # Backoff exponencial a partir do intervalo mínimo, limitado ao máximo
+            return min(self.min_interval * 2 ** (self.status.consecutive_errors - 1), self.max_interval)
+        
+        self.status.consecutive_errors = 0
+        self.status.last_error = None
+        return self.next_interval()
+    
+    def next_interval(self, now: Optional[datetime] = None) -> float:
+        """
+        Segundos até a próxima verificação conforme a janela de publicação.
+        
+        Args:
+            now: Data/hora de referência no fuso de Brasília (padrão: agora)
+        """
+        now = now or self.bot.date_generator.get_brasilia_datetime()
+        first_day, last_day = self.publication_window()
+        if first_day <= now.day <= last_day:
+            return self.min_interval
+        
+        # Fora da janela: intervalo longo, sem passar do início da próxima janela
+        year, month = (now.year, now.month) if now.day < first_day else \
+            (now.year + now.month // 12, now.month % 12 + 1)
+        window_start = now.replace(year=year, month=month, day=first_day, hour=0, minute=0, second=0, microsecond=0)
+        until_window = (window_start - now).total_seconds()
+        return max(self.min_interval, min(self.max_interval, until_window))
+    
+    def publication_window(self) -> Tuple[int, int]:
+        """Dias do mês (inclusive) em que a publicação é esperada."""
+        days = self.status.publication_days
+        if not days:
+            return self.DEFAULT_PUBLICATION_DAYS
+        # Um dia de folga de cada lado; até o dia 28 para existir em todos os meses
+        return max(1, min(days) - 1), min(28, max(days) + 1)
+    
+    def _remember_publication_day(self, day: int) -> None:
+        days = self.status.publication_days
+        days.append(day)
+        del days[:-self.MAX_PUBLICATION_DAYS]
+        self.logger.debug(f"Janela de publicação: dias {self.publication_window()}")
+    
+    def _latest_local_month(self) -> Optional[str]:
+        """Mês mais recente registrado no manifesto do diretório de download."""
+        months = self.bot.manifest.months()
+        return months[-1] if months else None
+    
+    def _load_publication_days(self) -> list:
+        """Recupera os dias de publicação observados em execuções anteriores."""
+        try:
+            with open(self.status_path, 'r', encoding='utf-8') as file:
+                days = json.load(file).get('publication_days', [])
+            return [int(day) for day in days if 1 <= int(day) <= 31][-self.MAX_PUBLICATION_DAYS:]
+        except (OSError, ValueError, TypeError, AttributeError):
+            return []
+    
+    def _write_status(self, state: str) -> None:
+        """Grava o arquivo de status de forma atômica (arquivo temporário + rename)."""
+        self.status.state = state
+        self.status.updated_at = self._timestamp()
+        self.status.healthy = self.status.consecutive_errors < self.MAX_HEALTHY_ERRORS
+        temp_path = f"{self.status_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.status_path)), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(asdict(self.status), file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.status_path)
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar o status: {str(e)}")
+    
+    def _install_signal_handlers(self) -> None:
+        """SIGINT/SIGTERM encerram o laço após a etapa atual (somente na thread principal)."""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        
+        def handle(signum, frame):
+            self.logger.info(f"Sinal {signal.Signals(signum).name} recebido, encerrando...")
+            self.stop()
+        
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, handle)
+    
+    @staticmethod
+    def _timestamp() -> str:
+        return datetime.now().isoformat(timespec='seconds')
\ No newline at end of file
@@ -3,16 +3,86 @@ Extrator de arquivos ZIP para o PEP Downloader Bot.
 """
 import zipfile
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from .console_logger import ConsoleLogger
+from .file_manager import preallocate, space_error
+from .models import ExtractionResult
+
+
+def _extract_members(zip_path: str, tasks: List[Tuple[str, str, int]],
+                     buffer_size: int) -> List[Tuple[str, str]]:
+    """
+    Extrai um subconjunto de membros (executado em processo separado).
+    
+    Cada membro é gravado em "<destino>.part" e renomeado para o destino só
+    quando completo: quem lê o diretório nunca vê um arquivo pela metade.
+    
+    Args:
+        zip_path: Caminho para o arquivo ZIP (aberto de forma independente)
+        tasks: (nome do membro, caminho de destino já validado, tamanho descompactado)
+        buffer_size: Tamanho dos blocos de cópia
+    
+    Returns:
+        list: (nome do membro, mensagem de erro) dos membros que falharam
+    """
+    errors = []
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for member, target, size in tasks:
+            part_path = f"{target}.part"
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+                with os.fdopen(fd, 'wb', buffering=0) as output, zip_ref.open(member, 'r') as source:
+                    if size > 0:
+                        preallocate(output.fileno(), size)
+                    shutil.copyfileobj(source, output, buffer_size)
+                os.replace(part_path, target)
+            except (zipfile.BadZipFile, OSError, EOFError, ValueError) as e:
+                errors.append((member, str(e) or type(e).__name__))
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
+    return errors
+
+
+def _check_member(zip_path: str, member: str) -> Tuple[str, Optional[str]]:
+    """
+    Lê um membro do ZIP até o fim, o que valida o CRC-32 (executado em processo separado).
+    
+    Returns:
+        tuple: (nome do membro, mensagem de erro ou None)
+    """
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            with zip_ref.open(member, 'r') as stream:
+                while stream.read(1024 * 1024):
+                    pass
+        return member, None
+    except (zipfile.BadZipFile, OSError, EOFError, ValueError) as e:
+        return member, str(e) or type(e).__name__
 
 
 class ZipExtractor:
     """Gerencia extração de arquivos ZIP com segurança."""
     
-    def __init__(self, logger: Optional[ConsoleLogger] = None):
+    # Tamanho do buffer de cópia (membro descompactado -> arquivo de saída)
+    COPY_BUFFER_SIZE = 1024 * 1024
+    # Abaixo deste total, iniciar processos custa mais que extrair em série
+    PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+    
+    def __init__(self, logger: Optional[ConsoleLogger] = None, workers: Optional[int] = None):
+        """
+        Args:
+            logger: Logger para mensagens
+            workers: Número máximo de processos na extração (padrão: número de CPUs)
+        """
         self.logger = logger or ConsoleLogger()
+        self.workers = workers
     
     def extract_zip(self, zip_path: str, extract_to: str) -> bool:
         """
@@ -25,49 +95,152 @@ class ZipExtractor:
         Returns:
             bool: True se extração foi bem-sucedida
         """
-        try:
-            if not os.path.exists(zip_path):
-                self.logger.error(f"Arquivo ZIP não encontrado: {zip_path}")
-                return False
-            
-            # Verificar se é um arquivo ZIP válido
-            if not zipfile.is_zipfile(zip_path):
-                self.logger.error(f"Arquivo não é um ZIP válido: {zip_path}")
-                return False
-            
-            self.logger.info(f"Iniciando extração de: {zip_path}")
+        return self.extract(zip_path, extract_to).success
+    
+    def extract(self, zip_path: str, extract_to: str) -> ExtractionResult:
+        """
+        Extrai os membros do ZIP, em paralelo quando há vários membros grandes.
+        
+        Os caminhos são validados uma única vez (path traversal); cada processo
+        abre o arquivo por conta própria e extrai um subconjunto dos membros,
+        equilibrado pelo tamanho descompactado, com cópia em blocos grandes
+        para arquivos pré-alocados. Os tamanhos vêm do ZipInfo, sem stat.
+        
+        Args:
+            zip_path: Caminho para o arquivo ZIP
+            extract_to: Diretório onde extrair os arquivos
             
+        Returns:
+            ExtractionResult: Arquivos extraídos e seus tamanhos
+        """
+        start_time = time.time()
+        
+        def failure(message: str) -> ExtractionResult:
+            self.logger.error(message)
+            return ExtractionResult(success=False, extracted_files=[], extraction_path=extract_to,
+                                    error_message=message, extraction_time=time.time() - start_time)
+        
+        if not os.path.exists(zip_path):
+            return failure(f"Arquivo ZIP não encontrado: {zip_path}")
+        
+        self.logger.info(f"Iniciando extração de: {zip_path}")
+        try:
+            # A abertura já valida o diretório central (BadZipFile se inválido)
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Listar conteúdo do ZIP
-                file_list = zip_ref.namelist()
-                self.logger.info(f"Arquivos no ZIP: {len(file_list)}")
-                
-                for file_info in zip_ref.infolist():
-                    # Proteção contra path traversal
-                    if self._is_safe_path(file_info.filename, extract_to):
-                        self.logger.debug(f"Extraindo: {file_info.filename}")
-                        zip_ref.extract(file_info, extract_to)
-                    else:
-                        self.logger.error(f"Caminho inseguro ignorado: {file_info.filename}")
-                
-                extracted_files = [f for f in file_list if self._is_safe_path(f, extract_to)]
-                self.logger.success(f"Extração concluída. {len(extracted_files)} arquivos extraídos em: {extract_to}")
-                
-                # Listar arquivos extraídos
-                for filename in extracted_files:
-                    full_path = os.path.join(extract_to, filename)
-                    if os.path.exists(full_path):
-                        size = os.path.getsize(full_path)
-                        self.logger.info(f"  - {filename} ({size / (1024*1024):.2f} MB)")
-                
-                return True
-                
+                infos = zip_ref.infolist()
         except zipfile.BadZipFile:
-            self.logger.error(f"Arquivo ZIP corrompido: {zip_path}")
-            return False
+            return failure(f"Arquivo ZIP corrompido: {zip_path}")
+        except OSError as e:
+            return failure(f"Erro durante extração: {str(e)}")
+        
+        self.logger.info(f"Arquivos no ZIP: {len(infos)}")
+        
+        # Proteção contra path traversal (verificada uma única vez por membro)
+        tasks = []
+        sizes: Dict[str, int] = {}
+        for info in infos:
+            target = self._safe_target(info.filename, extract_to)
+            if target is None:
+                self.logger.error(f"Caminho inseguro ignorado: {info.filename}")
+                continue
+            if info.is_dir():
+                try:
+                    os.makedirs(target, exist_ok=True)
+                except OSError as e:
+                    return failure(f"Erro ao criar o diretório {info.filename}: {str(e)}")
+                continue
+            tasks.append((info.filename, target, info.file_size))
+            sizes[info.filename] = info.file_size
+        
+        # Espaço pelo tamanho descompactado real (diretório central do ZIP)
+        error = space_error(extract_to, sum(sizes.values()))
+        if error:
+            return failure(error)
+        
+        try:
+            errors = self._run_extraction(zip_path, tasks)
         except Exception as e:
-            self.logger.error(f"Erro durante extração: {str(e)}")
+            return failure(f"Erro durante extração: {str(e)}")
+        
+        if errors:
+            for member, error in errors:
+                self.logger.error(f"Falha ao extrair {member}: {error}")
+            return failure(f"Falha na extração de {len(errors)} arquivo(s) de {zip_path}")
+        
+        elapsed = time.time() - start_time
+        self.logger.success(f"Extração concluída. {len(sizes)} arquivos extraídos em: {extract_to} ({elapsed:.1f}s)")
+        for filename, size in sizes.items():
+            self.logger.info(f"  - {filename} ({size / (1024*1024):.2f} MB)")
+        
+        return ExtractionResult(
+            success=True,
+            extracted_files=list(sizes),
+            extraction_path=extract_to,
+            file_sizes=sizes,
+            extraction_time=elapsed
+        )
+    
+    def _run_extraction(self, zip_path: str, tasks: List[Tuple[str, str, int]]) -> List[Tuple[str, str]]:
+        """Distribui os membros entre processos (ou extrai em série) e retorna os erros."""
+        total_size = sum(size for _, _, size in tasks)
+        workers = min(self.workers or os.cpu_count() or 1, len(tasks))
+        if workers < 2 or total_size < self.PARALLEL_MIN_BYTES:
+            return _extract_members(zip_path, tasks, self.COPY_BUFFER_SIZE)
+        
+        # Maiores primeiro, sempre para o grupo com menos bytes
+        groups: List[List[Tuple[str, str, int]]] = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for task in sorted(tasks, key=lambda item: item[2], reverse=True):
+            lightest = loads.index(min(loads))
+            groups[lightest].append(task)
+            loads[lightest] += task[2]
+        
+        self.logger.debug(f"Extração paralela: {len(tasks)} arquivos em {workers} processos")
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_extract_members, zip_path, group, self.COPY_BUFFER_SIZE)
+                       for group in groups if group]
+            for future in futures:
+                errors.extend(future.result())
+        return errors
+    
+    def verify_zip(self, zip_path: str, workers: Optional[int] = None) -> bool:
+        """
+        Verifica o CRC-32 de todos os membros do ZIP em uma única leitura de cada um.
+        
+        Com mais de um membro, a verificação é distribuída entre processos
+        (a descompressão é limitada por CPU).
+        
+        Args:
+            zip_path: Caminho para o arquivo ZIP
+            workers: Número máximo de processos (padrão: número de CPUs)
+            
+        Returns:
+            bool: True se todos os membros estão íntegros
+        """
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                members = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+        except (zipfile.BadZipFile, OSError) as e:
+            self.logger.error(f"Arquivo ZIP corrompido: {zip_path} ({str(e)})")
             return False
+        
+        self.logger.info(f"Verificando integridade de {len(members)} arquivo(s) em {zip_path}...")
+        workers = min(workers or os.cpu_count() or 1, len(members))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_check_member, [zip_path] * len(members), members))
+        else:
+            results = [_check_member(zip_path, member) for member in members]
+        
+        errors = [(member, error) for member, error in results if error]
+        for member, error in errors:
+            self.logger.error(f"Membro corrompido: {member} ({error})")
+        if errors:
+            return False
+        
+        self.logger.success(f"ZIP íntegro: {zip_path}")
+        return True
     
     def list_zip_contents(self, zip_path: str) -> List[str]:
         """
@@ -80,13 +253,12 @@ class ZipExtractor:
             List[str]: Lista de nomes de arquivo no ZIP
         """
         try:
-            if not zipfile.is_zipfile(zip_path):
-                self.logger.error(f"Arquivo não é um ZIP válido: {zip_path}")
-                return []
-            
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                 return zip_ref.namelist()
                 
+        except zipfile.BadZipFile:
+            self.logger.error(f"Arquivo não é um ZIP válido: {zip_path}")
+            return []
         except Exception as e:
             self.logger.error(f"Erro ao listar conteúdo do ZIP: {str(e)}")
             return []
@@ -102,9 +274,15 @@ class ZipExtractor:
         Returns:
             bool: True se o caminho é seguro
         """
+        return self._safe_target(filename, extract_to) is not None
+    
+    def _safe_target(self, filename: str, extract_to: str) -> Optional[str]:
+        """Caminho absoluto de destino do membro, ou None se sair do diretório de extração."""
         # Normalizar caminhos
         extract_to = os.path.abspath(extract_to)
         full_path = os.path.abspath(os.path.join(extract_to, filename))
         
         # Verificar se o caminho final está dentro do diretório de extração
-        return full_path.startswith(extract_to)
\ No newline at end of file
+        if full_path == extract_to or os.path.commonpath([extract_to, full_path]) != extract_to:
+            return None
+        return full_path
\ No newline at end of file
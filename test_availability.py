@@ -2,13 +2,14 @@
 """
 Script para testar quais arquivos PEP estão disponíveis no servidor.
 """
+import os
 from pep_downloader.bot import PEPDownloaderBot
 
 def main():
     print("=== Verificando arquivos PEP disponíveis ===")
     
-    # Criar bot com logs verbosos
-    bot = PEPDownloaderBot(verbose=True)
+    # Criar bot com logs verbosos (PEP_BASE_URL aponta para um servidor local, se definido)
+    bot = PEPDownloaderBot(verbose=True, base_url=os.getenv('PEP_BASE_URL'))
     
     # Verificar arquivos disponíveis nos últimos 12 meses
     available_files = bot.check_available_files(months_back=12)